@@ -24,6 +24,36 @@ ibmpowervm_opts = [
     cfg.IntOpt('pypowervm_job_request_timeout',
                default=1800,
                help='Default timeout in seconds for PowerVM Job requests.'),
+    cfg.FloatOpt('pypowervm_job_poll_max_interval',
+                 default=5.0,
+                 help='Maximum interval in seconds between polls of a '
+                      'running PowerVM Job.  Jobs are polled more often '
+                      'right after they start, and as soon as the event feed '
+                      'reports a change to them.'),
+    cfg.IntOpt('pypowervm_job_async_workers',
+               default=8,
+               help='Maximum number of PowerVM Job requests which '
+                    'Job.run_job_async submits to the REST server at once.  '
+                    'Running Jobs are monitored separately, so this does not '
+                    'limit how many Jobs may run concurrently.'),
+    cfg.IntOpt('pypowervm_feed_getter_workers',
+               default=8,
+               help='Maximum number of concurrent GETs issued when a '
+                    'FeedGetter refreshes its entries or a UUIDFeedGetter '
+                    'fetches its objects.  Set to 1 to fetch serially.'),
+    cfg.IntOpt('pypowervm_feed_task_workers',
+               default=32,
+               help='Number of threads in the pool shared by all FeedTasks '
+                    'created with use_engine=False to run their '
+                    'WrapperTasks.  Each FeedTask still runs at most its own '
+                    'max_workers WrapperTasks at once.'),
+    cfg.StrOpt('pypowervm_entry_transaction_lock_path',
+               help='If set, entry_transaction (and thus WrapperTask and '
+                    'FeedTask) also holds a file lock in this directory '
+                    'while it modifies an object, serializing updates to '
+                    'the object across all processes sharing the '
+                    'directory.  By default, updates are only serialized '
+                    'within a process.'),
 ]
 
 CONF = cfg.CONF
@@ -13,6 +13,7 @@
 #    under the License.
 """Low-level communication with the PowerVM REST API."""
 import abc
+import collections
 import copy
 import errno
 import hashlib
@@ -28,13 +29,16 @@ import pypowervm.exceptions as pvmex
 
 
 import requests
+import requests.adapters as rqadapters
 import requests.exceptions as rqex
 import six
+from six.moves import http_cookiejar as cookiejar
 import six.moves.urllib.parse as urllib
 import weakref
 
 from lxml import etree
 from oslo_log import log as logging
+from pypowervm import cache
 from pypowervm import const as c
 from pypowervm.i18n import _
 from pypowervm import traits as pvm_traits
@@ -65,7 +69,8 @@ class Session(object):
     """Responsible for PowerVM API session management."""
     def __init__(self, host='localhost', username=None, password=None,
                  auditmemento=None, protocol=None, port=None, timeout=1200,
-                 certpath='/etc/ssl/certs/', certext='.crt', conn_tries=1):
+                 certpath='/etc/ssl/certs/', certext='.crt', conn_tries=1,
+                 keepalive=True, pool_maxsize=10, pool_idle_timeout=300):
         """Persistent authenticated session with the REST API server.
 
         Two authentication modes are supported: password- and file-based.
@@ -101,6 +106,23 @@ class Session(object):
                            means we only try once.  We sleep for two seconds
                            (subject to change in future versions) between
                            retries.
+        :param keepalive: If True (the default), HTTP connections to the REST
+                          server are pooled and reused across requests made
+                          through this Session, avoiding a TCP/TLS handshake
+                          per request.  If False, each request uses (and then
+                          closes) its own connection.
+        :param pool_maxsize: Maximum number of connections to keep in the
+                             pool.  This should be at least the number of
+                             threads expected to issue requests concurrently
+                             through this Session.  Ignored if keepalive is
+                             False.
+        :param pool_idle_timeout: Number of seconds a connection pool may sit
+                                  unused before it is closed and replaced on
+                                  the next request.  This prevents reuse of
+                                  sockets the server (or an intervening
+                                  firewall) has likely dropped.  None or zero
+                                  disables idle eviction.  Ignored if keepalive
+                                  is False.
         :return: A logged-on session suitable for passing to the Adapter
                  constructor.
         """
@@ -151,11 +173,22 @@ class Session(object):
         self.timeout = timeout
         self.certpath = certpath
         self.certext = certext
+        self.keepalive = keepalive
+        self.pool_maxsize = pool_maxsize
+        self.pool_idle_timeout = pool_idle_timeout
 
         self._lock = threading.RLock()
+        # Pooled requests.Session instances, keyed by the 'verify' setting.
+        # See _get_http_session.
+        self._http_lock = threading.Lock()
+        self._http_sessions = {}
+        # Pools evicted while requests were using them, by requests.Session.
+        # Each is closed when its last request is released.
+        self._draining_http_sessions = {}
         self._logged_in = False
         self._relogin_unsafe = False
         self._eventlistener = None
+        self._invalidation_index = None
 
         # Will be set by _logon()
         self._sessToken = None
@@ -194,7 +227,10 @@ class Session(object):
             if self.has_event_listener:
                 self._eventlistener.shutdown()
         finally:
-            self._logoff()
+            try:
+                self._logoff()
+            finally:
+                self._close_http_sessions()
 
     def get_event_listener(self):
         if not self.has_event_listener:
@@ -206,6 +242,123 @@ class Session(object):
     def has_event_listener(self):
         return self._eventlistener is not None
 
+    def get_invalidation_index(self):
+        """Get the GenerationIndex maintained from this Session's events.
+
+        On first invocation, the event listener is started (if it isn't
+        already) and a pypowervm.cache.GenerationIndex is subscribed to it.
+        The index can be passed to consumers such as EntryWrapperGetter,
+        FeedGetter, partition.get_physical_wwpns, and MetricCache, allowing
+        them to skip refetching objects which have not changed.
+
+        :return: The pypowervm.cache.GenerationIndex for this Session.
+        """
+        with self._lock:
+            if self._invalidation_index is None:
+                index = cache.GenerationIndex()
+                self.get_event_listener().subscribe(_CacheEventHandler(index))
+                self._invalidation_index = index
+            return self._invalidation_index
+
+    def _new_http_session(self):
+        """Create a requests.Session with a connection pool for this host."""
+        session = requests.Session()
+        pool = rqadapters.HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=self.pool_maxsize)
+        session.mount('http://', pool)
+        session.mount('https://', pool)
+        # Every request carries its own X-API-Session header.  Don't let
+        # cookies set by the server leak between requests (and threads)
+        # sharing the pool - in particular across a re-login.
+        session.cookies.set_policy(
+            cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def _get_http_session(self, verify):
+        """Retrieve the requests.Session to use for an HTTP request.
+
+        If keepalive is enabled, this is a long-lived requests.Session shared
+        by all threads issuing requests through this Session, so that pooled
+        connections are reused.  A pool that has been idle for longer than
+        pool_idle_timeout is closed and replaced.
+
+        Each call must be paired with a call to _release_http_session.
+
+        :param verify: The 'verify' setting for the request.
+        :return: A requests.Session instance.
+        """
+        if not self.keepalive:
+            session = requests.Session()
+            session.verify = verify
+            return session
+
+        with self._http_lock:
+            now = time.time()
+            pooled = self._http_sessions.get(verify)
+            if (pooled is not None and self.pool_idle_timeout and
+                    pooled['inflight'] == 0 and
+                    now - pooled['last_used'] > self.pool_idle_timeout):
+                LOG.debug('Evicting idle connection pool for %s', self.host)
+                pooled['session'].close()
+                pooled = None
+            if pooled is None:
+                session = self._new_http_session()
+                session.verify = verify
+                pooled = {'session': session, 'inflight': 0}
+                self._http_sessions[verify] = pooled
+            pooled['inflight'] += 1
+            pooled['last_used'] = now
+            return pooled['session']
+
+    def _release_http_session(self, session, verify, evict=False):
+        """Release a requests.Session obtained from _get_http_session.
+
+        :param session: The requests.Session returned by _get_http_session.
+        :param verify: The 'verify' setting passed to _get_http_session.
+        :param evict: If True, the pooled connections are discarded (once no
+                      other requests are using them) rather than reused.  Used
+                      after connection-level errors.
+        """
+        if not self.keepalive:
+            session.close()
+            return
+
+        with self._http_lock:
+            pooled = self._http_sessions.get(verify)
+            if pooled is None or pooled['session'] is not session:
+                # Evicted while this request was using it.
+                pooled = self._draining_http_sessions.get(session)
+                if pooled is None:
+                    # Already closed by _close_http_sessions.
+                    return
+                pooled['inflight'] -= 1
+                if pooled['inflight'] == 0:
+                    del self._draining_http_sessions[session]
+                    session.close()
+                return
+            pooled['inflight'] -= 1
+            pooled['last_used'] = time.time()
+            if evict:
+                # Force a fresh pool on the next request.
+                del self._http_sessions[verify]
+                if pooled['inflight'] == 0:
+                    session.close()
+                else:
+                    self._draining_http_sessions[session] = pooled
+
+    def _close_http_sessions(self):
+        """Close all pooled connections to the REST server."""
+        with self._http_lock:
+            for pooled in (list(self._http_sessions.values()) +
+                           list(self._draining_http_sessions.values())):
+                try:
+                    pooled['session'].close()
+                except Exception:
+                    LOG.debug('Ignoring error closing connection pool.',
+                              exc_info=True)
+            self._http_sessions = {}
+            self._draining_http_sessions = {}
+
     @staticmethod
     def _chunkreader(filehandle, chunksize):
         if hasattr(filehandle, 'read'):
@@ -218,9 +371,18 @@ class Session(object):
             for d in filehandle:
                 yield d
 
+    @staticmethod
+    def _iter_response(response, chunksize):
+        """Yield the content of a streamed response, then close it."""
+        try:
+            for chunk in response.iter_content(chunksize):
+                yield chunk
+        finally:
+            response.close()
+
     def request(self, method, path, headers=None, body='', sensitive=False,
                 verify=False, timeout=-1, auditmemento=None, relogin=True,
-                login=False, filehandle=None, chunksize=65536):
+                login=False, filehandle=None, chunksize=65536, stream=False):
         """Send an HTTP/HTTPS request to a PowerVM interface.
 
         :param filehandle: For downloads (with method == 'GET'), a writable
@@ -240,15 +402,21 @@ class Session(object):
                           For uploads when filehandle is an iterable, this arg
                           is ignored - content chunks are sent through the
                           request in whatever size the iterable yields them.
+                          For streamed GETs, the content is read from the
+                          connection in increments of (at most) chunksize
+                          bytes.
                           For other request types, this arg is ignored.
+        :param stream: If True (GET only), the body of a successful response
+                       is not read up front.  Instead, it is pulled from the
+                       connection as it is unmarshalled (see
+                       Response._unmarshal_atom), and the returned Response's
+                       body is empty.  The connection is released when the
+                       body has been consumed.
         """
         # Don't use mutable default args
         if headers is None:
             headers = {}
 
-        session = requests.Session()
-        session.verify = verify
-
         url = self.dest + path
 
         # If timeout isn't specified, use session default
@@ -270,6 +438,8 @@ class Session(object):
             else:
                 raise ValueError(_('Unexpected filehandle on %s request')
                                  % method)
+        elif stream and method != 'GET':
+            raise ValueError(_('Unexpected stream on %s request') % method)
 
         if isupload:
             LOG.trace('sending %s %s headers=%s body=<file contents>',
@@ -287,23 +457,27 @@ class Session(object):
                 headers['X-API-Session'] = self._sessToken
                 sess_token_try = self._sessToken
 
+        session = self._get_http_session(verify)
+        conn_error = False
         try:
             if isupload:
                 response = session.request(
                     method, url, data=self._chunkreader(filehandle, chunksize),
                     headers=headers, timeout=timeout)
-            elif isdownload:
+            elif isdownload or stream:
                 response = session.request(method, url, stream=True,
                                            headers=headers, timeout=timeout)
             else:
                 response = session.request(method, url, data=body,
                                            headers=headers, timeout=timeout)
         except rqex.SSLError as e:
+            conn_error = True
             # TODO(IBM) Get better responses here...this isn't good.
             msg = '%s for %s %s: %s' % (e.__class__.__name__, method, url, e)
             LOG.warning(msg)
             raise pvmex.SSLError(msg)
         except rqex.ConnectionError as e:
+            conn_error = True
             msg = '%s for %s %s: %s' % (e.__class__.__name__, method, url, e)
             LOG.warning(msg)
             raise pvmex.ConnectionError(msg)
@@ -319,7 +493,7 @@ class Session(object):
                               {'class': e.__class__.__name__, 'method': method,
                                'url': url, 'excp': str(e)})
         finally:
-            session.close()
+            self._release_http_session(session, verify, evict=conn_error)
 
         # remove X-API-Session header so it won't get printed
         if not login:
@@ -337,9 +511,14 @@ class Session(object):
 
         if response.status_code in [c.HTTPStatus.OK_NO_CONTENT,
                                     c.HTTPStatus.NO_CHANGE]:
+            if isdownload or stream:
+                # Return the streamed connection to the pool.
+                response.close()
             return Response(method, path, response.status_code,
                             response.reason, response.headers,
                             reqheaders=headers, reqbody=body)
+        elif stream and 200 <= response.status_code < 300:
+            LOG.trace('response body: <streamed>')
         else:
             LOG.trace('response body:\n%s',
                       response.text if not sensitive else "<sensitive>")
@@ -391,7 +570,8 @@ class Session(object):
                     try:
                         return self.request(method, path, headers, body,
                                             sensitive=sensitive, verify=verify,
-                                            timeout=timeout, relogin=False)
+                                            timeout=timeout, relogin=False,
+                                            chunksize=chunksize, stream=stream)
                     except pvmex.HttpUnauth as e:
                         # This is a special case... normally on a 401 we
                         # would retry login, but we won't here because
@@ -405,7 +585,12 @@ class Session(object):
                             {'method': method, 'path': path})
 
         resp = None
-        if not isdownload:
+        if stream and 200 <= response.status_code < 300:
+            resp = Response(method, path, response.status_code,
+                            response.reason, response.headers,
+                            reqheaders=headers, reqbody=body)
+            resp._body_iter = self._iter_response(response, chunksize)
+        elif not isdownload:
             resp = Response(method, path, response.status_code,
                             response.reason, response.headers,
                             reqheaders=headers, reqbody=body,
@@ -415,6 +600,7 @@ class Session(object):
             if isdownload:
                 for chunk in response.iter_content(chunksize):
                     filehandle.write(chunk)
+                response.close()
                 resp = Response(method, path, response.status_code,
                                 response.reason, response.headers,
                                 reqheaders=headers, reqbody=body)
@@ -424,6 +610,7 @@ class Session(object):
                 errtext = ''
                 for chunk in response.iter_content(chunksize):
                     errtext += chunk
+                response.close()
                 resp = Response(method, path, response.status_code,
                                 response.reason, response.headers,
                                 reqheaders=headers, reqbody=body,
@@ -578,23 +765,61 @@ class Session(object):
 
 class Adapter(object):
     """REST API Adapter for PowerVM remote management."""
-    def __init__(self, session=None, use_cache=False, helpers=None):
+    def __init__(self, session=None, use_cache=False, helpers=None,
+                 coalesce_reads=False):
         """Create a new Adapter instance, connected to a Session.
 
         :param session: (Optional) A Session instance.  If not specified, a
                         new, local, file-authentication-based Session will be
                         created and used.
-        :param use_cache: Do not use.  Caching not supported.
+        :param use_cache: If True, successful GETs of Atom feeds/entries are
+                          cached in-process (see pypowervm.cache).  Subsequent
+                          reads of the same path (including xag) are
+                          revalidated with If-None-Match; an HTTP 304 (no
+                          change) is turned into a copy of the cached
+                          Response.  Cached Responses are invalidated by
+                          updates/deletes through this Adapter and by the
+                          Session's Event feed.
         :param helpers: A list of decorator methods in which to wrap the HTTP
                         request call.  See the pypowervm.helpers package for
                         examples.
+        :param coalesce_reads: If True, concurrent identical GETs through
+                               read_by_path (same path - thus xag and Accept -
+                               etag and audit memento) share a single request;
+                               each caller gets its own copy of the Response.
+                               GETs which are sensitive, streamed, or given
+                               helpers are never coalesced.  Each caller also
+                               gets its own copy of any exception (and its
+                               Response).  Writes through this Adapter stop
+                               later GETs from joining those in progress;
+                               writes by other Adapters or processes do not,
+                               so a GET issued right after such a write may
+                               get the result of one issued before it.  Only
+                               enable this where that does not matter.
+                               Defaults to False.
         """
-        if use_cache:
-            raise pvmex.CacheNotSupportedException()
-
         self.session = session if session else Session()
         self._helpers = self._standardize_helper_list(helpers)
+        # (adapter, helper list, composed request method) - see _helper_stack
+        self._stack = None
         self._sys_uuid = None
+        self._inflight = cache.SingleFlight() if coalesce_reads else None
+        self._cache = None
+        if use_cache:
+            self._cache = cache.ResponseCache()
+            try:
+                self.session.get_event_listener().subscribe(
+                    _CacheEventHandler(self._cache))
+            except Exception as e:
+                # The cache is still coherent (reads are revalidated) - just
+                # less effective for callers using age.
+                LOG.warning(_("Unable to subscribe the response cache to "
+                              "PowerVM events: %s"), e)
+
+    @property
+    def cache(self):
+        """The pypowervm.cache.ResponseCache, or None if not caching."""
+        return self._cache
 
     @staticmethod
     def _standardize_helper_list(helpers):
@@ -608,6 +833,15 @@ class Adapter(object):
         """Returns a copy of the list of helpers for the adapter."""
         return list(self._helpers) if self._helpers else []
 
+    @helpers.setter
+    def helpers(self, helpers):
+        """Replace the helpers with which the adapter's requests are wrapped.
+
+        :param helpers: A decorator method or list thereof, or None.  See
+                        __init__.
+        """
+        self._helpers = self._standardize_helper_list(helpers)
+
     @property
     def sys_uuid(self):
         if self._sys_uuid is None:
@@ -620,6 +854,40 @@ class Adapter(object):
     def traits(self):
         return self.session.traits
 
+    def _session_request(self, *args, **kwds):
+        """Base of the helper stack: the current Session's request method."""
+        return self.session.request(*args, **kwds)
+
+    def _build_helper_stack(self, helpers):
+        """Wrap the Session's request method in a list of helpers.
+
+        :param helpers: List of helpers (see __init__).  The first is the
+                        outermost.
+        :return: Callable with the signature of Session.request.
+        """
+        # The base will always be the session.request method
+        func = self._session_request
+        # Stack the helpers by reversing the order list
+        for helper in reversed(helpers or []):
+            func = helper(func)
+        return func
+
+    def _helper_stack(self):
+        """The request method wrapped in this Adapter's own helpers.
+
+        The stack is built on first use and reused until the helpers are
+        replaced.  The Session is looked up on each call, so replacing it does
+        not require a rebuild.
+        """
+        stack = self._stack
+        # A (shallow) copy of this Adapter must not use our stack.
+        if stack is None or stack[0] is not self or (
+                stack[1] is not self._helpers):
+            stack = (self, self._helpers,
+                     self._build_helper_stack(self._helpers))
+            self._stack = stack
+        return stack[2]
+
     def _request(self, method, path, helpers=None, **kwds):
         """Common request method.
 
@@ -628,16 +896,9 @@ class Adapter(object):
         """
         helpers = self._standardize_helper_list(helpers)
         if helpers is None:
-            helpers = self._helpers
-
-        # Build the stack of helper functions to call.
-        # The base will always be the session.request method
-        func = self.session.request
-
-        # Stack the helpers by reversing the order list
-        if helpers is not None:
-            for helper in helpers[::-1]:
-                func = helper(func)
+            func = self._helper_stack()
+        else:
+            func = self._build_helper_stack(helpers)
 
         # Now just call the function
         resp = func(method, path, **kwds)
@@ -704,13 +965,15 @@ class Adapter(object):
         resp = self._request('PUT', path, helpers=helpers, headers=headers,
                              body=element.toxmlstring(), timeout=timeout,
                              auditmemento=auditmemento, sensitive=sensitive)
+        self._invalidate_cache(path)
         resp._unmarshal_atom()
         return resp
 
     def read(self, root_type, root_id=None, child_type=None, child_id=None,
              suffix_type=None, suffix_parm=None, detail=None, service='uom',
              etag=None, timeout=-1, auditmemento=None, age=-1, xag=None,
-             sensitive=False, helpers=None, add_qp=None, topology=None):
+             sensitive=False, helpers=None, add_qp=None, topology=None,
+             stream=False):
         """Retrieve an existing resource.
 
         Will build the URI path using the provided arguments.
@@ -730,12 +993,19 @@ class Adapter(object):
                             in .../do/Something).
         :param detail: Requested detail level of the response.  Obsolete.
         :param service: REST service type, one of pypowervm.const.SERVICE_BY_NS
-        :param etag: Not used (caching disabled).
+        :param etag: If specified, sent as the If-None-Match header.  If the
+                     resource is unchanged, the returned Response will have
+                     status 304 (pypowervm.const.HTTPStatus.NO_CHANGE) and no
+                     feed/entry.
         :param timeout: Timeout in seconds for the HTTP request.
         :param auditmemento: X-Audit-Memento header registered in the REST
                              server logs for debug purposes, allowing this
                              request to be identified therein.
-        :param age: Not used (caching disabled).
+        :param age: Only used if the Adapter was created with use_cache=True.
+                    If the cached Response for this path was retrieved (or
+                    revalidated) no more than this many seconds ago, it is
+                    returned without contacting the REST server.  If -1 (the
+                    default), the cached Response is always revalidated.
         :param xag: List of extended attribute group enum values.  If
                     unspecified or None, 'None' will be appended.  If the empty
                     list (xag=[]), no extended attribute query parameter will
@@ -748,6 +1018,12 @@ class Adapter(object):
                         examples.
         :param add_qp: Optional list of (key, value) tuples to add to the query
                        string of the request.
+        :param stream: If True and the result is a feed, the feed's entries
+                       are parsed incrementally, as they are received from the
+                       REST server, rather than all at once.  The returned
+                       Response's feed.entries is then a one-shot iterator
+                       rather than a list, and its body is empty.  The
+                       response cache is bypassed.
         :return: Response object representing the result of the query.
         """
         self._validate('read', root_type, root_id, child_type, child_id,
@@ -761,7 +1037,8 @@ class Adapter(object):
                                xag=xag, add_qp=add_qp, topology=topology)
         return self.read_by_path(path, etag, timeout=timeout,
                                  auditmemento=auditmemento, age=age,
-                                 sensitive=sensitive, helpers=helpers)
+                                 sensitive=sensitive, helpers=helpers,
+                                 stream=stream)
 
     def read_job(self, job_id, etag=None, timeout=-1, auditmemento=None,
                  sensitive=False, helpers=None):
@@ -793,19 +1070,58 @@ class Adapter(object):
                                  sensitive=sensitive, helpers=helpers)
 
     def read_by_path(self, path, etag=None, timeout=-1, auditmemento=None,
-                     age=-1, sensitive=False, helpers=None):
+                     age=-1, sensitive=False, helpers=None, stream=False):
         """Retrieve an existing resource where URI path is already known."""
 
         path = util.dice_href(path)
-        resp = self._read_by_path(path, etag, timeout, auditmemento,
-                                  sensitive, helpers=helpers)
+        if stream:
+            resp = self._read_by_path(path, etag, timeout, auditmemento,
+                                      sensitive, helpers=helpers, stream=True)
+            if 'atom' in resp.reqheaders['Accept']:
+                resp._unmarshal_atom()
+            return resp
+        use_cache = self._cache is not None and not etag and not sensitive
+        if use_cache:
+            resp, etag = self._cache.get(path, age=age)
+            if resp is not None:
+                resp.adapter = self
+                return resp
+        if self._inflight is None or sensitive or helpers is not None:
+            return self._read_and_cache(path, etag, timeout, auditmemento,
+                                        sensitive, helpers, use_cache)
+        # The Accept header is determined by the path.
+        return self._inflight.do(
+            (path, etag, auditmemento),
+            lambda: self._read_and_cache(path, etag, timeout, auditmemento,
+                                         sensitive, helpers, use_cache))
+
+    def _read_and_cache(self, path, etag, timeout, auditmemento, sensitive,
+                        helpers, use_cache):
+        """GET, unmarshal and (if use_cache) cache a non-streamed Response."""
+        try:
+            resp = self._read_by_path(path, etag, timeout, auditmemento,
+                                      sensitive, helpers=helpers)
+        except pvmex.HttpNotFound:
+            if use_cache:
+                self._cache.invalidate_path(path)
+            raise
+        if use_cache and etag and resp.status == c.HTTPStatus.NO_CHANGE:
+            cached = self._cache.revalidated(path, etag)
+            if cached is not None:
+                cached.adapter = self
+                return cached
+            # Invalidated since we looked.  Fetch it for real.
+            resp = self._read_by_path(path, None, timeout, auditmemento,
+                                      sensitive, helpers=helpers)
         if 'atom' in resp.reqheaders['Accept']:
             resp._unmarshal_atom()
 
+        if use_cache and cache.is_cacheable(resp):
+            self._cache.put(path, resp)
         return resp
 
     def _read_by_path(self, path, etag, timeout, auditmemento, sensitive,
-                      helpers=None):
+                      helpers=None, stream=False):
         m = re.search(r'%s(\w+)/(\w+)' % c.API_BASE_PATH, path)
         if not m:
             raise ValueError(_('path=%s not a PowerVM API reference') % path)
@@ -820,9 +1136,12 @@ class Adapter(object):
             headers['Accept'] = 'application/atom+xml'
         if etag:
             headers['If-None-Match'] = etag
+        # Only Atom content can be unmarshalled from the stream.
+        kwds = {'stream': True} if stream and 'atom' in headers[
+            'Accept'] else {}
         resp = self._request('GET', path, helpers=helpers, headers=headers,
                              timeout=timeout, auditmemento=auditmemento,
-                             sensitive=sensitive)
+                             sensitive=sensitive, **kwds)
         return resp
 
     def update(self, data, etag, root_type, root_id=None, child_type=None,
@@ -865,6 +1184,7 @@ class Adapter(object):
         resp = self._request(
             'POST', path, helpers=helpers, headers=headers, body=body,
             timeout=timeout, auditmemento=auditmemento, sensitive=sensitive)
+        self._invalidate_cache(path)
 
         resp._unmarshal_atom()
         return resp
@@ -911,8 +1231,18 @@ class Adapter(object):
         headers = {}
         if etag:
             headers['If-Match'] = etag
-        return self._request('DELETE', path, helpers=helpers, headers=headers,
+        resp = self._request('DELETE', path, helpers=helpers, headers=headers,
                              timeout=timeout, auditmemento=auditmemento)
+        self._invalidate_cache(path)
+        return resp
+
+    def _invalidate_cache(self, path):
+        """Invalidate cached and in-flight Responses after a write to path."""
+        if self._inflight is not None:
+            # GETs now in progress may predate the write.
+            self._inflight.seal()
+        if self._cache is not None:
+            self._cache.invalidate(path)
 
     def upload_file(self, filedescr, filehandle, chunksize=65536,
                     timeout=-1, auditmemento=None, replacing=False,
@@ -1109,6 +1439,8 @@ class Response(object):
         self.entry = None
         # Set by _request()
         self.adapter = None
+        # Set by Session.request(stream=True): iterator over the body chunks
+        self._body_iter = None
 
     def __deepcopy__(self, memo=None):
         """Produce a deep (except for adapter) copy of this Response."""
@@ -1161,9 +1493,57 @@ class Response(object):
 
         return err_reason
 
+    def _iterparse(self):
+        """Generate lxml ('start'/'end', element) events from my body stream.
+
+        :raise AtomError: If the body is not well-formed XML.  This may not be
+                          detected until well after the first events.
+        """
+        parser = etree.XMLPullParser(events=('start', 'end'))
+        try:
+            for chunk in self._body_iter:
+                parser.feed(chunk)
+                for event in parser.read_events():
+                    yield event
+            parser.close()
+        except etree.XMLSyntaxError as e:
+            raise pvmex.AtomError(_('Error parsing XML response from PowerVM: '
+                                    '%s') % str(e), self)
+        for event in parser.read_events():
+            yield event
+
+    def _extract_atom_stream(self):
+        """Unmarshal my body stream and set my feed or entry accordingly.
+
+        A feed's properties are unmarshalled immediately, but its entries are
+        only parsed as they are consumed from feed.entries.
+
+        :return: A message indicating the reason for the error, or None if no
+                 error occurred.
+        """
+        events = self._iterparse()
+        try:
+            # The first event is the start of the root element.
+            root = next(events, (None, None))[1]
+            if root is None:
+                return _('Unexpectedly empty response body')
+            if root.tag == str(etree.QName(c.ATOM_NS, 'feed')):
+                self.feed = ent.Feed.iterparse_atom_feed(root, events, self)
+                return None
+            # Nothing to be gained by streaming anything else.
+            collections.deque(events, maxlen=0)
+        except pvmex.AtomError as e:
+            return str(e)
+        if root.tag == str(etree.QName(c.ATOM_NS, 'entry')):
+            self.entry = ent.Entry.unmarshal_atom_entry(root, self)
+            return None
+        return _('Response is not an Atom feed/entry')
+
     def _unmarshal_atom(self):
         err_reason = None
-        if self.body:
+        if self._body_iter is not None:
+            err_reason = self._extract_atom_stream()
+        elif self.body:
             err_reason = self._extract_atom()
         elif self.reqmethod == 'GET':
             if self.status == c.HTTPStatus.OK_NO_CONTENT:
@@ -1484,6 +1864,23 @@ class WrapperEventHandler(_EventHandler):
         pass
 
 
+class _CacheEventHandler(EventHandler):
+    """Feeds events to a ResponseCache or GenerationIndex."""
+    def __init__(self, resp_cache):
+        """Create the handler.
+
+        :param resp_cache: A pypowervm.cache.ResponseCache or GenerationIndex
+                           (anything with a process_events(events) method).
+        """
+        # Don't keep the cache (and its Responses) alive via the listener.
+        self._cache = weakref.ref(resp_cache)
+
+    def process(self, events):
+        resp_cache = self._cache()
+        if resp_cache is not None:
+            resp_cache.process_events(events)
+
+
 class _EventPollThread(threading.Thread):
     def __init__(self, eventlistener):
         threading.Thread.__init__(self)
@@ -0,0 +1,427 @@
+# Copyright 2026 IBM Corp.
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process caching of REST API data, driven by the PowerVM Event feed.
+
+ResponseCache is used by pypowervm.adapter.Adapter when constructed with
+use_cache=True.  GenerationIndex is provided by
+pypowervm.adapter.Session.get_invalidation_index.  SingleFlight coalesces the
+Adapter's concurrent identical GETs.
+"""
+
+import collections
+import copy
+import threading
+import time
+
+from oslo_log import log as logging
+
+from pypowervm import const as c
+from pypowervm import util
+
+LOG = logging.getLogger(__name__)
+
+# Default bounds for ResponseCache
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _uuid_and_type(href):
+    """Extract the target UUID and object type from an href.
+
+    :param href: Path or URI of an object or feed.
+    :return uuid: The lowercased UUID of the target object, or None if href
+                  does not contain a UUID.
+    :return otype: The schema type of the target object (the path segment
+                   preceding its UUID) or feed (the last path segment).  May
+                   be None.
+    """
+    path = util.dice_href(href, include_query=False, include_fragment=False)
+    uuid = util.get_req_path_uuid(path)
+    segments = path.split('/')
+    if uuid is None:
+        return None, segments[-1] or None
+    idx = [seg.lower() for seg in segments].index(uuid)
+    return uuid, segments[idx - 1] if idx > 0 else None
+
+
+class _CacheEntry(object):
+    """A single cached Response and its bookkeeping."""
+    def __init__(self, resp):
+        self.resp = resp
+        self.etag = resp.etag
+        self.size = len(resp.body) if resp.body else 0
+        self.stored = time.time()
+
+
+class ResponseCache(object):
+    """LRU, size-bounded cache of GET Responses, keyed by request path.
+
+    The key is the diced request path, which includes the query string and
+    therefore the extended attribute group (xag) - so the same object read
+    with different xags is cached separately.
+
+    Responses are stored and returned as deep copies, so callers may modify
+    the returned Response (and its feed/entry) freely.
+    """
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        """Create a ResponseCache.
+
+        :param max_entries: Maximum number of Responses to cache.  When
+                            exceeded, the least recently used entries are
+                            evicted.
+        :param max_bytes: Maximum total size, in bytes, of the bodies of the
+                          cached Responses.  When exceeded, the least recently
+                          used entries are evicted.  A single Response larger
+                          than this is not cached.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(path):
+        return util.dice_href(path)
+
+    def get(self, path, age=-1):
+        """Look up a cached Response.
+
+        :param path: The request path (or href).
+        :param age: If a cached Response exists and was stored (or last
+                    revalidated) no more than this many seconds ago, a copy of
+                    it is returned.  If -1 (the default), the cached Response
+                    is never returned directly - it must be revalidated with
+                    the returned etag.
+        :return resp: A copy of the cached Response if it satisfies age;
+                      otherwise None.
+        :return etag: The etag of the cached Response, or None if there is no
+                      cached Response (or it has no etag).
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+            if entry is None:
+                return None, None
+            self._entries.move_to_end(self._key(path))
+            if 0 <= age and time.time() - entry.stored <= age:
+                return copy.deepcopy(entry.resp), entry.etag
+            return None, entry.etag
+
+    def revalidated(self, path, etag):
+        """Indicate the server reported no change (HTTP 304) for a path.
+
+        :param path: The request path (or href).
+        :param etag: The etag which was sent (as If-None-Match) to the server.
+        :return: A copy of the cached Response, or None if it has been
+                 evicted, invalidated, or replaced since etag was retrieved.
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+            if entry is None or entry.etag != etag:
+                return None
+            entry.stored = time.time()
+            self._entries.move_to_end(self._key(path))
+            return copy.deepcopy(entry.resp)
+
+    def put(self, path, resp):
+        """Cache (a copy of) a successful GET Response.
+
+        :param path: The request path (or href).
+        :param resp: The pypowervm.adapter.Response to cache.
+        """
+        entry = _CacheEntry(copy.deepcopy(resp))
+        # Don't keep the Adapter alive via the cache.
+        entry.resp.adapter = None
+        if entry.size > self.max_bytes:
+            self.invalidate_path(path)
+            return
+        key = self._key(path)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def invalidate_path(self, path):
+        """Remove the cached Response(s) for exactly one path (any query)."""
+        base = util.dice_href(path, include_query=False,
+                              include_fragment=False)
+        with self._lock:
+            for key in [k for k in self._entries
+                        if util.dice_href(k, include_query=False,
+                                          include_fragment=False) == base]:
+                self._remove(key)
+
+    def invalidate(self, href):
+        """Remove cached Responses which may be affected by a change to href.
+
+        This includes any cached entry or feed whose path contains the UUID of
+        the object represented by href (e.g. the object itself, its children,
+        and its /quick properties), and any cached feed of the object's type.
+
+        :param href: Path or full URI of a changed, added, or deleted object,
+                     such as is reported by the Event feed.
+        """
+        uuid, otype = _uuid_and_type(href)
+        if uuid is None:
+            self.invalidate_path(href)
+            return
+        with self._lock:
+            for key in list(self._entries):
+                kpath = util.dice_href(key, include_query=False,
+                                       include_fragment=False)
+                if uuid in kpath.lower() or (
+                        otype and not util.is_instance_path(kpath) and
+                        kpath.rsplit('/', 1)[1] == otype):
+                    self._remove(key)
+
+    def clear(self):
+        """Remove all cached Responses."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def process_events(self, events):
+        """Invalidate cached Responses per Event feed notifications.
+
+        :param events: Events dict of the format {<uri>: <action>} - see
+                       pypowervm.adapter.EventHandler.process.
+        """
+        for href, action in events.items():
+            if href == 'general':
+                # 'init' or 'invalidate': we may have missed events.
+                LOG.debug('Clearing response cache on %s event.', action)
+                self.clear()
+                return
+        for href in events:
+            if href:
+                self.invalidate(href)
+
+
+class _Flight(object):
+    """A call in progress, and the callers waiting on it."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.copies = []
+        # Followers' copies of the exception, if the call failed
+        self.excs = []
+
+
+class SingleFlight(object):
+    """Coalesces concurrent identical calls into one.
+
+    The first caller for a key (the leader) runs the call.  Callers arriving
+    with the same key while it is in progress (followers) wait for it, and
+    then each get their own copy of its result - or the exception it raised.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {key: _Flight}
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    def do(self, key, func, copier=copy.deepcopy, exc_copier=None):
+        """Run func, or wait for an identical call already in progress.
+
+        :param key: Hashable identity of the call.
+        :param func: Callable, accepting no arguments, to run if no call with
+                     the same key is in progress.
+        :param copier: Callable producing a follower's copy of func's result.
+                       The copies are made before the leader returns, so the
+                       leader's caller may modify its result freely.
+        :param exc_copier: Callable producing a follower's copy of the
+                           exception raised by func.  Defaults to
+                           copy_exception.
+        :return: The result of func (to the leader), or a copy of it.
+        :raise: Whatever func raised (to the leader), or a copy of it.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            follower = flight is not None
+            if follower:
+                flight.followers += 1
+            else:
+                flight = self._flights[key] = _Flight()
+        if follower:
+            flight.done.wait()
+            if flight.excs:
+                raise flight.excs.pop()
+            return flight.copies.pop()
+        try:
+            result = func()
+        except BaseException as exc:
+            self._land(key, flight)
+            flight.excs = self._copy_exc(exc, flight.followers, exc_copier)
+            flight.done.set()
+            raise
+        # No more followers can join once landed.
+        self._land(key, flight)
+        try:
+            flight.copies = [copier(result)
+                             for _i in range(flight.followers)]
+        except Exception as exc:
+            flight.excs = self._copy_exc(exc, flight.followers, exc_copier)
+        flight.done.set()
+        return result
+
+    @staticmethod
+    def _copy_exc(exc, count, exc_copier):
+        """count copies of exc - or exc itself, if it can't be copied."""
+        try:
+            return [(exc_copier or copy_exception)(exc)
+                    for _i in range(count)]
+        except Exception as copy_exc:
+            LOG.debug("Unable to copy %(exc)r, so it is shared: %(err)s",
+                      {'exc': exc, 'err': copy_exc})
+            return [exc] * count
+
+    def _land(self, key, flight):
+        """Stop followers from joining a flight."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def seal(self):
+        """Stop followers from joining any call now in progress.
+
+        Use this after a change which the calls in progress may not reflect.
+        Followers which have already joined still get the results.
+        """
+        with self._lock:
+            self._flights.clear()
+
+
+def copy_exception(exc):
+    """Copy an exception, so another thread can raise it independently.
+
+    The copy has the same type and args, and its own deep copy of the
+    exception's attributes - such as the Response of a
+    pypowervm.exceptions.Error - but no traceback.
+    """
+    new = type(exc).__new__(type(exc), *exc.args)
+    new.args = exc.args
+    new.__dict__.update(copy.deepcopy(exc.__dict__))
+    return new
+
+
+def is_cacheable(resp):
+    """Whether a Response is eligible for caching."""
+    return (resp is not None and resp.reqmethod == 'GET' and
+            resp.status == c.HTTPStatus.OK and
+            (resp.feed is not None or resp.entry is not None))
+
+
+class GenerationIndex(object):
+    """Per-object and per-type generation counters, bumped by events.
+
+    Consumers capture a token (see token()) before fetching an object or feed
+    and compare it with a later token to find out whether the object (or any
+    object of the type, for feeds) may have changed in the meantime.  If the
+    tokens are equal, no ADD_URI, MODIFY_URI, DELETE_URI (etc.) event has been
+    received for it, and a refetch can be skipped.
+
+    An instance is fed by a Session's event listener - see
+    pypowervm.adapter.Session.get_invalidation_index.  CACHE_CLEARED and
+    MISSING_EVENTS (and the listener's initialization) change every token.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Bumped when all bets are off
+        self._epoch = 0
+        # {key: generation}, where key is ('uuid', <lowercase UUID>) or
+        # ('type', <schema type>).
+        self._gens = collections.defaultdict(int)
+        # {<lowercase UUID>: last action ('add', 'delete', 'invalidate')}
+        self._actions = {}
+
+    @staticmethod
+    def _keys(href):
+        """Index keys for an href: (uuid_key or None, type_key or None)."""
+        uuid, otype = _uuid_and_type(href)
+        return (('uuid', uuid) if uuid else None,
+                ('type', otype) if otype else None)
+
+    def process_events(self, events):
+        """Bump generations per Event feed notifications.
+
+        :param events: Events dict of the format {<uri>: <action>} - see
+                       pypowervm.adapter.EventHandler.process.
+        """
+        with self._lock:
+            for href, action in events.items():
+                if href == 'general':
+                    self._epoch += 1
+                    continue
+                if not href:
+                    continue
+                ukey, tkey = self._keys(href)
+                for key in (ukey, tkey):
+                    if key is not None:
+                        self._gens[key] += 1
+                if ukey is not None:
+                    self._actions[ukey[1]] = action
+
+    def token(self, schema_type=None, uuid=None):
+        """Capture the current generation of an object or a feed.
+
+        :param schema_type: The schema type (e.g. 'VirtualIOServer') of the
+                            feed.  Ignored if uuid is specified.
+        :param uuid: The UUID of a single object.
+        :return: An opaque token.  Compare with a later token for the same
+                 object/feed: if equal, it has not changed in between.
+        """
+        if uuid is not None:
+            key = ('uuid', uuid.lower())
+        else:
+            key = ('type', schema_type)
+        with self._lock:
+            return self._epoch, key, self._gens.get(key, 0)
+
+    def href_token(self, href):
+        """Like token(), but for an href or path.
+
+        :param href: Path or URI of an object (ending in a UUID) or a feed.
+        :return: An opaque token.  See token().
+        """
+        ukey, tkey = self._keys(href)
+        key = ukey if ukey is not None else tkey
+        with self._lock:
+            return self._epoch, key, self._gens.get(key, 0)
+
+    def last_action(self, uuid):
+        """The action of the most recent event for an object.
+
+        :param uuid: The UUID of the object.
+        :return: 'add', 'delete', or 'invalidate'; or None if no event has
+                 been received for the object.
+        """
+        with self._lock:
+            return self._actions.get(uuid.lower())
@@ -18,15 +18,64 @@
 
 import collections
 import copy
+import functools
 import re
+import threading
 
 from lxml import etree
 
 from pypowervm import const
 from pypowervm import util
 
+_ENTRY_TAG = str(etree.QName(const.ATOM_NS, 'entry'))
+_CONTENT_TAG = str(etree.QName(const.ATOM_NS, 'content'))
+_ID_TAG = str(etree.QName(const.ATOM_NS, 'id'))
+_LINK_TAG = str(etree.QName(const.ATOM_NS, 'link'))
+
+
+# Path segments which must not be namespace-qualified
+_UNQUALIFIED_SEGMENT_RE = re.compile(r'[\.\*\[\{]')
+# Maximum number of (path, namespace) pairs memoized by _qualifypath.  The
+# wrappers use a fixed (if sizable) set of paths, so this is rarely reached.
+_QUALIFYPATH_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=_QUALIFYPATH_CACHE_SIZE)
+def _qualifypath(path, ns):
+    """Namespace-qualify each tag segment of a path.  See Element.find."""
+    parts = path.split('/')
+    for i in range(len(parts)):
+        if parts[i] and not _UNQUALIFIED_SEGMENT_RE.match(parts[i]):
+            parts[i] = str(etree.QName(ns, parts[i]))
+    return '/'.join(parts)
+
+
+def _copy_tree(element):
+    """Deep-copy an etree.Element into a standalone tree.
+
+    Produces the same XML as etree.fromstring(etree.tostring(element)), but
+    copies the subtree natively rather than serializing and reparsing it.
+
+    :param element: The etree.Element to copy.
+    :return: A new etree.Element (the root of its own document).
+    """
+    ret = copy.deepcopy(element)
+    # fromstring doesn't keep the tail; neither should we.
+    ret.tail = None
+    # lxml only carries over the inherited namespace declarations which the
+    # subtree actually uses.  Serialization declares them all, so (for
+    # compatibility with copies made that way) do the same.
+    nsmap = element.nsmap
+    if len(ret.nsmap) != len(nsmap):
+        etree.cleanup_namespaces(
+            ret, top_nsmap=nsmap,
+            keep_ns_prefixes=[prefix for prefix in nsmap if prefix])
+    return ret
+
 
 class Atom(object):
+    __slots__ = ('properties', '__weakref__')
+
     def __init__(self, properties):
         self.properties = properties
 
@@ -77,6 +126,8 @@ class Atom(object):
 
 class Feed(Atom):
     """Represents an Atom Feed returned from PowerVM."""
+    __slots__ = ('entries',)
+
     def __init__(self, properties, entries):
         super(Feed, self).__init__(properties)
         self.entries = entries
@@ -91,27 +142,316 @@ class Feed(Atom):
                     break
         return entries
 
+    def entry_by_uuid(self, uuid):
+        """Find the Entry with a given UUID (case-insensitive).
+
+        If the feed was unmarshalled from the REST server, this is an index
+        lookup which does not unmarshal any other Entry.
+
+        :param uuid: The UUID of the Entry to find.
+        :return: The Entry, or None if not found.
+        """
+        if isinstance(self.entries, LazyEntryList):
+            return self.entries.by_uuid(uuid)
+        uuid = uuid.lower()
+        for entry in self.entries:
+            if entry.uuid is not None and entry.uuid.lower() == uuid:
+                return entry
+        return None
+
+    def entry_by_href(self, href):
+        """Find the Entry with a given SELF link.
+
+        If the feed was unmarshalled from the REST server, this is an index
+        lookup which does not unmarshal any other Entry.
+
+        :param href: The SELF link (full URI) of the Entry to find.
+        :return: The Entry, or None if not found.
+        """
+        if isinstance(self.entries, LazyEntryList):
+            return self.entries.by_href(href)
+        for entry in self.entries:
+            if entry.self_link == href:
+                return entry
+        return None
+
     @classmethod
     def unmarshal_atom_feed(cls, feedelem, resp):
         """Factory method producing a Feed object from a parsed ElementTree
 
+        The <entry>s are not unmarshalled here.  Each is unmarshalled into an
+        Entry when first accessed through the returned Feed's entries (a
+        LazyEntryList).
+
         :param feedelem: Parsed ElementTree object representing an atom feed.
         :param resp: The Response from which this Feed was parsed.
         :return: a new Feed object representing the feedelem parameter.
         """
-        ret = cls({}, [])
-        for child in list(feedelem):
-            if child.tag == str(etree.QName(const.ATOM_NS, 'entry')):
-                # NB: The use of ret.self_link here relies on <entry>s being
-                # AFTER the self link in the <feed>.  (They are in fact last.)
-                ret.entries.append(Entry.unmarshal_atom_entry(child, resp))
-            elif not list(child):
-                cls._process_props(child, ret.properties)
-        return ret
+        props = {}
+        entryelems = []
+        for child in feedelem.iterchildren():
+            if child.tag == _ENTRY_TAG:
+                entryelems.append(child)
+            elif not len(child):
+                cls._process_props(child, props)
+        return cls(props, LazyEntryList(entryelems, resp.adapter))
+
+    @classmethod
+    def iterparse_atom_feed(cls, feedelem, events, resp):
+        """Factory method producing a Feed object from a stream of parse events
+
+        The <feed>-level properties are unmarshalled up front (they precede the
+        <entry>s).  The entries are not: the returned Feed's entries attribute
+        is a one-shot iterator which unmarshals each Entry as its </entry> is
+        received from events.  Once unmarshalled, each <entry> is detached from
+        feedelem, so only those Entries still referenced by the caller are
+        kept in memory.
+
+        :param feedelem: The (partially parsed) etree.Element of the <feed>.
+        :param events: Iterator of lxml ('start'/'end', element) parse events
+                       which follow the 'start' of feedelem.
+        :param resp: The Response from which this Feed is being parsed.
+        :return: a new Feed object representing the feedelem parameter.
+        """
+        props = {}
+        for event, elem in events:
+            if elem.getparent() is not feedelem:
+                continue
+            if elem.tag == _ENTRY_TAG:
+                # The first <entry> has started.
+                break
+            if event == 'end' and not list(elem):
+                cls._process_props(elem, props)
+        return cls(props, cls._iterparse_entries(feedelem, events, resp))
+
+    @staticmethod
+    def _iterparse_entries(feedelem, events, resp):
+        for event, elem in events:
+            if (event == 'end' and elem.tag == _ENTRY_TAG and
+                    elem.getparent() is feedelem):
+                entry = Entry.unmarshal_atom_entry(elem, resp)
+                feedelem.remove(elem)
+                yield entry
+
+
+class LazyEntryList(list):
+    """List of the Entries of a Feed, each unmarshalled on first access.
+
+    Until it is accessed, each entry is held as its (unparsed) <entry>
+    etree.Element.  by_uuid and by_href look entries up via an index which is
+    built from the <id> and SELF <link> of each <entry> - without unmarshalling
+    the Entries - and discarded if the list is modified.
+
+    This is a list, and the methods of list which read its items unmarshal
+    them first, so it can be used wherever the list of Entries it replaces
+    was.  Unmarshalling is done under a lock, so threads sharing the list
+    always get the same Entry for the same item.  As with any list, modifying
+    it from several threads at once is not safe.
+    """
+    def __init__(self, entryelems, adapter):
+        """Create a LazyEntryList.
+
+        :param entryelems: List of etree.Element (not entities.Element), each
+                           an Atom <entry>.  Entry instances are also accepted.
+        :param adapter: pypowervm.adapter.Adapter with which to unmarshal the
+                        Entries.
+        """
+        super(LazyEntryList, self).__init__(entryelems)
+        self._adapter = adapter
+        self._lock = threading.RLock()
+        # {<lowercase UUID or SELF href>: index into the list}
+        self._index = None
+
+    @property
+    def _items(self):
+        """The items - Entry or unparsed <entry> etree.Element - as a list."""
+        return list(super(LazyEntryList, self).__iter__())
+
+    def _materialize(self, idx):
+        item = super(LazyEntryList, self).__getitem__(idx)
+        if isinstance(item, Entry):
+            return item
+        with self._lock:
+            # Another thread may have got here first.
+            item = super(LazyEntryList, self).__getitem__(idx)
+            if not isinstance(item, Entry):
+                item = Entry.unmarshal_atom_elem(item, self._adapter)
+                super(LazyEntryList, self).__setitem__(idx, item)
+            return item
+
+    def _materialize_all(self):
+        for idx in range(len(self)):
+            self._materialize(idx)
+
+    def _modified(self):
+        self._index = None
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._materialize(i)
+                    for i in range(*idx.indices(len(self)))]
+        return self._materialize(idx)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._materialize(i)
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self._materialize(i)
+
+    def __contains__(self, value):
+        self._materialize_all()
+        return super(LazyEntryList, self).__contains__(value)
+
+    def index(self, value, *args):
+        self._materialize_all()
+        return super(LazyEntryList, self).index(value, *args)
+
+    def count(self, value):
+        self._materialize_all()
+        return super(LazyEntryList, self).count(value)
+
+    def __eq__(self, other):
+        self._materialize_all()
+        if isinstance(other, LazyEntryList):
+            other._materialize_all()
+        return super(LazyEntryList, self).__eq__(other)
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    # Like list, but not hashable despite defining __eq__.
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + other
+
+    def __radd__(self, other):
+        return other + list(self)
+
+    def __mul__(self, times):
+        return list(self) * times
+
+    __rmul__ = __mul__
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __copy__(self):
+        """Produce a shallow copy, also not unmarshalling the entries."""
+        return self.__class__(self._items, self._adapter)
+
+    copy = __copy__
+
+    def __deepcopy__(self, memo=None):
+        """Produce a deep (except for adapter) copy of this LazyEntryList."""
+        # Not-yet-unmarshalled <entry>s keep the namespace declarations of the
+        # feed - see _copy_tree.
+        return self.__class__(
+            [copy.deepcopy(item, memo=memo) if isinstance(item, Entry)
+             else _copy_tree(item)
+             for item in self._items], self._adapter)
+
+    def __setitem__(self, idx, value):
+        super(LazyEntryList, self).__setitem__(idx, value)
+        self._modified()
+
+    def __delitem__(self, idx):
+        super(LazyEntryList, self).__delitem__(idx)
+        self._modified()
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def __imul__(self, times):
+        super(LazyEntryList, self).__imul__(times)
+        self._modified()
+        return self
+
+    def append(self, value):
+        super(LazyEntryList, self).append(value)
+        self._modified()
+
+    def insert(self, idx, value):
+        super(LazyEntryList, self).insert(idx, value)
+        self._modified()
+
+    def extend(self, values):
+        if (isinstance(values, LazyEntryList) and
+                values._adapter is self._adapter):
+            # Don't unmarshal the other list's entries.
+            values = values._items
+        super(LazyEntryList, self).extend(values)
+        self._modified()
+
+    def pop(self, idx=-1):
+        self._materialize(idx)
+        value = super(LazyEntryList, self).pop(idx)
+        self._modified()
+        return value
+
+    def remove(self, value):
+        self._materialize_all()
+        super(LazyEntryList, self).remove(value)
+        self._modified()
+
+    def clear(self):
+        del self[:]
+
+    def reverse(self):
+        super(LazyEntryList, self).reverse()
+        self._modified()
+
+    def sort(self, *args, **kwargs):
+        self._materialize_all()
+        super(LazyEntryList, self).sort(*args, **kwargs)
+        self._modified()
+
+    @staticmethod
+    def _index_keys(item):
+        """The index keys (lowercase UUID, SELF href) of an item."""
+        if isinstance(item, Entry):
+            return item.uuid, item.self_link
+        uuid = href = None
+        for child in item.iterchildren(_ID_TAG, _LINK_TAG):
+            if child.tag == _ID_TAG:
+                uuid = child.text
+            elif href is None and (child.get('rel') or '').upper() == 'SELF':
+                href = child.get('href')
+        return uuid, href
+
+    def _lookup(self, key):
+        with self._lock:
+            if self._index is None:
+                index = {}
+                items = self._items
+                # Reversed so the first of any duplicates wins.
+                for idx in range(len(items) - 1, -1, -1):
+                    uuid, href = self._index_keys(items[idx])
+                    if uuid:
+                        index[uuid.lower()] = idx
+                    if href:
+                        index[href] = idx
+                self._index = index
+            idx = self._index.get(key)
+            return None if idx is None else self._materialize(idx)
+
+    def by_uuid(self, uuid):
+        """The Entry with the given UUID (case-insensitive), or None."""
+        return self._lookup(uuid.lower())
+
+    def by_href(self, href):
+        """The Entry with the given SELF link href, or None."""
+        return self._lookup(href)
 
 
 class Entry(Atom):
     """Represents an Atom Entry returned by the PowerVM API."""
+    __slots__ = ('element',)
+
     def __init__(self, properties, element, adapter):
         """Create an Entry from an etree.Element representing a PowerVM object.
 
@@ -147,19 +487,34 @@ class Entry(Atom):
         :param resp: The Response containing (the feed containing) the entry.
         :return: a new Entry object representing the entryelem parameter.
         """
+        return cls.unmarshal_atom_elem(entryelem, resp.adapter)
+
+    @classmethod
+    def unmarshal_atom_elem(cls, entryelem, adapter):
+        """Like unmarshal_atom_entry, but given the Adapter, not a Response.
+
+        :param entryelem: Parsed ElementTree object representing an atom entry.
+        :param adapter: pypowervm.adapter.Adapter through which the entry was
+                        fetched.
+        :return: a new Entry object representing the entryelem parameter.
+        """
         entryprops = {}
         element = None
-        for child in list(entryelem):
-            if child.tag == str(etree.QName(const.ATOM_NS, 'content')):
+        for child in entryelem.iterchildren():
+            if child.tag == _CONTENT_TAG:
                 # PowerVM API only has one element per entry
                 element = child[0]
-            elif not list(child):
+            elif not len(child):
                 cls._process_props(child, entryprops)
-        return cls(entryprops, element, resp.adapter)
+        return cls(entryprops, element, adapter)
 
 
 class Element(object):
     """Represents an XML element - a utility wrapper around etree.Element."""
+    # One of these is created for every element returned by find, findall,
+    # iter, etc., so keep them small.
+    __slots__ = ('element', 'adapter', '__weakref__')
+
     def __init__(self, tag, adapter, ns=const.UOM_NS, attrib=None, text='',
                  children=(), cdata=False):
         # Defaults shouldn't be mutable
@@ -201,8 +556,7 @@ class Element(object):
 
     def __deepcopy__(self, memo=None):
         """Produce a deep (except for adapter) copy of this Element."""
-        return self.wrapelement(etree.fromstring(self.toxmlstring()),
-                                self.adapter)
+        return self.wrapelement(_copy_tree(self.element), self.adapter)
 
     @staticmethod
     def _element_equality(one, two):
@@ -250,10 +604,10 @@ class Element(object):
     def wrapelement(cls, element, adapter):
         if element is None:
             return None
-        # create with minimum inputs
-        e = cls('element', adapter)
-        # assign element over the one __init__ creates
+        # Bypass __init__, which would create a throwaway etree.Element.
+        e = cls.__new__(cls)
         e.element = element
+        e.adapter = adapter
         return e
 
     def toxmlstring(self, pretty=False):
@@ -280,8 +634,10 @@ class Element(object):
 
     @property
     def namespace(self):
-        ns = etree.QName(self.element.tag).namespace
-        return '' if ns is None else ns
+        # Equivalent to etree.QName(tag).namespace, but cheaper.  This is
+        # evaluated for every find/findall/findtext.
+        tag = self.element.tag
+        return tag[1:tag.index('}')] if tag[:1] == '{' else ''
 
     @namespace.setter
     def namespace(self, ns):
@@ -491,11 +847,7 @@ class Element(object):
     def _qualifypath(path, ns):
         if not ns:
             return path
-        parts = path.split('/')
-        for i in range(len(parts)):
-            if parts[i] and not re.match(r'[\.\*\[\{]', parts[i]):
-                parts[i] = str(etree.QName(ns, parts[i]))
-        return '/'.join(parts)
+        return _qualifypath(path, ns)
 
 
 class ElementList(object):
@@ -17,10 +17,10 @@
 """This Adapter helper logs recent requests/responses on an exception."""
 
 import collections
-import copy
 import threading
 
 from oslo_log import log as logging
+import six
 
 import pypowervm.const as c
 import pypowervm.exceptions as pvmex
@@ -31,18 +31,93 @@ LOG = logging.getLogger(__name__)
 
 log_store = threading.local()
 
+# Request and response bodies longer than this many characters are truncated
+# when stashed, so that large (e.g. VIOS feed) bodies are not kept alive.
+MAX_BODY_LEN = 64 * 1024
+# Maximum total length of the bodies stashed per thread.  The oldest entries
+# are dropped to stay within it (the newest entry is always kept).
+MAX_LOG_BYTES = 256 * 1024
 
-def _init_thread_stg(max_entries):
+_BODY_KEYS = ('body', 'reqbody')
+
+
+class _TruncatedBody(object):
+    """The start of a long body, rendered with a truncation note."""
+    def __init__(self, body, max_len):
+        self.head = body[:max_len]
+        self.length = len(body)
+
+    def __len__(self):
+        return len(self.head)
+
+    def __str__(self):
+        return _('%(head)s... [truncated %(omitted)d of %(length)d '
+                 'characters]') % {'head': self.head,
+                                   'omitted': self.length - len(self.head),
+                                   'length': self.length}
+
+
+class _LogRing(object):
+    """Ring buffer of log entries, bounded by count and by total body size."""
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Deque of (entry, size)
+        self._entries = collections.deque()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, entry, size=0):
+        self._entries.append((entry, size))
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (
+                self._bytes > self.max_bytes and len(self._entries) > 1):
+            self.popleft()
+
+    def popleft(self):
+        """Remove and return the oldest entry.  IndexError if empty."""
+        entry, size = self._entries.popleft()
+        self._bytes -= size
+        return entry
+
+
+def _init_thread_stg(max_entries, max_bytes=None):
     """Sets up the storage for the logs for this thread."""
     if not hasattr(log_store, 'powervm_log'):
-        log_store.powervm_log = collections.deque(maxlen=max_entries)
+        log_store.powervm_log = _LogRing(
+            max_entries, MAX_LOG_BYTES if max_bytes is None else max_bytes)
+
+
+def _trim_bodies(fields):
+    """Truncate the long bodies in a dict, in place.
+
+    :param fields: Dict of request keywords or response attributes.
+    :return: Total length of the bodies retained.
+    """
+    size = 0
+    for key in _BODY_KEYS:
+        body = fields.get(key)
+        if isinstance(body, (six.text_type, six.binary_type)):
+            if len(body) > MAX_BODY_LEN:
+                body = fields[key] = _TruncatedBody(body, MAX_BODY_LEN)
+            size += len(body)
+    return size
 
 
-def _stash(sensitive, type_, value):
+def _stash(sensitive, type_, value, size=0):
     """Enters the request or response in the thread log."""
     if sensitive:
         value = '<SENSITIVE>'
-    log_store.powervm_log.append({type_: value})
+        size = 0
+    log_store.powervm_log.append({type_: value}, size)
+
+
+def _stash_request(sensitive, args, kwds):
+    # Don't pin the original keywords (or their long bodies)
+    kwds = dict(kwds)
+    _stash(sensitive, 'request', (args, kwds), _trim_bodies(kwds))
 
 
 def _stash_response(sensitive, resp):
@@ -53,7 +128,8 @@ def _stash_response(sensitive, resp):
         # only the string version of the body is dumped for responses.
         logged_resp.pop('entry', None)
         logged_resp.pop('feed', None)
-        _stash(sensitive, 'response', logged_resp)
+        _stash(sensitive, 'response', logged_resp,
+               _trim_bodies(logged_resp))
 
 
 def _write_thread_log():
@@ -69,8 +145,8 @@ def _write_thread_log():
                     # special format for body
                     body = req_kwds.get('body')
                 elif key == 'headers':
-                    # deep copy the header and change what we can't dump
-                    headers = copy.deepcopy(req_kwds.get(key))
+                    # copy the header and change what we can't dump
+                    headers = dict(req_kwds.get(key))
                     if 'X-API-Session' in headers:
                         headers['X-API-Session'] = '<SENSITIVE>'
                     dump[key] = str(headers)
@@ -144,7 +220,7 @@ def log_helper(func, max_logs=3):
         # See if this request has sensitive data
         sensitive = kwds.get('sensitive', False)
         # Log the request before the call
-        _stash(sensitive, 'request', (args, kwds))
+        _stash_request(sensitive, args, kwds)
         try:
             # Call the request()
             response = func(*args, **kwds)
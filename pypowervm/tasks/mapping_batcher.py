@@ -0,0 +1,251 @@
+# Copyright 2026 IBM Corp.
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Batch storage mapping changes so each VIOS is updated once per window."""
+
+from concurrent import futures
+import threading
+
+from oslo_log import log as logging
+
+from pypowervm import const as c
+from pypowervm import exceptions as exc
+from pypowervm.i18n import _
+from pypowervm.tasks import scsi_mapper as tsk_map
+from pypowervm.tasks import vfc_mapper as tsk_fcmap
+from pypowervm.utils import transaction as tx
+from pypowervm.wrappers import entry_wrapper as ewrap
+from pypowervm.wrappers import virtual_io_server as pvm_vios
+
+LOG = logging.getLogger(__name__)
+
+
+class _MappingOp(object):
+    """A queued modification of a VIOS wrapper and the caller's Future."""
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = futures.Future()
+
+
+class MappingBatcher(object):
+    """Queue VIOS mapping changes and apply them in one update per VIOS.
+
+    Adding mappings for many LPARs one call at a time (e.g.
+    scsi_mapper.add_vscsi_mapping) costs a GET and a POST of the VIOS per
+    call, and concurrent callers collide on the VIOS etag.  A MappingBatcher
+    instead collects the changes requested during a short window and applies
+    them through a single FeedTask: each VIOS is fetched once, all of its
+    queued changes are made to the wrapper, and the wrapper is POSTed once.
+
+    Each request returns a concurrent.futures.Future.  Its result is the
+    return value of the modification (e.g. the new mapping, or the list of
+    removed mappings) once the VIOS update succeeds.  If the modification
+    itself raises, only that request's Future fails; the remaining changes to
+    the VIOS are still applied.  If fetching or updating the VIOS fails, all
+    requests for that VIOS fail with that exception.
+
+    Example usage:
+
+        batcher = MappingBatcher(adapter)
+        futs = [batcher.add_vscsi_mapping(vios_uuid, lpar_uuid, stg)
+                for lpar_uuid, stg in deployments]
+        for fut in futs:
+            fut.result()
+    """
+    def __init__(self, adapter, window=0.2,
+                 xag=(c.XAG.VIO_SMAP, c.XAG.VIO_FMAP), update_timeout=-1):
+        """Create a MappingBatcher.
+
+        :param adapter: The pypowervm Adapter used to GET and POST the VIOSes.
+        :param window: Seconds to wait, after the first request of a batch is
+                       queued, before the batch is applied.
+        :param xag: Extended attribute groups with which to fetch the VIOSes.
+                    The default suffices for vSCSI and vFC mapping changes.
+        :param update_timeout: (Optional) Integer number of seconds after which
+                               to time out the POST of each VIOS.  -1, the
+                               default, uses the default of
+                               EntryWrapper.update.
+        """
+        self.adapter = adapter
+        self.window = window
+        self.xag = list(xag)
+        self.update_timeout = update_timeout
+        self._lock = threading.Lock()
+        # Map of {vios_uuid: [_MappingOp, ...]} not yet applied.
+        self._pending = {}
+        self._timer = None
+
+    def submit(self, vios_uuid, func, *args, **kwargs):
+        """Queue an arbitrary modification of a VIOS wrapper.
+
+        :param vios_uuid: The UUID of the VIOS to modify.
+        :param func: Callable accepting the VIOS wrapper followed by args and
+                     kwargs.  It modifies the wrapper in place (without
+                     updating it) and returns a value which is truthy if the
+                     VIOS needs to be updated.  This is the convention of the
+                     scsi_mapper and vfc_mapper add_map and remove_maps
+                     methods.  It may be invoked more than once if the update
+                     collides with another change to the VIOS.
+        :param args: Positional arguments to func after the wrapper.
+        :param kwargs: Keyword arguments to func.
+        :return: A concurrent.futures.Future for the return value of func.
+        """
+        op = _MappingOp(func, args, kwargs)
+        with self._lock:
+            self._pending.setdefault(vios_uuid, []).append(op)
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return op.future
+
+    def add_vscsi_mapping(self, vios_uuid, lpar_uuid, storage_elem,
+                          fuse_limit=32, lpar_slot_num=None, lua=None):
+        """Queue the mapping of a storage element to a client LPAR.
+
+        See scsi_mapper.add_vscsi_mapping for the parameters.
+
+        :return: A Future for the new VSCSIMapping, or None if the storage
+                 element was already mapped to the LPAR.
+        """
+        return self.submit(vios_uuid, _add_vscsi_mapping, lpar_uuid,
+                           storage_elem, fuse_limit=fuse_limit,
+                           lpar_slot_num=lpar_slot_num, lua=lua)
+
+    def remove_vscsi_maps(self, vios_uuid, client_lpar_id, match_func=None,
+                          include_orphans=True):
+        """Queue the removal of vSCSI mappings.
+
+        See scsi_mapper.remove_maps for the parameters.
+
+        :return: A Future for the list of removed VSCSIMappings.
+        """
+        return self.submit(vios_uuid, tsk_map.remove_maps, client_lpar_id,
+                           match_func=match_func,
+                           include_orphans=include_orphans)
+
+    def add_vfc_mapping(self, vios_uuid, host_uuid, lpar_uuid, port_map,
+                        error_if_invalid=True, lpar_slot_num=None):
+        """Queue the addition of a vFC mapping.
+
+        See vfc_mapper.add_map for the parameters.
+
+        :return: A Future for the new VFCMapping, or None if it already
+                 existed.
+        """
+        return self.submit(vios_uuid, tsk_fcmap.add_map, host_uuid, lpar_uuid,
+                           port_map, error_if_invalid=error_if_invalid,
+                           lpar_slot_num=lpar_slot_num)
+
+    def remove_vfc_maps(self, vios_uuid, client_lpar_id, client_adpt=None,
+                        port_map=None):
+        """Queue the removal of vFC mappings.
+
+        See vfc_mapper.remove_maps for the parameters.
+
+        :return: A Future for the list of removed VFCMappings.
+        """
+        return self.submit(vios_uuid, tsk_fcmap.remove_maps, client_lpar_id,
+                           client_adpt=client_adpt, port_map=port_map)
+
+    def flush(self):
+        """Apply all queued requests now, in the calling thread.
+
+        This is invoked automatically when the window expires, but may also
+        be called directly, e.g. to avoid waiting out the window.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        # Skip requests whose callers have given up on them.
+        for uuid in list(pending):
+            pending[uuid] = [op for op in pending[uuid]
+                             if op.future.set_running_or_notify_cancel()]
+            if not pending[uuid]:
+                del pending[uuid]
+        if not pending:
+            return
+        try:
+            ftsk = tx.FeedTask(
+                'mapping_batch', ewrap.UUIDFeedGetter(
+                    self.adapter, pvm_vios.VIOS, list(pending),
+                    xag=self.xag),
+                max_workers=len(pending), update_timeout=self.update_timeout)
+            for uuid, wtask in ftsk.wrapper_tasks.items():
+                wtask.add_functor_subtask(_apply_ops, pending[uuid],
+                                          self.update_timeout,
+                                          flag_update=False)
+            ftsk.execute()
+        except Exception as e:
+            LOG.warning(_("Failed to apply mapping changes to Virtual I/O "
+                          "Servers %(vioses)s: %(err)s"),
+                        {'vioses': ', '.join(pending), 'err': e})
+            for ops in pending.values():
+                for op in ops:
+                    if not op.future.done():
+                        op.future.set_exception(e)
+
+
+def _add_vscsi_mapping(vios_w, lpar_uuid, storage_elem, **kwargs):
+    """Build and add a vSCSI mapping to a VIOS wrapper, without updating it.
+
+    :return: The new VSCSIMapping, or None if it already existed.
+    """
+    scsi_map = tsk_map.build_vscsi_mapping(None, vios_w, lpar_uuid,
+                                           storage_elem, **kwargs)
+    return tsk_map.add_map(vios_w, scsi_map)
+
+
+def _apply_ops(vios_w, ops, update_timeout):
+    """Subtask to apply a batch of requests to one VIOS and update it.
+
+    The update is done here rather than by the WrapperTask so that each
+    request's outcome is known.  An etag mismatch is raised to the
+    WrapperTask, which refreshes the wrapper and reapplies the batch.  Any
+    other failure to update is reported to all of the requests, and is not
+    raised, so that it doesn't affect the batches for other VIOSes.
+
+    :param vios_w: The VIOS wrapper.
+    :param ops: The _MappingOps to apply.
+    :param update_timeout: The timeout for the update; see MappingBatcher.
+    """
+    results = []
+    for op in ops:
+        try:
+            results.append((op.func(vios_w, *op.args, **op.kwargs), None))
+        except Exception as e:
+            LOG.warning(_("Failed to modify Virtual I/O Server %(vios)s: "
+                          "%(err)s"), {'vios': vios_w.name, 'err': e})
+            results.append((None, e))
+    if any(result for result, _err in results):
+        try:
+            vios_w.update(timeout=update_timeout)
+        except exc.HttpError as e:
+            if e.response.status == c.HTTPStatus.ETAG_MISMATCH:
+                raise
+            results = [(None, e)] * len(ops)
+        except Exception as e:
+            results = [(None, e)] * len(ops)
+    for op, (result, err) in zip(ops, results):
+        if err is None:
+            op.future.set_result(result)
+        else:
+            op.future.set_exception(err)
+    return False
@@ -157,10 +157,12 @@ class HostCPUMetricCache(pcm_util.MetricCache):
         :return: The cycles spent on workload across all of the samples.
         """
         # Determine the user cycles spent between the last sample and the
-        # current.
+        # current.  Index the previous samples once, rather than searching
+        # them for each current sample.
+        prev_index = self._index_samples(prev_samples)
         user_cycles = 0
         for lpar_sample in samples:
-            prev_sample = self._find_prev_sample(lpar_sample, prev_samples)
+            prev_sample = prev_index.get((lpar_sample.id, lpar_sample.name))
             user_cycles += self._delta_user_cycles(lpar_sample, prev_sample)
         return user_cycles
 
@@ -211,13 +213,22 @@ class HostCPUMetricCache(pcm_util.MetricCache):
         :param prev_samples: The previous samples to search through.
         :return: The previous sample, if it exists.  None otherwise.
         """
-        # Will occur if there are no previous samples.
-        if prev_samples is None:
-            return None
-        for prev_sample in prev_samples:
-            if prev_sample.id == sample.id and prev_sample.name == sample.name:
-                return prev_sample
-        return None
+        return HostCPUMetricCache._index_samples(prev_samples).get(
+            (sample.id, sample.name))
+
+    @staticmethod
+    def _index_samples(samples):
+        """Indexes VM Samples by their LPAR ID and name.
+
+        :param samples: The samples to index.  May be None.
+        :return: Dict of {(id, name): sample}.  If more than one sample has
+                 the same ID and name, the first is indexed.
+        """
+        index = {}
+        # Will be None if there are no previous samples.
+        for sample in samples or ():
+            index.setdefault((sample.id, sample.name), sample)
+        return index
 
     def _get_total_cycles_delta(self):
         """Returns the 'total cycles' on the system since last sample.
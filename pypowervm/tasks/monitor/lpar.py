@@ -177,6 +177,78 @@ class LparProc(PropertyWrapper):
                           'total_inst_exec_time')
 
 
+class ViosStorageIndex(object):
+    """Index of the VIOS storage adapters in a set of ViosInfo samples.
+
+    PHYP identifies the VIOS side of a client's virtual storage adapter only
+    by the VIOS ID and slot, and of a virtual FC adapter by the VIOS ID and
+    WWPNs.  This indexes the adapters of the ViosInfos by those keys, so that
+    each PHYP adapter is matched with one lookup rather than a search of all
+    the VIOS adapters.  Build one per sample and pass it to each LparStorage
+    built from that sample.
+
+    Only the first ViosInfo for a given VIOS ID is indexed.
+    """
+
+    def __init__(self, vios_metrics):
+        """Indexes the storage adapters of the ViosInfos.
+
+        :param vios_metrics: The list of ViosInfos.  May be None.
+        """
+        # {(vios_id, slot string): ViosStorageVAdpt}
+        self._vstor_adpts = {}
+        # {(vios_id, wwpn): (order, ViosFCVirtAdpt)}
+        self._vfc_adpts = {}
+        vios_ids = set()
+        for vios_ltm in vios_metrics or []:
+            vios_id = vios_ltm.sample.id
+            raw_stor = vios_ltm.sample.storage
+            if vios_id in vios_ids:
+                continue
+            vios_ids.add(vios_id)
+            if raw_stor is None:
+                continue
+
+            # We have to match on the location code.  We can only match on
+            # the tail end of the slot (the VIOS is part of the key, so slot
+            # is sufficient).
+            for vadpt in raw_stor.virt_adpts or []:
+                _loc, sep, slot = vadpt.physical_location.rpartition('-C')
+                if sep:
+                    self._vstor_adpts.setdefault((vios_id, slot), vadpt)
+
+            # Remember the order of the ports, so that a PHYP adapter whose
+            # WWPNs match more than one port gets the first.
+            order = 0
+            for pfc_adpt in raw_stor.fc_adpts or []:
+                for vfc_adpt in pfc_adpt.ports or []:
+                    self._vfc_adpts.setdefault((vios_id, vfc_adpt.wwpn),
+                                               (order, vfc_adpt))
+                    order += 1
+
+    def find_vstor_adpt(self, phyp_vadpt):
+        """Finds the appropriate VIOS virtual storage adapter.
+
+        :param phyp_vadpt: The PhypStorageVAdpt raw metric.
+        :return: The corresponding ViosStorageVAdpt from the ViosInfos
+                 if one can be found.  None otherwise.
+        """
+        return self._vstor_adpts.get(
+            (phyp_vadpt.vios_id, "%d" % phyp_vadpt.vios_slot))
+
+    def find_vfc_adpt(self, phyp_vfc_adpt):
+        """Finds the appropriate VIOS virtual FC adapter.
+
+        :param phyp_vfc_adpt: The PhypVirtualFCAdpt raw metric.
+        :return: The corresponding ViosFCVirtAdpt from the ViosInfos
+                 if one can be found.  None otherwise.
+        """
+        matches = [self._vfc_adpts.get((phyp_vfc_adpt.vios_id, hex(wwpn)[2:]))
+                   for wwpn in phyp_vfc_adpt.wwpn_pair]
+        matches = [match for match in matches if match is not None]
+        return min(matches)[1] if matches else None
+
+
 class LparStorage(object):
     """Represents the Storage statistics for a given LPAR.
 
@@ -193,125 +265,29 @@ class LparStorage(object):
         :param lpar_phyp_storage: The raw Phyp Storage object.
         :param vios_metrics: The list of Virtual I/O Server raw metrics that
                              are paired to the sample from the lpar_phyp
-                             metrics.
+                             metrics, or a ViosStorageIndex of them.  When
+                             building LparStorages for many LPARs from the
+                             same sample, pass the same ViosStorageIndex to
+                             each.
         """
+        if isinstance(vios_metrics, ViosStorageIndex):
+            vios_index = vios_metrics
+        else:
+            vios_index = ViosStorageIndex(vios_metrics)
+
         # Add the various adapters.
         self.virt_adpts = []
         for vadpt in lpar_phyp_storage.v_stor_adpts:
-            vio_adpt = self._find_vio_vstor_adpt(vadpt, vios_metrics)
+            vio_adpt = vios_index.find_vstor_adpt(vadpt)
             if vio_adpt is not None:
                 self.virt_adpts.append(LparVirtStorageAdpt(vio_adpt))
 
         self.vfc_adpts = []
         for phyp_vfc_adpt in lpar_phyp_storage.v_fc_adpts:
-            vfc_adpt = self._find_vio_vfc_adpt(phyp_vfc_adpt, vios_metrics)
+            vfc_adpt = vios_index.find_vfc_adpt(phyp_vfc_adpt)
             if vfc_adpt is not None:
                 self.vfc_adpts.append(LparVFCAdpt(vfc_adpt))
 
-    @staticmethod
-    def _find_vio_vstor_adpt(phyp_vadpt, vios_metrics):
-        """Finds the appropriate VIOS virtual storage adapter.
-
-        For a given PHYP virtual adapter, PHYP only has a little bit of
-        information about it.  Which VIOS is hosting it, and the slot.
-
-        The VIOS metrics actually contain the information for that
-        device.
-
-        This method will look through all the VIOS samples to find the
-        matching ViosStorageVAdpt for the given PhypStorageVAdpt.  If one
-        can not be found, None is returned.
-
-        :param phyp_vadpt: The PhypStorageVAdpt raw metric.
-        :param vios_metrics: The list of ViosInfos.
-        :return: The corresponding ViosStorageVAdpt from the ViosInfos
-                 if one can be found.  None otherwise.
-        """
-        for vios_ltm in vios_metrics:
-            # We need to find the VIOS sample that matches this storage
-            # element.  Loop until we find one (if one doesn't exist, then
-            # this will just return None).
-            if vios_ltm.sample.id != phyp_vadpt.vios_id:
-                continue
-
-            # If we reach here, we found the VIOS.  From that sample, see
-            # if we have the appropriate storage.
-            raw_stor = vios_ltm.sample.storage
-            if raw_stor is None or raw_stor.virt_adpts is None:
-                break
-
-            # See if this virtual adapters has the right data.
-            slot_str = "-C%d" % phyp_vadpt.vios_slot
-            for vadpt in raw_stor.virt_adpts:
-                # We have to match on the location code.  We can only match
-                # on the tail end of the slot (we've already validated that
-                # we have the right VIOS, so slot is sufficient).
-                if vadpt.physical_location.endswith(slot_str):
-                    return vadpt
-
-            # If we reached this point, we found the right VIOS, but couldn't
-            # find proper data.  Therefore we can just exit the loop.
-            break
-
-        return None
-
-    @staticmethod
-    def _find_vio_vfc_adpt(phyp_vfc_adpt, vios_metrics):
-        """Finds the appropriate VIOS virtual FC adapter.
-
-        For a given PHYP virtual FC adapter, PHYP only has a little bit of
-        information about it.  Which VIOS is hosting it, and the WWPNs.
-
-        The VIOS metrics actually contain the information for that
-        device.
-
-        This method will look through all the VIOS samples to find the
-        matching ViosFCVirtAdpt for the given PhypVirtualFCAdpt.  If one
-        can not be found, None is returned.
-
-        :param phyp_vadpt: The PhypVirtualFCAdpt raw metric.
-        :param vios_metrics: The list of ViosInfos.
-        :return: The corresponding ViosFCVirtAdpt from the ViosInfos
-                 if one can be found.  None otherwise.
-        """
-        for vios_ltm in vios_metrics:
-            # We need to find the VIOS sample that matches this VFC
-            # element.  Loop until we find one (if one doesn't exist, then
-            # this will just return None).
-            if vios_ltm.sample.id != phyp_vfc_adpt.vios_id:
-                continue
-
-            # If we reach here, we found the VIOS.  From that sample, see
-            # if we have the appropriate storage.
-            raw_stor = vios_ltm.sample.storage
-            if raw_stor is None or raw_stor.fc_adpts is None:
-                return None
-
-            # Check the WWPNs.
-            for pfc_adpt in raw_stor.fc_adpts:
-                vfc_adpt = LparStorage._find_vfc(phyp_vfc_adpt, pfc_adpt)
-                if vfc_adpt is not None:
-                    return vfc_adpt
-
-        return None
-
-    @staticmethod
-    def _find_vfc(phyp_vfc_adpt, vio_pfc_adpt):
-        """Finds the matching VIOS vfc adpt for a given PHYP adapter
-
-        :param phyp_vfc_adpt: The raw PhypVirtualFCAdpt object.
-        :param vio_pfc_adpt: The raw ViosFCPhysAdpt.
-        :return: The matching ViosFCVirtAdpt contained within the physical VIOS
-                 adapter.  If one can't be found, None will be returned.
-        """
-        if vio_pfc_adpt.ports is None:
-            return None
-        for vfc_adpt in vio_pfc_adpt.ports:
-            for wwpn in phyp_vfc_adpt.wwpn_pair:
-                if hex(wwpn)[2:] == vfc_adpt.wwpn:
-                    return vfc_adpt
-        return None
-
 
 @six.add_metaclass(abc.ABCMeta)
 class LparStorageAdpt(PropertyWrapper):
@@ -0,0 +1,418 @@
+# Copyright 2026 IBM Corp.
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Columnar store of a rolling history of PCM samples for all partitions."""
+
+import array
+import collections
+import math
+import threading
+
+from pypowervm.i18n import _
+
+_NAN = float('nan')
+
+
+def _proc(attr):
+    def getter(sample):
+        return getattr(sample.processor, attr) if sample.processor else None
+    return getter
+
+
+def _used_proc_cycles(sample):
+    # The same measure of utilization as HostCPUMetricCache uses: capped +
+    # uncapped - idle.  Donated cycles are not counted.
+    proc = sample.processor
+    if proc is None:
+        return None
+    cycles = (proc.util_cap_proc_cycles, proc.util_uncap_proc_cycles,
+              proc.idle_proc_cycles)
+    if None in cycles:
+        return None
+    return cycles[0] + cycles[1] - cycles[2]
+
+
+def _sum(vals):
+    """Sum of the values which are not None; None if there are none."""
+    vals = [val for val in vals if val is not None]
+    return sum(vals) if vals else None
+
+
+def _mem(attr):
+    def getter(sample):
+        mem = getattr(sample, 'memory', None)
+        return getattr(mem, attr) if mem else None
+    return getter
+
+
+def _net(attr):
+    # Summed over the partition's virtual ethernet adapters.
+    def getter(sample):
+        net = getattr(sample, 'network', None)
+        return _sum(getattr(vea, attr) for vea in net.veas) if net else None
+    return getter
+
+
+def _vios_stg(attr):
+    # Summed over the VIOS's physical storage and fibre channel adapters.
+    def getter(sample):
+        stg = sample.storage
+        if stg is None:
+            return None
+        return _sum(getattr(adpt, attr)
+                    for adpt in stg.fc_adpts + stg.phys_adpts)
+    return getter
+
+
+def _util_mem(attr):
+    def getter(lpar_util):
+        return getattr(lpar_util.memory, attr)
+    return getter
+
+
+# Metrics taken from each VM and VIOS sample (PhypLparSample) in a PhypInfo.
+PHYP_METRICS = (
+    ('entitled_proc_cycles', _proc('entitled_proc_cycles')),
+    ('util_cap_proc_cycles', _proc('util_cap_proc_cycles')),
+    ('util_uncap_proc_cycles', _proc('util_uncap_proc_cycles')),
+    ('idle_proc_cycles', _proc('idle_proc_cycles')),
+    ('donated_proc_cycles', _proc('donated_proc_cycles')),
+    ('time_wait_dispatch', _proc('time_wait_dispatch')),
+    ('total_instructions', _proc('total_instructions')),
+    ('total_inst_exec_time', _proc('total_inst_exec_time')),
+    ('used_proc_cycles', _used_proc_cycles),
+    ('logical_mem', _mem('logical_mem')),
+    ('backed_physical_mem', _mem('backed_physical_mem')),
+    ('net_received_packets', _net('received_packets')),
+    ('net_sent_packets', _net('sent_packets')),
+    ('net_dropped_packets', _net('dropped_packets')),
+    ('net_received_bytes', _net('received_bytes')),
+    ('net_sent_bytes', _net('sent_bytes')),
+)
+
+# Metrics taken from each ViosInfo's ViosSample.
+VIOS_METRICS = (
+    ('utilized_mem', lambda sample: sample.mem.utilized_mem
+     if sample.mem else None),
+    ('stg_num_reads', _vios_stg('num_reads')),
+    ('stg_num_writes', _vios_stg('num_writes')),
+    ('stg_read_bytes', _vios_stg('read_bytes')),
+    ('stg_write_bytes', _vios_stg('write_bytes')),
+)
+
+# Metrics taken from each LparUtil in a LparInfo.
+LPAR_METRICS = (
+    ('pct_real_mem_avbl', _util_mem('pct_real_mem_avbl')),
+    ('pct_real_mem_free', _util_mem('pct_real_mem_free')),
+    ('real_mem_size_bytes', _util_mem('real_mem_size_bytes')),
+    ('vm_pg_in_rate', _util_mem('vm_pg_in_rate')),
+    ('vm_pg_out_rate', _util_mem('vm_pg_out_rate')),
+    ('vm_pg_swap_in_rate', _util_mem('vm_pg_swap_in_rate')),
+    ('vm_pg_swap_out_rate', _util_mem('vm_pg_swap_out_rate')),
+)
+
+METRICS = frozenset(name for name, _getter in
+                    PHYP_METRICS + VIOS_METRICS + LPAR_METRICS)
+
+
+def _nan_column(length):
+    return array.array('d', [_NAN]) * length
+
+
+class _Sample(object):
+    """One ingested sample: {metric: array of values, indexed by row}."""
+    def __init__(self, date, seq, time_stamp):
+        self.date = date
+        self.seconds = date.timestamp()
+        self.seq = seq
+        # The PHYP sample's timeStamp, identifying the LTM sample.
+        self.time_stamp = time_stamp
+        self.columns = {}
+
+
+class MetricStore(object):
+    """Rolling history of PCM samples, stored as one column per metric.
+
+    The PCM wrappers (PhypInfo, ViosInfo, LparInfo) present each sample as a
+    tree of objects per partition, and MetricCache keeps only the current and
+    previous samples.  A MetricStore keeps the last `history` samples, with
+    each metric of each sample in a flat array of floats indexed by a row
+    number assigned to each partition UUID.  This allows queries such as
+    rates and percentiles to be answered for all partitions at once, by
+    walking aligned arrays rather than the wrapper trees.
+
+    Values which a sample does not report for a partition (e.g. the network
+    metrics of a partition without a network, or any metric of a partition
+    which didn't exist yet) are NaN internally, and are left out of query
+    results.
+
+    Example usage:
+
+        store = MetricStore(history=20)
+        cache = LparMetricCache(adapter, host_uuid, metric_store=store)
+        ...
+        # Bytes per second received over the last five samples, by UUID.
+        store.rate('net_received_bytes', samples=5)
+    """
+
+    def __init__(self, history=10):
+        """Create a MetricStore.
+
+        :param history: The number of samples to retain.  At least two are
+                        required to compute rates.
+        """
+        if history < 2:
+            raise ValueError(_("A MetricStore must retain at least two "
+                               "samples."))
+        self.history = history
+        self._lock = threading.Lock()
+        self._samples = collections.deque(maxlen=history)
+        self._seq = 0
+        # {uuid: row} and its inverse
+        self._rows = {}
+        self._uuids = []
+        # The seq of the latest sample reporting each row
+        self._seen = []
+
+    def __len__(self):
+        return len(self._samples)
+
+    @property
+    def dates(self):
+        """The dates of the retained samples, oldest first."""
+        with self._lock:
+            return [sample.date for sample in self._samples]
+
+    @property
+    def uuids(self):
+        """The UUIDs of the partitions reported by any retained sample."""
+        with self._lock:
+            oldest = self._oldest_seq()
+            return [uuid for uuid, seen in zip(self._uuids, self._seen)
+                    if seen >= oldest]
+
+    def add(self, date, phyp, vioses=None, lpars=None):
+        """Ingest one sample, evicting the oldest if history is exceeded.
+
+        The parameters are as returned by pypowervm.tasks.monitor.util.
+        latest_stats, so its result may be passed directly:
+
+            store.add(*latest_stats(adapter, host_uuid))
+
+        :param date: The datetime of the sample.
+        :param phyp: The PhypInfo for the sample.  If None (e.g. metrics were
+                     only just enabled), the sample is ignored.
+        :param vioses: (Optional) List of ViosInfo for the sample.
+        :param lpars: (Optional) LparInfo for the sample.
+        :return: True if the sample was ingested; False otherwise - including
+                 if it is the newest sample already retained (per the PHYP
+                 sample's timeStamp), as when a cache refresh finds that LTM
+                 has not yet published a new sample.
+        """
+        if phyp is None:
+            return False
+        time_stamp = phyp.sample.time_stamp
+        with self._lock:
+            if (time_stamp is not None and self._samples and
+                    self._samples[-1].time_stamp == time_stamp):
+                return False
+            self._seq += 1
+            sample = _Sample(date, self._seq, time_stamp)
+            parts = phyp.sample.lpars + phyp.sample.vioses
+            self._fill(sample, [part.uuid for part in parts], parts,
+                       PHYP_METRICS)
+            if vioses:
+                # ViosInfo identifies the VIOS only by its short ID.
+                vios_uuids = {vios.id: vios.uuid
+                              for vios in phyp.sample.vioses}
+                vios_samples = [vios.sample for vios in vioses
+                                if vios.sample.id in vios_uuids]
+                self._fill(sample, [vios_uuids[vios.id]
+                                    for vios in vios_samples],
+                           vios_samples, VIOS_METRICS)
+            if lpars:
+                utils = lpars.lpars_util
+                self._fill(sample, [util.uuid for util in utils], utils,
+                           LPAR_METRICS)
+            self._samples.append(sample)
+            self._compact()
+        return True
+
+    def _fill(self, sample, uuids, objs, metrics):
+        rows = [self._row(uuid) for uuid in uuids]
+        for row in rows:
+            self._seen[row] = sample.seq
+        for name, getter in metrics:
+            col = _nan_column(len(self._uuids))
+            for row, obj in zip(rows, objs):
+                val = getter(obj)
+                if val is not None:
+                    col[row] = val
+            sample.columns[name] = col
+
+    def _row(self, uuid):
+        row = self._rows.get(uuid)
+        if row is None:
+            row = self._rows[uuid] = len(self._uuids)
+            self._uuids.append(uuid)
+            self._seen.append(0)
+        return row
+
+    def _oldest_seq(self):
+        return self._samples[0].seq if self._samples else self._seq + 1
+
+    def _compact(self):
+        """Drop the rows of partitions absent from all retained samples.
+
+        This is done only once they make up a quarter of the rows, so that
+        partition churn doesn't cause every sample to be rebuilt.
+        """
+        oldest = self._oldest_seq()
+        keep = [row for row, seen in enumerate(self._seen) if seen >= oldest]
+        if (len(self._uuids) - len(keep)) * 4 <= len(self._uuids):
+            return
+        for sample in self._samples:
+            for name, col in sample.columns.items():
+                size = len(col)
+                sample.columns[name] = array.array(
+                    'd', (col[row] if row < size else _NAN for row in keep))
+        self._uuids = [self._uuids[row] for row in keep]
+        self._seen = [self._seen[row] for row in keep]
+        self._rows = {uuid: row for row, uuid in enumerate(self._uuids)}
+
+    def _window(self, metric, samples):
+        """The columns for a metric over the newest samples, oldest first.
+
+        Each column is padded to the current number of rows.
+        """
+        if metric not in METRICS:
+            raise ValueError(_("Unknown metric %s.") % metric)
+        if samples is None or samples > len(self._samples):
+            samples = len(self._samples)
+        nrows = len(self._uuids)
+        cols = []
+        for sample in list(self._samples)[len(self._samples) - samples:]:
+            col = sample.columns.get(metric)
+            if col is None:
+                col = sample.columns[metric] = _nan_column(nrows)
+            elif len(col) < nrows:
+                col.extend(_nan_column(nrows - len(col)))
+            cols.append(col)
+        return cols
+
+    def _collect(self, values):
+        """{uuid: value} for the rows of values which are not NaN."""
+        return {uuid: val for uuid, val in zip(self._uuids, values)
+                if not math.isnan(val)}
+
+    def latest(self, metric):
+        """The value of a metric in the newest sample, for all partitions.
+
+        :param metric: The name of the metric; one of METRICS.
+        :return: Dict of {uuid: value}.
+        """
+        with self._lock:
+            cols = self._window(metric, 1)
+            return self._collect(cols[0]) if cols else {}
+
+    def rate(self, metric, samples=1):
+        """The per-second rate of change of a metric, for all partitions.
+
+        :param metric: The name of a counter metric; one of METRICS.
+        :param samples: The number of sample intervals over which to compute
+                        the rate.  Limited by the number of retained samples.
+        :return: Dict of {uuid: rate}.  Partitions not reported by both the
+                 first and last sample of the interval are omitted.
+        """
+        with self._lock:
+            if len(self._samples) < 2:
+                return {}
+            cols = self._window(metric, samples + 1)
+            first = self._samples[len(self._samples) - len(cols)]
+            elapsed = self._samples[-1].seconds - first.seconds
+            if elapsed <= 0:
+                return {}
+            # Per row; NaN (thus omitted) unless both ends are reported.
+            return self._collect([(last - first) / elapsed
+                                  for first, last in zip(cols[0], cols[-1])])
+
+    def moving_average(self, metric, samples=None):
+        """The mean of a metric over the newest samples, for all partitions.
+
+        :param metric: The name of the metric; one of METRICS.
+        :param samples: The number of samples to average.  Defaults to (and is
+                        limited by) the number of retained samples.
+        :return: Dict of {uuid: mean}.  Samples not reporting a partition are
+                 left out of its mean.
+        """
+        with self._lock:
+            cols = self._window(metric, samples)
+            means = []
+            # Per row, the mean of the values reported; NaN if there are none.
+            for vals in zip(*cols):
+                vals = [val for val in vals if not math.isnan(val)]
+                means.append(sum(vals) / len(vals) if vals else _NAN)
+            return self._collect(means)
+
+    def percentile(self, metric, pct, samples=None):
+        """A percentile of a metric over the newest samples, per partition.
+
+        Values are interpolated linearly between the closest ranks.
+
+        :param metric: The name of the metric; one of METRICS.
+        :param pct: The percentile, from 0 to 100.
+        :param samples: The number of samples to consider.  Defaults to (and is
+                        limited by) the number of retained samples.
+        :return: Dict of {uuid: value}.  Samples not reporting a partition are
+                 left out of its percentile.
+        """
+        if not 0 <= pct <= 100:
+            raise ValueError(_("Percentile must be between 0 and 100."))
+        with self._lock:
+            cols = self._window(metric, samples)
+            if not cols:
+                return {}
+            results = []
+            # Per row, interpolate between the reported values at the ranks
+            # either side of the percentile's (fractional) rank.
+            for vals in zip(*cols):
+                vals = sorted(val for val in vals if not math.isnan(val))
+                if not vals:
+                    results.append(_NAN)
+                    continue
+                rank = (len(vals) - 1) * pct / 100.0
+                low = int(rank)
+                high = min(low + 1, len(vals) - 1)
+                results.append(vals[low] +
+                               (vals[high] - vals[low]) * (rank - low))
+            return self._collect(results)
+
+    def series(self, uuid, metric):
+        """The history of a metric for one partition.
+
+        :param uuid: The UUID of the partition.
+        :param metric: The name of the metric; one of METRICS.
+        :return: List of (date, value) for the retained samples reporting the
+                 partition, oldest first.
+        """
+        with self._lock:
+            cols = self._window(metric, None)
+            row = self._rows.get(uuid)
+            if row is None:
+                return []
+            return [(sample.date, col[row])
+                    for sample, col in zip(self._samples, cols)
+                    if not math.isnan(col[row])]
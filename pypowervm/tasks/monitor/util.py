@@ -19,6 +19,8 @@
 
 import abc
 import datetime
+import threading
+import weakref
 
 from oslo_concurrency import lockutils
 from oslo_log import log as logging
@@ -27,6 +29,7 @@ import six
 from pypowervm import adapter as pvm_adpt
 from pypowervm.i18n import _
 from pypowervm.tasks.monitor import lpar as lpar_mon
+from pypowervm.utils import transaction as tx
 from pypowervm.wrappers import managed_system as pvm_ms
 from pypowervm.wrappers import monitor as pvm_mon
 from pypowervm.wrappers.pcm import lpar as lpar_pcm
@@ -38,6 +41,10 @@ LOG = logging.getLogger(__name__)
 
 RAW_METRICS = 'RawMetrics'
 
+# Seconds between attempts of the background refresher to fetch a sample
+# which was expected, but was not yet available or could not be fetched.
+BACKGROUND_RETRY_INTERVAL = 5
+
 
 @six.add_metaclass(abc.ABCMeta)
 class MetricCache(object):
@@ -50,21 +57,49 @@ class MetricCache(object):
     elapsed (30 seconds by default).
     """
 
-    def __init__(self, adapter, host_uuid, refresh_delta=30, include_vio=True):
+    # The name of the lockutils lock held by readers of the cache.  The
+    # background refresher holds it while it swaps in a new sample, so
+    # subclasses must set it to support background_refresh.
+    _swap_lock = None
+
+    def __init__(self, adapter, host_uuid, refresh_delta=30, include_vio=True,
+                 invalidation_index=None, metric_store=None,
+                 background_refresh=False):
         """Creates an instance of the cache.
 
         :param adapter: The pypowervm Adapter.
         :param host_uuid: The UUID of the host CEC to maintain a metrics
                           cache for.
         :param refresh_delta: (Optional) The interval in seconds at which the
-                              metrics should be updated.  Will only update if
+                              metrics should be updated.  Unless
+                              background_refresh is set, will only update if
                               the interval has been passed and the user invokes
-                              a cache query.  Will not update in the
-                              background, only if the cache is used.
+                              a cache query.
         :param include_vio: (Optional) Defaults to True.  If set to False, the
                             cur_vioses and prev_vioses will always be
                             unavailable.  This increases the speed for refresh.
+        :param invalidation_index: (Optional) A pypowervm.cache.GenerationIndex
+                                   (see Session.get_invalidation_index).  If
+                                   specified, metrics are not reported for
+                                   partitions which have since been deleted.
+        :param metric_store: (Optional) A
+                             pypowervm.tasks.monitor.metric_store.MetricStore
+                             into which each sample fetched by the cache is
+                             also added, to build a longer history.
+        :param background_refresh: (Optional) If True, a background thread
+                                   fetches each new sample once refresh_delta
+                                   has passed, and swaps it into the cache.
+                                   Cache queries then never wait for REST
+                                   requests.  The thread ends when stop() is
+                                   called or the cache is garbage collected.
+                                   Only supported by subclasses whose
+                                   readers are synchronized with it (such as
+                                   LparMetricCache).
         """
+        if background_refresh and self._swap_lock is None:
+            raise ValueError(_("%s does not support background refresh.") %
+                             type(self).__name__)
+
         # Ensure that the metric monitoring is enabled.
         ensure_ltm_monitors(adapter, host_uuid)
 
@@ -73,6 +108,8 @@ class MetricCache(object):
         self.host_uuid = host_uuid
         self.refresh_delta = datetime.timedelta(seconds=refresh_delta)
         self.include_vio = include_vio
+        self.invalidation_index = invalidation_index
+        self.metric_store = metric_store
 
         self.is_first_pass = False
 
@@ -83,10 +120,29 @@ class MetricCache(object):
             None, None, None, None)
 
         # Run a refresh up front.
+        self._refresher = None
+        # The link of the PHYP metric in the cache, if known.
+        self._phyp_link = None
         self._refresh_if_needed()
+        if background_refresh:
+            self._refresher = _BackgroundRefresher(self)
+
+    def stop(self):
+        """Stops the background refresh of the cache, if running.
+
+        The cache retains its current data, and resumes refreshing when it is
+        queried, as if background_refresh had not been specified.
+        """
+        refresher, self._refresher = self._refresher, None
+        if refresher is not None:
+            refresher.stop()
 
     def _refresh_if_needed(self):
         """Refreshes the cache if needed."""
+        # The background refresher keeps the cache up to date.
+        if self._refresher is not None:
+            return
+
         # The refresh is needed if the current date is none, or if the refresh
         # time delta has been crossed.
         refresh_needed = self.cur_date is None
@@ -101,29 +157,84 @@ class MetricCache(object):
         if not refresh_needed:
             return
 
-        self._set_prev()
-        self.cur_date, self.cur_phyp, self.cur_vioses, self.cur_lpars = (
-            latest_stats(self.adapter, self.host_uuid,
-                         include_vio=self.include_vio))
+        ltm_metrics = self._set_prev()
+        if ltm_metrics is None:
+            ltm_metrics = query_ltm_feed(self.adapter, self.host_uuid)
+        latest_phyp = _get_metric(ltm_metrics, 'phyp')
+        self._set_cur(latest_stats(self.adapter, self.host_uuid,
+                                   include_vio=self.include_vio,
+                                   ltm_metrics=ltm_metrics))
+        self._phyp_link = None if latest_phyp is None else latest_phyp.link
+
+    def _background_refresh(self):
+        """Fetches the latest sample and swaps it into the cache if new.
+
+        Invoked by the background refresher.  The fetch is done without any
+        lock held, so readers of the cache are blocked only while the sample
+        is swapped in.
+
+        :return: True if a new sample was swapped in; False if the latest
+                 sample is the one already in the cache.
+        """
+        # Only the feed need be fetched to tell whether there is a new
+        # sample: it has a new link.  The VIOS and LPAR metrics are chosen
+        # by the PHYP metric, so its link identifies the whole sample.
+        ltm_metrics = query_ltm_feed(self.adapter, self.host_uuid)
+        latest_phyp = _get_metric(ltm_metrics, 'phyp')
+        if latest_phyp is None or latest_phyp.link == self._phyp_link:
+            return False
+        stats = latest_stats(self.adapter, self.host_uuid,
+                             include_vio=self.include_vio,
+                             ltm_metrics=ltm_metrics)
+        with lockutils.lock(self._swap_lock):
+            self._set_prev()
+            self._set_cur(stats)
+        self._phyp_link = latest_phyp.link
+        return True
+
+    def _set_cur(self, stats):
+        """Saves the result of latest_stats as the current sample."""
+        self.cur_date, self.cur_phyp, self.cur_vioses, self.cur_lpars = stats
+        if self.metric_store is not None:
+            if self.is_first_pass:
+                self.metric_store.add(self.prev_date, self.prev_phyp,
+                                      self.prev_vioses, self.prev_lpars)
+            self.metric_store.add(self.cur_date, self.cur_phyp,
+                                  self.cur_vioses, self.cur_lpars)
 
         # Have the class that is implementing the cache update its simplified
         # representation of the data.  Ex. LparMetricCache
         self._update_internal_metric()
 
+    def _is_deleted(self, uuid):
+        """Whether the invalidation_index has seen a partition deleted."""
+        return (self.invalidation_index is not None and
+                self.invalidation_index.last_action(uuid) == 'delete')
+
     def _set_prev(self):
+        """Moves the current sample to the previous.
+
+        :return: On the first pass, the LTM feed which was queried to seed
+                 the previous sample, so that the current sample may be
+                 taken from the same feed.  Otherwise None.
+        """
         # On first boot, the cur data will be None.  Query to seed it with the
         # second latest data (which may also still be none if LTM was just
         # turned on, but just in case).
         self.is_first_pass = self.cur_date is None
         if self.is_first_pass:
+            ltm_metrics = query_ltm_feed(self.adapter, self.host_uuid)
             p_date, p_phyp, p_vioses, p_lpars = (
                 latest_stats(self.adapter, self.host_uuid,
-                             include_vio=self.include_vio, second_latest=True))
+                             include_vio=self.include_vio, second_latest=True,
+                             ltm_metrics=ltm_metrics))
             self.prev_date, self.prev_phyp = p_date, p_phyp
             self.prev_vioses, self.prev_lpars = p_vioses, p_lpars
+            return ltm_metrics
         else:
             self.prev_date, self.prev_phyp = self.cur_date, self.cur_phyp,
             self.prev_vioses, self.prev_lpars = self.cur_vioses, self.cur_lpars
+            return None
 
     def _update_internal_metric(self):
         """Save the raw metric to the transformed values.
@@ -134,6 +245,50 @@ class MetricCache(object):
         raise NotImplementedError()
 
 
+class _BackgroundRefresher(object):
+    """Thread which keeps a MetricCache up to date.
+
+    After each new sample, the thread waits out the cache's refresh_delta
+    (the LTM sampling interval) before fetching the next.  If the next
+    sample is not yet available, or can't be fetched, it tries again every
+    BACKGROUND_RETRY_INTERVAL seconds.
+
+    Only a weak reference to the cache is held, so that the thread does not
+    keep an abandoned cache alive.
+    """
+
+    def __init__(self, cache):
+        self._cache = weakref.ref(cache)
+        self._interval = cache.refresh_delta.total_seconds()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='pypowervm-metrics-%s' % cache.host_uuid)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        delay = self._interval
+        while not self._stopped.wait(delay):
+            cache = self._cache()
+            if cache is None:
+                return
+            try:
+                fresh = cache._background_refresh()
+            except Exception as e:
+                LOG.warning(_("Failed to refresh the metrics of host "
+                              "%(host)s: %(err)s"),
+                            {'host': cache.host_uuid, 'err': e})
+                fresh = False
+            del cache
+            delay = (self._interval if fresh else
+                     min(self._interval, BACKGROUND_RETRY_INTERVAL))
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
 class LparMetricCache(MetricCache):
     """Provides a cache of metrics on a per LPAR level.
 
@@ -167,20 +322,26 @@ class LparMetricCache(MetricCache):
     go out of scope and it will be cleared.  No manual clean up is required.
     """
 
-    def __init__(self, adapter, host_uuid, refresh_delta=30, include_vio=True):
+    _swap_lock = 'pvm_lpar_metrics_get'
+
+    def __init__(self, adapter, host_uuid, refresh_delta=30, include_vio=True,
+                 invalidation_index=None, metric_store=None,
+                 background_refresh=False):
         """Creates an instance of the cache.
 
         :param adapter: The pypowervm Adapter.
         :param host_uuid: The UUID of the host CEC to maintain a metrics
                           cache for.
         :param refresh_delta: (Optional) The interval at which the metrics
-                              should be updated.  Will only update if the
-                              interval has been passed and the user invokes a
-                              cache query.  Will not update in the background,
-                              only if the cache is used.
+                              should be updated.  Unless background_refresh is
+                              set, will only update if the interval has been
+                              passed and the user invokes a cache query.
         :param include_vio: (Optional) Defaults to True.  If set to False, the
                             cur_vioses and prev_vioses will always be
                             unavailable.  This increases the speed for refresh.
+        :param invalidation_index: See MetricCache.
+        :param metric_store: See MetricCache.
+        :param background_refresh: See MetricCache.
         """
         # Ensure these elements are defined up front so that references don't
         # error out if they haven't been set yet.  These will be the results
@@ -188,9 +349,10 @@ class LparMetricCache(MetricCache):
         self.cur_metric, self.prev_metric = None, None
 
         # Invoke the parent to seed the metrics.
-        super(LparMetricCache, self).__init__(adapter, host_uuid,
-                                              refresh_delta=refresh_delta,
-                                              include_vio=include_vio)
+        super(LparMetricCache, self).__init__(
+            adapter, host_uuid, refresh_delta=refresh_delta,
+            include_vio=include_vio, invalidation_index=invalidation_index,
+            metric_store=metric_store, background_refresh=background_refresh)
 
     @lockutils.synchronized('pvm_lpar_metrics_get')
     def get_latest_metric(self, lpar_uuid):
@@ -214,13 +376,14 @@ class LparMetricCache(MetricCache):
                  If the date of the metric is set, but None is returned for
                  the value then the LPAR had no metrics for it.  Scenarios can
                  occur where the current metric may have a value but not the
-                 previous (ex. when a LPAR was just created).
+                 previous (ex. when a LPAR was just created), or where the
+                 LPAR has been deleted (if an invalidation_index is in use).
         """
         # Refresh if needed.  Will no-op if no refresh is required.
         self._refresh_if_needed()
 
         # No metric, no operation.
-        if self.cur_metric is None:
+        if self.cur_metric is None or self._is_deleted(lpar_uuid):
             return self.cur_date, None
 
         return self.cur_date, self.cur_metric.get(lpar_uuid)
@@ -250,7 +413,7 @@ class LparMetricCache(MetricCache):
                  previous (ex. when a LPAR was just created).
         """
         # No metric, no operation.
-        if self.prev_metric is None:
+        if self.prev_metric is None or self._is_deleted(lpar_uuid):
             return self.prev_date, None
 
         return self.prev_date, self.prev_metric.get(lpar_uuid)
@@ -266,7 +429,8 @@ class LparMetricCache(MetricCache):
                                      self.cur_lpars)
 
 
-def latest_stats(adapter, host_uuid, include_vio=True, second_latest=False):
+def latest_stats(adapter, host_uuid, include_vio=True, second_latest=False,
+                 ltm_metrics=None):
     """Returns the latest PHYP and (optionally) VIOS statistics.
 
     :param adapter: The pypowervm adapter.
@@ -276,6 +440,8 @@ def latest_stats(adapter, host_uuid, include_vio=True, second_latest=False):
     :param second_latest: (Optional) Defaults to False.  If set to True, it
                           will pull the second to last metric for the return
                           data.
+    :param ltm_metrics: (Optional) The result of query_ltm_feed for the host.
+                        If not specified, the feed is queried.
     :return: datetime - When the metrics were pulled.
     :return: phyp_data - The PhypInfo object for the raw metrics.  May be None
              if there are issues gathering the metrics.
@@ -288,7 +454,8 @@ def latest_stats(adapter, host_uuid, include_vio=True, second_latest=False):
              lpar_metrics are generally collected once every two minutes, as
              opposed to the other data which is collected every 30 seconds.
     """
-    ltm_metrics = query_ltm_feed(adapter, host_uuid)
+    if ltm_metrics is None:
+        ltm_metrics = query_ltm_feed(adapter, host_uuid)
 
     latest_phyp = _get_metric(ltm_metrics, 'phyp', second_latest=second_latest)
 
@@ -296,28 +463,32 @@ def latest_stats(adapter, host_uuid, include_vio=True, second_latest=False):
     if latest_phyp is None:
         return datetime.datetime.now(), None, None, None
 
-    phyp_json = adapter.read_by_href(latest_phyp.link, xag=[]).body
-    phyp_metric = phyp_mon.PhypInfo(phyp_json)
-
-    # Now find the corresponding VIOS metrics for this.
+    # Now find the corresponding VIOS and LPAR metrics for this.
     vios_ltms = []
-    for metric in ltm_metrics:
-        # The VIOS metrics start with the key 'vios_'
-        if not metric.category.startswith('vios_'):
-            continue
-
-        if metric.updated_datetime == latest_phyp.updated_datetime:
-            vios_ltms.append(metric)
-
     if include_vio:
-        vios_metrics = [vios_mon.ViosInfo(adapter.read_by_href(x.link).body)
-                        for x in vios_ltms]
-    else:
-        vios_metrics = []
+        # The VIOS metrics start with the key 'vios_'
+        vios_ltms = [metric for metric in ltm_metrics
+                     if metric.category.startswith('vios_') and
+                     metric.updated_datetime == latest_phyp.updated_datetime]
+    latest_lpar = _get_metric(ltm_metrics, 'lpar', second_latest=second_latest)
 
-    # Now find the corresponding LPAR metrics for this.
-    lpar_metrics = get_lpar_metrics(ltm_metrics, adapter,
-                                    second_latest=second_latest)
+    # Each sample is a separate GET.  Issue them concurrently, so that the
+    # refresh costs about one round trip rather than one per VIOS.
+    with tx.ContextThreadPoolExecutor(
+            max_workers=len(vios_ltms) + 2) as executor:
+        phyp_fut = executor.submit(adapter.read_by_href, latest_phyp.link,
+                                   xag=[])
+        vios_futs = [executor.submit(adapter.read_by_href, x.link)
+                     for x in vios_ltms]
+        lpar_fut = (None if latest_lpar is None else
+                    executor.submit(adapter.read_by_href, latest_lpar.link,
+                                    xag=[]))
+
+    phyp_metric = phyp_mon.PhypInfo(phyp_fut.result().body)
+    vios_metrics = [vios_mon.ViosInfo(fut.result().body)
+                    for fut in vios_futs]
+    lpar_metrics = (None if lpar_fut is None else
+                    lpar_pcm.LparInfo(lpar_fut.result().body))
 
     # Get the latest date, but if we're getting the second latest we know
     # it is 30 seconds old.  The 30 seconds is the cadence that the REST API
@@ -352,14 +523,18 @@ def get_lpar_metrics(ltm_metrics, adapter, second_latest=False):
 
 
 def _get_metric(metrics, metric_type, second_latest=False):
-    filtered = [met for met in metrics if met.category == metric_type]
-    metrics = sorted(filtered, key=lambda met: met.updated_datetime,
-                     reverse=True)
-
-    if second_latest:
-        return metrics[1] if len(metrics) > 1 else None
-    else:
-        return metrics[0] if len(metrics) > 0 else None
+    # A single pass for the two most recent, rather than a sort of the feed.
+    # As with a stable sort, the first of equally recent metrics wins.
+    latest, second = None, None
+    for met in metrics:
+        if met.category != metric_type:
+            continue
+        if latest is None or met.updated_datetime > latest.updated_datetime:
+            latest, second = met, latest
+        elif second is None or (met.updated_datetime >
+                                second.updated_datetime):
+            second = met
+    return second if second_latest else latest
 
 
 def query_ltm_feed(adapter, host_uuid):
@@ -453,6 +628,8 @@ def vm_metrics(phyp, vioses, lpars):
                       "the metrics being recently initialized."))
         return {}
 
+    # Index the VIOS storage adapters once for all of the LPARs.
+    vios_index = lpar_mon.ViosStorageIndex(vioses)
     vm_data = {}
     for lpar_sample in phyp.sample.lpars:
         lpar_metric = lpar_mon.LparMetric(lpar_sample.uuid)
@@ -480,7 +657,7 @@ def vm_metrics(phyp, vioses, lpars):
             lpar_metric.storage = None
         else:
             lpar_metric.storage = lpar_mon.LparStorage(lpar_sample.storage,
-                                                       vioses)
+                                                       vios_index)
 
         vm_data[lpar_metric.uuid] = lpar_metric
     return vm_data
@@ -179,25 +179,36 @@ def get_partitions(adapter, lpars=True, vioses=True, mgmt=False):
 
 # A global variable that will cache the physical WWPNs on the system.
 _vscsi_pfc_wwpns = None
+# GenerationIndex token of the VIOS feed from which _vscsi_pfc_wwpns was built.
+_vscsi_pfc_wwpns_token = None
 
 
-def get_physical_wwpns(adapter, force_refresh=True):
+def get_physical_wwpns(adapter, force_refresh=True, invalidation_index=None):
     """Returns the active WWPNs of the FC ports across all VIOSes on system.
 
     :param adapter: pypowervm.adapter.Adapter for REST API communication.
     :param force_refresh: The value discovered by this method is cached.  If
                           force_refresh is False, the cached value is returned.
                           If True, the value is refetched from the server (and
-                          re-cached).
+                          re-cached) - unless invalidation_index shows that
+                          no VIOS has changed since it was cached.
+    :param invalidation_index: (Optional) A pypowervm.cache.GenerationIndex
+                               (see Session.get_invalidation_index).  Events
+                               for any VIOS (e.g. when its adapters power
+                               cycle) cause the next force_refresh to refetch.
     """
-    global _vscsi_pfc_wwpns
-    # TODO(IBM): Have a REST event posted when adapters power cycle, and force
-    # refresh the cache.
+    global _vscsi_pfc_wwpns, _vscsi_pfc_wwpns_token
+    token = (invalidation_index.token(schema_type=vios.VIOS.schema_type)
+             if invalidation_index is not None else None)
+    if force_refresh and token is not None and (
+            token == _vscsi_pfc_wwpns_token):
+        force_refresh = False
     if force_refresh or _vscsi_pfc_wwpns is None:
         vios_feed = vios.VIOS.get(adapter, xag=[c.XAG.VIO_STOR])
-        _vscsi_pfc_wwpns = []
+        wwpns = []
         for vwrap in vios_feed:
-            _vscsi_pfc_wwpns.extend(vwrap.get_active_pfc_wwpns())
+            wwpns.extend(vwrap.get_active_pfc_wwpns())
+        _vscsi_pfc_wwpns, _vscsi_pfc_wwpns_token = wwpns, token
     return _vscsi_pfc_wwpns
 
 
@@ -16,6 +16,10 @@
 
 """Tasks to start, stop, and reboot partitions."""
 
+import collections
+import threading
+import time
+
 from oslo_config import cfg
 from oslo_log import log as logging
 import six
@@ -25,7 +29,9 @@ import pypowervm.exceptions as pexc
 from pypowervm.i18n import _
 import pypowervm.log as lgc
 import pypowervm.tasks.power_opts as popts
+from pypowervm.utils import transaction as tx
 import pypowervm.wrappers.base_partition as bp
+import pypowervm.wrappers.entry_wrapper as ewrap
 from pypowervm.wrappers import job
 
 LOG = logging.getLogger(__name__)
@@ -40,6 +46,10 @@ _ALREADY_POWERED_OFF_ERRS = ['HSCL1558', 'PVME04000005', 'PVME01050901']
 # Error codes indicate partition is already powered on
 _ALREADY_POWERED_ON_ERRS = ['HSCL3681', 'PVME01042026']
 
+# Default maximum number of partitions on which the *_bulk methods operate at
+# once.
+BULK_MAX_WORKERS = 16
+
 BootMode = popts.BootMode
 KeylockPos = popts.KeylockPos
 RemoveOptical = popts.RemoveOptical
@@ -492,3 +502,181 @@ def power_off_progressive(part, restart=False, ibmi_immed=False,
     :raise VMPowerOffTimeout: If the last attempt in the progression timed out.
     """
     _power_off_progressive(part, timeout, restart, ibmi_immed=ibmi_immed)
+
+
+class PowerResult(object):
+    """Outcome of a power operation on one partition, from a *_bulk method.
+
+    :ivar part: The partition wrapper.  If a getter was passed to the bulk
+                method, this is the wrapper it fetched - or None if the fetch
+                failed.
+    :ivar uuid: The UUID of the partition.
+    :ivar ret: The return value of the operation, if it succeeded (e.g.
+               LPAR_ALREADY_POWERED_OFF from PowerOp.stop).
+    :ivar error: The exception raised by the operation (or the fetch), or None
+                 if it succeeded.
+    :ivar start: time.time() at which the operation started (after waiting
+                 for a worker and for the host's concurrency limit).  None if
+                 it never started.
+    :ivar elapsed: Number of seconds the operation took.  None if it never
+                   started.
+    """
+    def __init__(self, part_or_getter):
+        self.part = (None if isinstance(part_or_getter,
+                                        ewrap.EntryWrapperGetter)
+                     else part_or_getter)
+        self.uuid = part_or_getter.uuid
+        self.ret = None
+        self.error = None
+        self.start = None
+        self.elapsed = None
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        return ('PowerResult(uuid=%s, succeeded=%s, elapsed=%s, error=%r)' %
+                (self.uuid, self.succeeded, self.elapsed, self.error))
+
+
+def _run_bulk(parts, func, max_workers, max_per_host):
+    """Run a power operation on many partitions concurrently.
+
+    :param parts: List of partition wrappers and/or EntryWrapperGetters.
+    :param func: Method accepting a partition wrapper, performing the power
+                 operation on it.
+    :param max_workers, max_per_host: See power_off_progressive_bulk.
+    :return: A list of PowerResult, in the order of parts.
+    """
+    results = [PowerResult(part) for part in parts]
+    if not results:
+        return results
+    host_sems = {}
+    lock = threading.Lock()
+
+    def host_sem(host_uuid):
+        with lock:
+            if host_uuid not in host_sems:
+                host_sems[host_uuid] = threading.BoundedSemaphore(
+                    max_per_host)
+            return host_sems[host_uuid]
+
+    def run_one(part_or_getter, result):
+        try:
+            if result.part is None:
+                result.part = part_or_getter.get()
+            if max_per_host:
+                sem = host_sem(result.part.assoc_sys_uuid)
+                sem.acquire()
+            try:
+                result.start = time.time()
+                try:
+                    result.ret = func(result.part)
+                finally:
+                    result.elapsed = time.time() - result.start
+            finally:
+                if max_per_host:
+                    sem.release()
+        except Exception as e:
+            result.error = e
+        LOG.debug("Bulk power operation on partition %(uuid)s: %(result)s",
+                  {'uuid': result.uuid, 'result': result})
+
+    work = list(zip(parts, results))
+    if max_per_host:
+        # Interleave the partitions by host, so workers waiting for a busy
+        # host don't hold up partitions on other hosts.  (We don't know the
+        # host of a getter's partition until it is fetched.)
+        by_host = collections.OrderedDict()
+        for part, result in work:
+            host_uuid = (None if result.part is None
+                         else result.part.assoc_sys_uuid)
+            by_host.setdefault(host_uuid, []).append((part, result))
+        work = [item for items in six.moves.zip_longest(*by_host.values())
+                for item in items if item is not None]
+
+    with tx.ContextThreadPoolExecutor(
+            min(max_workers, len(results))) as executor:
+        for part, result in work:
+            executor.submit(run_one, part, result)
+    failed = [result for result in results if not result.succeeded]
+    if failed:
+        LOG.warning(_("Bulk power operation failed on %(failed)d of %(total)d "
+                      "partitions: %(uuids)s"),
+                    {'failed': len(failed), 'total': len(results),
+                     'uuids': ', '.join(result.uuid for result in failed)})
+    return results
+
+
+def power_on_bulk(parts, opts=None, timeout=CONF.pypowervm_job_request_timeout,
+                  max_workers=BULK_MAX_WORKERS, max_per_host=None):
+    """Power on many partitions concurrently.
+
+    This is PowerOp.start on each partition, on a bounded pool of workers.
+
+    :param parts: Iterable of LPAR/VIOS wrappers and/or EntryWrapperGetters
+                  of the partitions to power on.  Getters are fetched by the
+                  workers.
+    :param opts, timeout: See PowerOp.start.
+    :param max_workers, max_per_host: See power_off_progressive_bulk.
+    :return: A list of PowerResult, one per partition, in the order of parts.
+             Failures (VMPowerOnFailure, VMPowerOnTimeout, etc.) are reported
+             therein rather than raised.
+    """
+    return _run_bulk(
+        list(parts),
+        lambda part: PowerOp.start(part, opts=opts, timeout=timeout),
+        max_workers, max_per_host)
+
+
+def power_off_bulk(parts, opts=None,
+                   timeout=CONF.pypowervm_job_request_timeout,
+                   max_workers=BULK_MAX_WORKERS, max_per_host=None):
+    """Power off many partitions concurrently, without retries.
+
+    This is PowerOp.stop on each partition, on a bounded pool of workers.
+
+    :param parts: Iterable of LPAR/VIOS wrappers and/or EntryWrapperGetters
+                  of the partitions to power off.  Getters are fetched by the
+                  workers.
+    :param opts, timeout: See PowerOp.stop.  If opts is None, each partition
+                          gets PowerOffOpts.soft_detect appropriate to it.
+    :param max_workers, max_per_host: See power_off_progressive_bulk.
+    :return: A list of PowerResult, one per partition, in the order of parts.
+             Failures (VMPowerOffFailure, VMPowerOffTimeout, etc.) are
+             reported therein rather than raised.
+    """
+    return _run_bulk(
+        list(parts),
+        lambda part: PowerOp.stop(part, opts=opts, timeout=timeout),
+        max_workers, max_per_host)
+
+
+def power_off_progressive_bulk(
+        parts, restart=False, ibmi_immed=False,
+        timeout=CONF.pypowervm_job_request_timeout,
+        max_workers=BULK_MAX_WORKERS, max_per_host=None):
+    """Power off many partitions concurrently, retrying each as necessary.
+
+    This is power_off_progressive on each partition, on a bounded pool of
+    workers.  Each partition goes through its own soft->hard progression
+    independently of the others.
+
+    :param parts: Iterable of LPAR/VIOS wrappers and/or EntryWrapperGetters
+                  of the partitions to power off.  Getters are fetched by the
+                  workers.
+    :param restart, ibmi_immed, timeout: See power_off_progressive.
+    :param max_workers: Maximum number of partitions to operate on at once.
+    :param max_per_host: If specified, the maximum number of partitions on
+                         any one host (ManagedSystem) to operate on at once.
+                         Workers wait for a slot on the partition's host.
+    :return: A list of PowerResult, one per partition, in the order of parts.
+             Failures (VMPowerOffFailure, VMPowerOffTimeout, etc.) are
+             reported therein rather than raised.
+    """
+    return _run_bulk(
+        list(parts),
+        lambda part: _power_off_progressive(part, timeout, restart,
+                                            ibmi_immed=ibmi_immed),
+        max_workers, max_per_host)
@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import fixtures
 import functools
 import logging as base_logging
 import mock
@@ -96,3 +97,58 @@ class TestLogHelper(testtools.TestCase):
             # Should be called with 24 since 12 * 2 entries.
             self.assertEqual(mock_init.call_args_list,
                              [mock.call(max_entries=24)])
+
+    @mock.patch('pypowervm.helpers.log_helper.LOG')
+    def test_bounded_bodies(self, mock_log):
+        """Long bodies are truncated; total body size is bounded."""
+        self.useFixture(fixtures.MockPatchObject(log_hlp, 'MAX_BODY_LEN', 10))
+        self.useFixture(fixtures.MockPatchObject(log_hlp, 'MAX_LOG_BYTES',
+                                                 25))
+        # Start with fresh storage for this thread
+        if hasattr(log_hlp.log_store, 'powervm_log'):
+            del log_hlp.log_store.powervm_log
+        self.addCleanup(delattr, log_hlp.log_store, 'powervm_log')
+        adpt = adp.Adapter(self.sess, helpers=functools.partial(
+            log_hlp.log_helper, max_logs=10))
+        self.sess.request.return_value = adp.Response(
+            'GET', '/some/path', 200, 'OK', ['headers'], body='x' * 100)
+        adpt._request('method', 'path', body='abcdefghijklmnop')
+        ring = log_hlp.log_store.powervm_log
+        self.assertEqual(2, len(ring))
+        req = ring.popleft()['request']
+        self.assertEqual(('method', 'path'), req[0])
+        self.assertEqual('abcdefghij... [truncated 6 of 16 characters]',
+                         str(req[1]['body']))
+        resp = ring.popleft()['response']
+        self.assertEqual('x' * 10 + '... [truncated 90 of 100 characters]',
+                         str(resp['body']))
+
+        # Each request/response pair stashes 15 characters of body, so the
+        # first request is dropped to stay within 25.
+        adpt._request('method1', 'path', body='short')
+        adpt._request('method2', 'path', body='short')
+        self.assertEqual(3, len(ring))
+        self.assertIn('response', ring.popleft())
+        self.assertEqual('method2', ring.popleft()['request'][0][0])
+        ring.popleft()
+        # The newest entry is kept even if it alone exceeds the limit
+        log_hlp.log_store.powervm_log.max_bytes = 5
+        adpt._request('method3', 'path', body='short')
+        self.assertEqual(1, len(ring))
+        # Sensitive bodies take no room
+        ring.popleft()
+        adpt._request('method4', 'path', body='secret', sensitive=True)
+        self.assertEqual(2, len(ring))
+
+        # The dump renders the truncated bodies
+        mock_log.reset_mock()
+        log_hlp._write_thread_log()
+        self.assertEqual(['REQUEST: <SENSITIVE>', 'RESPONSE: <SENSITIVE>'],
+                         [cal[0][0] for cal in mock_log.info.call_args_list])
+        adpt._request('method5', 'path', body='abcdefghijklmnop')
+        mock_log.reset_mock()
+        log_hlp._write_thread_log()
+        self.assertIn(mock.call('x' * 10 + '... [truncated 90 of 100 '
+                                'characters]'),
+                      [mock.call(str(cal[0][0]))
+                       for cal in mock_log.info.call_args_list])
@@ -14,12 +14,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
 import logging
 import mock
 import testtools
 
 from pypowervm.tasks.monitor import host_cpu
 import pypowervm.tests.test_fixtures as pvm_fx
+from pypowervm.wrappers.pcm import phyp as pvm_mon_phyp
 
 LOG = logging.getLogger(__name__)
 
@@ -272,6 +274,35 @@ class TestHostCPUMetricCache(TestHostCPUBase):
         prev = host_stats._find_prev_sample(new_elem, None)
         self.assertIsNone(prev)
 
+    @staticmethod
+    def _synthetic_phyp(count, gen, renamed=()):
+        """A PhypInfo of `count` LPARs, whose cycles grow with `gen`."""
+        return pvm_mon_phyp.PhypInfo(json.dumps({'systemUtil': {
+            'utilInfo': {}, 'utilSample': {
+                'sharedProcessorPool': [], 'viosUtil': [],
+                'lparsUtil': [{
+                    'id': idx, 'uuid': 'uuid-%d' % idx,
+                    'name': ('new-%d' if idx in renamed else 'lpar-%d') % idx,
+                    'processor': {
+                        'utilizedCappedProcCycles': (idx + 1) * gen * 1000,
+                        'utilizedUnCappedProcCycles': idx * gen,
+                        'idleProcCycles': gen}}
+                    for idx in reversed(range(count))]}}}))
+
+    def test_delta_proc_cycles_scale(self):
+        host_stats = host_cpu.HostCPUMetricCache(self.adpt, 'host_uuid')
+        for count in (1000, 5000):
+            prev = self._synthetic_phyp(count, 1)
+            # LPARs 1 and 2 were replaced by new LPARs with the same IDs, and
+            # the last LPAR was deleted.
+            cur = self._synthetic_phyp(count - 1, 2, renamed=(1, 2))
+            delta = host_stats._delta_proc_cycles(cur.sample.lpars,
+                                                  prev.sample.lpars)
+            # Each LPAR grew by (idx + 1) * 1000 + idx - 1 cycles.
+            self.assertEqual(
+                sum((idx + 1) * 1000 + idx - 1 for idx in range(count - 1)
+                    if idx not in (1, 2)), delta)
+
     def test_get_total_cycles(self):
         # Mock objects to test with
         host_stats = host_cpu.HostCPUMetricCache(self.adpt, 'host_uuid')
@@ -0,0 +1,184 @@
+# Copyright 2026 IBM Corp.
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import json
+
+import mock
+import testtools
+
+from pypowervm.tasks.monitor import metric_store
+from pypowervm.tasks.monitor import util as pvm_t_mon
+from pypowervm.tests.test_utils import pvmhttp
+from pypowervm.wrappers.pcm import lpar as pvm_mon_lpar
+from pypowervm.wrappers.pcm import phyp as pvm_mon_phyp
+from pypowervm.wrappers.pcm import vios as pvm_mon_vios
+
+VM = '42AD4FD4-DC64-4935-9E29-9B7C6F35AFCC'
+VIOS = '3443DB77-AED1-47ED-9AA5-3DB9C6CF7089'
+T0 = datetime.datetime(2015, 5, 27, 8, 17, 15)
+
+
+def _load(file_name):
+    return pvmhttp.PVMFile(file_name).body
+
+
+def _phyp(lpars, time_stamp=None):
+    """A PhypInfo with the given {uuid: used cycles} VMs."""
+    return pvm_mon_phyp.PhypInfo(json.dumps({'systemUtil': {
+        'utilInfo': {}, 'utilSample': {
+            'timeStamp': time_stamp,
+            'sharedProcessorPool': [], 'viosUtil': [],
+            'lparsUtil': [{'id': idx, 'uuid': uuid, 'processor': {
+                'utilizedCappedProcCycles': cycles,
+                'utilizedUnCappedProcCycles': 0, 'idleProcCycles': 0}}
+                for idx, (uuid, cycles) in enumerate(lpars.items())]}}}))
+
+
+class TestMetricStore(testtools.TestCase):
+
+    def setUp(self):
+        super(TestMetricStore, self).setUp()
+        self.store = metric_store.MetricStore(history=3)
+
+    def test_ingest(self):
+        self.assertRaises(ValueError, metric_store.MetricStore, history=1)
+        self.assertFalse(self.store.add(T0, None))
+        self.assertEqual(0, len(self.store))
+        self.assertEqual({}, self.store.latest('used_proc_cycles'))
+        self.assertEqual({}, self.store.rate('used_proc_cycles'))
+
+        self.assertTrue(self.store.add(
+            T0, pvm_mon_phyp.PhypInfo(_load('phyp_pcm_data.txt')),
+            [pvm_mon_vios.ViosInfo(_load('vios_pcm_data.txt'))],
+            pvm_mon_lpar.LparInfo(_load('lpar_pcm_data.txt'))))
+        self.assertEqual([T0], self.store.dates)
+        # Five VMs and a VIOS from PHYP, plus four LPARs only reported by RMC
+        self.assertEqual(10, len(self.store.uuids))
+
+        # PHYP metrics
+        self.assertEqual(264619289721 + 641419282,
+                         self.store.latest('used_proc_cycles')[VM])
+        self.assertEqual(
+            334805782979 + 219847016046 - 260430293020,
+            self.store.latest('used_proc_cycles')[VIOS])
+        # Only the VM with a network reports network metrics
+        self.assertEqual({VM: 10000},
+                         self.store.latest('net_received_bytes'))
+        # VIOS metrics, mapped to the VIOS UUID by its ID
+        self.assertEqual({VIOS: 1715}, self.store.latest('utilized_mem'))
+        self.assertEqual({VIOS: 349011722 + 557922304},
+                         self.store.latest('stg_read_bytes'))
+        # RMC metrics
+        free = self.store.latest('pct_real_mem_free')
+        self.assertEqual(61, free[VM])
+        self.assertEqual(6, len(free))
+
+        self.assertRaises(ValueError, self.store.latest, 'bogus')
+
+    def test_duplicate(self):
+        """A sample already retained (per its timeStamp) is not re-added."""
+        self.assertTrue(self.store.add(T0, _phyp({'u1': 10}, 'ts1')))
+        self.assertFalse(self.store.add(T0 + datetime.timedelta(seconds=30),
+                                        _phyp({'u1': 10}, 'ts1')))
+        self.assertEqual([T0], self.store.dates)
+        self.assertTrue(self.store.add(T0 + datetime.timedelta(seconds=60),
+                                       _phyp({'u1': 70}, 'ts2')))
+        self.assertEqual({'u1': 1}, self.store.rate('used_proc_cycles'))
+        self.assertEqual({'u1': 40},
+                         self.store.moving_average('used_proc_cycles'))
+
+    def test_queries(self):
+        uuids = ['u1', 'u2', 'u3']
+        cycles = [{'u1': 0, 'u2': 100},
+                  {'u1': 300, 'u2': 400, 'u3': 50},
+                  {'u1': 900, 'u2': 700, 'u3': 100},
+                  {'u1': 1200, 'u3': 120}]
+        for idx, sample in enumerate(cycles):
+            self.store.add(T0 + datetime.timedelta(seconds=30 * idx),
+                           _phyp(sample))
+        # Only three samples are retained.
+        self.assertEqual(3, len(self.store))
+        self.assertEqual(T0 + datetime.timedelta(seconds=30),
+                         self.store.dates[0])
+        self.assertEqual(uuids, self.store.uuids)
+
+        self.assertEqual({'u1': 1200, 'u3': 120},
+                         self.store.latest('used_proc_cycles'))
+        # u2 is not in the latest sample, so has no rate.
+        self.assertEqual({'u1': 10, 'u3': 20 / 30.0},
+                         self.store.rate('used_proc_cycles'))
+        self.assertEqual({'u1': 15, 'u3': 70 / 60.0},
+                         self.store.rate('used_proc_cycles', samples=2))
+        # Limited by the history
+        self.assertEqual(self.store.rate('used_proc_cycles', samples=2),
+                         self.store.rate('used_proc_cycles', samples=10))
+
+        self.assertEqual({'u1': 800, 'u2': 550, 'u3': 90},
+                         self.store.moving_average('used_proc_cycles'))
+        self.assertEqual({'u1': 1050, 'u2': 700, 'u3': 110},
+                         self.store.moving_average('used_proc_cycles',
+                                                   samples=2))
+
+        self.assertEqual({'u1': 900, 'u2': 550, 'u3': 100},
+                         self.store.percentile('used_proc_cycles', 50))
+        self.assertEqual({'u1': 300, 'u2': 400, 'u3': 50},
+                         self.store.percentile('used_proc_cycles', 0))
+        self.assertEqual({'u1': 1200, 'u2': 700, 'u3': 120},
+                         self.store.percentile('used_proc_cycles', 100))
+        self.assertEqual({'u1': 1050, 'u2': 625, 'u3': 110},
+                         self.store.percentile('used_proc_cycles', 75))
+        self.assertRaises(ValueError, self.store.percentile,
+                          'used_proc_cycles', 101)
+
+        self.assertEqual(
+            [(T0 + datetime.timedelta(seconds=30), 400),
+             (T0 + datetime.timedelta(seconds=60), 700)],
+            self.store.series('u2', 'used_proc_cycles'))
+        self.assertEqual([], self.store.series('u4', 'used_proc_cycles'))
+
+    def test_compact(self):
+        # Cycle through partitions, so that most drop out of the history.
+        for idx in range(10):
+            self.store.add(T0 + datetime.timedelta(seconds=30 * idx),
+                           _phyp({'u%d' % idx: idx, 'stable': idx}))
+        self.assertEqual(['stable', 'u7', 'u8', 'u9'],
+                         sorted(self.store.uuids))
+        # The rows of departed partitions were reclaimed.
+        self.assertLessEqual(len(self.store._uuids), 5)
+        self.assertEqual({'stable': 9, 'u9': 9},
+                         self.store.latest('used_proc_cycles'))
+        self.assertEqual({'stable': 1 / 30.0},
+                         self.store.rate('used_proc_cycles', samples=2))
+        self.assertEqual({'stable': 8, 'u7': 7, 'u8': 8, 'u9': 9},
+                         self.store.moving_average('used_proc_cycles'))
+
+    @mock.patch('pypowervm.tasks.monitor.util.query_ltm_feed')
+    @mock.patch('pypowervm.tasks.monitor.util.latest_stats')
+    @mock.patch('pypowervm.tasks.monitor.util.ensure_ltm_monitors')
+    def test_metric_cache(self, mock_ensure, mock_stats, mock_ltm_feed):
+        prev = (T0, _phyp({'u1': 10}), [], None)
+        cur = (T0 + datetime.timedelta(seconds=30), _phyp({'u1': 40}), [],
+               None)
+        mock_stats.side_effect = [prev, cur]
+        with mock.patch.object(pvm_t_mon.LparMetricCache,
+                               '_update_internal_metric'):
+            pvm_t_mon.LparMetricCache('adpt', 'host_uuid',
+                                      metric_store=self.store)
+        # Both the seeded previous sample and the current one were added.
+        self.assertEqual([prev[0], cur[0]], self.store.dates)
+        self.assertEqual({'u1': 1}, self.store.rate('used_proc_cycles'))
+        mock_ensure.assert_called_once_with('adpt', 'host_uuid')
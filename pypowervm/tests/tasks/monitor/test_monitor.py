@@ -17,11 +17,15 @@
 """Test for the monitoring functions."""
 
 import datetime
+import threading
 
+import fixtures
 import mock
 import testtools
 
+from pypowervm import cache
 from pypowervm import entities as pvm_e
+from pypowervm.tasks.monitor import lpar as lpar_mon
 from pypowervm.tasks.monitor import util as pvm_t_mon
 from pypowervm.tests.tasks import util as tju
 from pypowervm.tests import test_fixtures as fx
@@ -224,6 +228,48 @@ class TestMonitors(testtools.TestCase):
     def test_vm_metrics_no_phyp_data(self):
         self.assertEqual({}, pvm_t_mon.vm_metrics(None, [], None))
 
+    def test_vios_storage_index(self):
+        vios_data = pvm_mon_vios.ViosInfo(self._load(VIOS_DATA))
+        # A second sample for the same VIOS is ignored.
+        vios_data2 = pvm_mon_vios.ViosInfo(self._load(VIOS_DATA))
+        vios_data2.sample.storage.virt_adpts[0].physical_location = (
+            'U8247.22L.2125D4A-V1-C1000')
+        index = lpar_mon.ViosStorageIndex([vios_data, vios_data2])
+
+        def vstor(vios_id, slot):
+            return pvm_mon_phyp.PhypStorageVAdpt(
+                {'viosId': vios_id, 'viosAdapterSlotId': slot})
+        self.assertEqual('vhost0',
+                         index.find_vstor_adpt(vstor(1, 1000)).name)
+        self.assertEqual('vhost9', index.find_vstor_adpt(vstor(1, 11)).name)
+        self.assertEqual('vhost3', index.find_vstor_adpt(vstor(1, 5)).name)
+        # Unknown slot, or unknown VIOS
+        self.assertIsNone(index.find_vstor_adpt(vstor(1, 100)))
+        self.assertIsNone(index.find_vstor_adpt(vstor(2, 1000)))
+
+        def vfc(vios_id, *wwpns):
+            return pvm_mon_phyp.PhypVirtualFCAdpt(
+                {'viosId': vios_id, 'wwpnpair': list(wwpns)})
+        # Either WWPN of the pair may match.
+        for wwpns in ((0x21000024ff649159, 0xc050760937f9090a),
+                      (0xc050760937f9090a, 0x21000024ff649159)):
+            self.assertEqual('vfc1', index.find_vfc_adpt(vfc(1, *wwpns)).name)
+        self.assertIsNone(index.find_vfc_adpt(vfc(1, 0xc050760937f9090a)))
+        self.assertIsNone(index.find_vfc_adpt(vfc(2, 0x21000024ff649159)))
+
+        # An LparStorage may be built from the index or from the ViosInfos.
+        phyp_stor = pvm_mon_phyp.PhypStorage({
+            'genericVirtualAdapters': [{'viosId': 1,
+                                        'viosAdapterSlotId': 1000}],
+            'virtualFiberChannelAdapters': [
+                {'viosId': 1, 'wwpnPair': [0x21000024ff649159]}]})
+        for vios_metrics in (index, [vios_data]):
+            stor = lpar_mon.LparStorage(phyp_stor, vios_metrics)
+            self.assertEqual(['vhost0'],
+                             [adpt.name for adpt in stor.virt_adpts])
+            self.assertEqual(['vfc1'], [adpt.name for adpt in stor.vfc_adpts])
+        self.assertEqual([], lpar_mon.LparStorage(phyp_stor, None).virt_adpts)
+
     @mock.patch('pypowervm.tasks.monitor.util.query_ltm_feed')
     def test_latest_stats(self, mock_ltm_feed):
         # Set up the return data.
@@ -319,6 +365,55 @@ class TestMonitors(testtools.TestCase):
         self.assertIsInstance(prev_lpars, pvm_mon_lpar.LparInfo)
         self.assertIsNotNone(prev_date)
 
+        # A feed already in hand is not queried again.
+        mock_ltm_feed.reset_mock()
+        prev_date, prev_phyp, prev_vioses, prev_lpars = (
+            pvm_t_mon.latest_stats(self.adpt, mock.Mock(), second_latest=True,
+                                   ltm_metrics=mock_ltm_feed.return_value))
+        self.assertEqual(1, len(prev_vioses))
+        mock_ltm_feed.assert_not_called()
+
+    def test_get_metric(self):
+        def metric(category, updated):
+            return mock.Mock(category=category, updated_datetime=updated)
+        metrics = [metric('phyp', 1), metric('lpar', 5), metric('phyp', 3),
+                   metric('phyp', 2), metric('phyp', 3), metric('phyp', 2)]
+        # The first of equally recent metrics wins.
+        self.assertIs(metrics[2], pvm_t_mon._get_metric(metrics, 'phyp'))
+        self.assertIs(metrics[4], pvm_t_mon._get_metric(
+            metrics, 'phyp', second_latest=True))
+        self.assertIs(metrics[1], pvm_t_mon._get_metric(metrics, 'lpar'))
+        self.assertIsNone(pvm_t_mon._get_metric(
+            metrics, 'lpar', second_latest=True))
+        self.assertIsNone(pvm_t_mon._get_metric(metrics, 'vios_1'))
+
+    @mock.patch('pypowervm.tasks.monitor.util.query_ltm_feed')
+    def test_latest_stats_concurrent(self, mock_ltm_feed):
+        """The samples of a refresh are fetched concurrently."""
+        metrics = []
+        for category, link in (('phyp', 'phyp'), ('vios_1', 'vio1'),
+                               ('vios_2', 'vio2'), ('lpar', 'lpar')):
+            metric = mock.MagicMock(category=category, updated_datetime=1,
+                                    link=link)
+            metrics.append(metric)
+        mock_ltm_feed.return_value = metrics
+        bodies = {'phyp': self._load(PHYP_DATA), 'vio1': self._load(VIOS_DATA),
+                  'vio2': self._load(VIOS_DATA), 'lpar': self._load(LPAR_DATA)}
+        # Each GET waits for all of the others to be in flight.
+        barrier = threading.Barrier(4, timeout=10)
+
+        def read(link, xag=None):
+            barrier.wait()
+            return mock.Mock(body=bodies[link])
+        self.adpt.read_by_href.side_effect = read
+
+        resp_date, resp_phyp, resp_vioses, resp_lpars = (
+            pvm_t_mon.latest_stats(self.adpt, 'host_uuid'))
+        self.assertIsInstance(resp_phyp, pvm_mon_phyp.PhypInfo)
+        self.assertEqual(2, len(resp_vioses))
+        self.assertIsInstance(resp_lpars, pvm_mon_lpar.LparInfo)
+        self.assertEqual(4, self.adpt.read_by_href.call_count)
+
     @mock.patch('pypowervm.tasks.monitor.util.vm_metrics')
     @mock.patch('pypowervm.tasks.monitor.util.query_ltm_feed')
     def test_latest_stats_no_data(self, mock_ltm_feed, mock_vm_metrics):
@@ -348,6 +443,9 @@ class TestMetricsCache(testtools.TestCase):
 
         self.adptfx = self.useFixture(fx.AdapterFx(traits=fx.RemoteHMCTraits))
         self.adpt = self.adptfx.adpt
+        self.mock_ltm_feed = self.useFixture(fixtures.MockPatch(
+            'pypowervm.tasks.monitor.util.query_ltm_feed')).mock
+        self.mock_ltm_feed.return_value = []
 
     @mock.patch('pypowervm.tasks.monitor.util.vm_metrics')
     @mock.patch('pypowervm.tasks.monitor.util.latest_stats')
@@ -379,12 +477,17 @@ class TestMetricsCache(testtools.TestCase):
         metric_cache = pvm_t_mon.LparMetricCache(self.adpt, 'host_uuid',
                                                  refresh_delta=.25,
                                                  include_vio=False)
-        mock_stats.assert_called_with(self.adpt, 'host_uuid',
-                                      include_vio=False)
+        # The previous and current samples are taken from one LTM feed.
+        self.mock_ltm_feed.assert_called_once_with(self.adpt, 'host_uuid')
+        mock_stats.assert_has_calls([
+            mock.call(self.adpt, 'host_uuid', include_vio=False,
+                      second_latest=True, ltm_metrics=[]),
+            mock.call(self.adpt, 'host_uuid', include_vio=False,
+                      ltm_metrics=[])])
         metric_cache = pvm_t_mon.LparMetricCache(self.adpt, 'host_uuid',
                                                  refresh_delta=.25)
         mock_stats.assert_called_with(self.adpt, 'host_uuid',
-                                      include_vio=True)
+                                      include_vio=True, ltm_metrics=[])
 
         # Make sure the current and prev are none.
         self.assertEqual(date_ret1, metric_cache.cur_date)
@@ -431,3 +534,94 @@ class TestMetricsCache(testtools.TestCase):
         prev_date, prev_metric = metric_cache.get_previous_metric('lpar_uuid')
         self.assertEqual(pre_date, prev_date)
         self.assertEqual(2, prev_metric)
+
+    @mock.patch('pypowervm.tasks.monitor.util.vm_metrics')
+    @mock.patch('pypowervm.tasks.monitor.util.latest_stats')
+    @mock.patch('pypowervm.tasks.monitor.util.ensure_ltm_monitors')
+    def test_deleted_lpar(self, mock_ensure_monitor, mock_stats,
+                          mock_vm_metrics):
+        """Metrics aren't reported for LPARs the index shows deleted."""
+        lpar_uuid = '089ffb20-5d19-4a8c-bb80-13650627d985'
+        mock_stats.return_value = (datetime.datetime.now(), mock.Mock(),
+                                   mock.Mock(), mock.Mock())
+        mock_vm_metrics.return_value = {lpar_uuid: 'metric'}
+        index = cache.GenerationIndex()
+        metric_cache = pvm_t_mon.LparMetricCache(
+            self.adpt, 'host_uuid', invalidation_index=index)
+        self.assertEqual('metric',
+                         metric_cache.get_latest_metric(lpar_uuid)[1])
+        self.assertEqual('metric',
+                         metric_cache.get_previous_metric(lpar_uuid)[1])
+        index.process_events(
+            {'/rest/api/uom/LogicalPartition/' + lpar_uuid.upper(): 'delete'})
+        self.assertIsNone(metric_cache.get_latest_metric(lpar_uuid)[1])
+        self.assertIsNone(metric_cache.get_previous_metric(lpar_uuid)[1])
+
+    @mock.patch('pypowervm.tasks.monitor.util.BACKGROUND_RETRY_INTERVAL',
+                new=0.01)
+    @mock.patch('pypowervm.tasks.monitor.util.vm_metrics')
+    @mock.patch('pypowervm.tasks.monitor.util.latest_stats')
+    @mock.patch('pypowervm.tasks.monitor.util.ensure_ltm_monitors')
+    def test_background_refresh(self, mock_ensure_monitor, mock_stats,
+                                mock_vm_metrics):
+        def feed(link):
+            return [mock.Mock(category='phyp', link=link, updated_datetime=1)]
+
+        started, fetched = threading.Event(), threading.Event()
+        # The seed, a failure, a feed with no new sample, then a new one.
+        feeds = [feed('l1'), ValueError('boom'), feed('l1'), feed('l2')]
+
+        def ltm_feed(*args):
+            if len(feeds) == 3:
+                # Hold the first background fetch until the seed is checked.
+                self.assertTrue(started.wait(10))
+            if not feeds:
+                fetched.set()
+                return feed('l2')
+            ret = feeds.pop(0)
+            if isinstance(ret, Exception):
+                raise ret
+            return ret
+        self.mock_ltm_feed.side_effect = ltm_feed
+        mock_stats.side_effect = [
+            (datetime.datetime.now(), 'l0', [], None),
+            (datetime.datetime.now(), 'l1', [], None),
+            (datetime.datetime.now(), 'l2', [], None)]
+        mock_vm_metrics.side_effect = lambda phyp, vioses, lpars: {
+            'lpar_uuid': phyp}
+
+        metric_cache = pvm_t_mon.LparMetricCache(
+            self.adpt, 'host_uuid', refresh_delta=.05,
+            background_refresh=True)
+        self.addCleanup(metric_cache.stop)
+        self.assertEqual('l1', metric_cache.get_latest_metric('lpar_uuid')[1])
+        self.assertEqual('l0',
+                         metric_cache.get_previous_metric('lpar_uuid')[1])
+
+        started.set()
+        self.assertTrue(fetched.wait(10))
+        metric_cache.stop()
+        # Only the new sample was fetched and swapped in, from its feed.
+        self.assertEqual({'lpar_uuid': 'l2'}, metric_cache.cur_metric)
+        self.assertEqual({'lpar_uuid': 'l1'}, metric_cache.prev_metric)
+        self.assertEqual(3, mock_stats.call_count)
+        mock_stats.assert_called_with(self.adpt, 'host_uuid',
+                                      include_vio=True, ltm_metrics=mock.ANY)
+        self.assertEqual('l2', mock_stats.call_args[1]['ltm_metrics'][0].link)
+
+        # Once stopped, readers refresh the cache themselves again.
+        self.mock_ltm_feed.side_effect = None
+        self.mock_ltm_feed.return_value = feed('l3')
+        mock_stats.side_effect = None
+        mock_stats.return_value = (datetime.datetime.now(), 'l3', [], None)
+        metric_cache.cur_date -= datetime.timedelta(seconds=1)
+        self.assertEqual('l3', metric_cache.get_latest_metric('lpar_uuid')[1])
+        mock_stats.assert_called_with(
+            self.adpt, 'host_uuid', include_vio=True,
+            ltm_metrics=self.mock_ltm_feed.return_value)
+        self.assertEqual('l3', metric_cache._phyp_link)
+
+    def test_background_refresh_unsupported(self):
+        """Caches without a swap lock can't be refreshed in the background."""
+        self.assertRaises(ValueError, pvm_t_mon.MetricCache, self.adpt,
+                          'host_uuid', background_refresh=True)
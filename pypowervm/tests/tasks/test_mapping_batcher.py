@@ -0,0 +1,193 @@
+# Copyright 2026 IBM Corp.
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+import testtools
+
+from pypowervm import const as c
+from pypowervm import exceptions as exc
+from pypowervm.tasks import mapping_batcher
+from pypowervm.tests.tasks import util as tju
+from pypowervm.tests import test_fixtures as fx
+from pypowervm.wrappers import storage as pvm_stor
+
+# VIO1 has five vSCSI mappings; VIO2 has 28.
+VIO1 = '3443DB77-AED1-47ED-9AA5-3DB9C6CF7089'
+VIO2 = '014C1F78-B210-40B2-A12E-C82316B878CA'
+VIO_FILES = {VIO1: 'vio_multi_vscsi_mapping.txt',
+             VIO2: 'fake_vios_mappings.txt'}
+LPAR_UUID = '42AD4FD4-DC64-4935-9E29-9B7C6F35AFCC'
+
+
+class TestMappingBatcher(testtools.TestCase):
+
+    def setUp(self):
+        super(TestMappingBatcher, self).setUp()
+        self.adpt = self.useFixture(fx.AdapterFx()).adpt
+        self.useFixture(fx.SleepFx())
+        self.adpt.read.side_effect = lambda root_type, root_id, **kwargs: (
+            tju.load_file(VIO_FILES[root_id], self.adpt))
+        # {vios_uuid: [number of scsi mappings POSTed, ...]}
+        self.updates = {VIO1: [], VIO2: []}
+
+        def update(wrapper, etag, path, **kwargs):
+            self.updates[wrapper.uuid].append(len(wrapper.scsi_mappings))
+            return wrapper.entry
+        self.adpt.update_by_path.side_effect = update
+        # Never let the window expire on its own, unless a test wants it to.
+        self.batcher = mapping_batcher.MappingBatcher(self.adpt, window=60)
+        self.addCleanup(self.batcher.flush)
+
+    @staticmethod
+    def _pop(vios_w, ret=True, err=None):
+        """Remove a vSCSI mapping and return the given value or error."""
+        if err:
+            raise err
+        if ret:
+            vios_w.scsi_mappings.remove(vios_w.scsi_mappings[-1])
+        return ret
+
+    def test_batch(self):
+        err = ValueError('bad request')
+        futs = [self.batcher.submit(VIO1, self._pop, ret='a'),
+                self.batcher.submit(VIO1, self._pop, err=err),
+                self.batcher.submit(VIO1, self._pop, ret=['b']),
+                self.batcher.submit(VIO2, self._pop, ret=None),
+                self.batcher.submit(VIO2, self._pop, ret=[])]
+        self.assertFalse(any(fut.done() for fut in futs))
+        self.batcher.flush()
+        # One GET of each VIOS, with the mapping xags
+        self.assertEqual(2, self.adpt.read.call_count)
+        for call in self.adpt.read.call_args_list:
+            self.assertEqual([c.XAG.VIO_SMAP, c.XAG.VIO_FMAP],
+                             call[1]['xag'])
+        # One POST of VIO1 with both changes; VIO2 needed no update.
+        self.assertEqual({VIO1: [3], VIO2: []}, self.updates)
+        self.assertEqual('a', futs[0].result())
+        self.assertIs(err, futs[1].exception())
+        self.assertEqual(['b'], futs[2].result())
+        self.assertIsNone(futs[3].result())
+        self.assertEqual([], futs[4].result())
+
+        # Nothing left to do
+        self.adpt.read.reset_mock()
+        self.batcher.flush()
+        self.adpt.read.assert_not_called()
+
+    def test_update_timeout(self):
+        # By default, EntryWrapper.update's default timeout applies.
+        self.batcher.submit(VIO1, self._pop)
+        self.batcher.flush()
+        self.assertEqual(
+            max(60 * 60, self.adpt.session.timeout),
+            self.adpt.update_by_path.call_args[1]['timeout'])
+        batcher = mapping_batcher.MappingBatcher(self.adpt, window=60,
+                                                 update_timeout=42)
+        batcher.submit(VIO1, self._pop)
+        batcher.flush()
+        self.assertEqual(42, self.adpt.update_by_path.call_args[1]['timeout'])
+
+    def test_cancel(self):
+        fut1 = self.batcher.submit(VIO1, self._pop)
+        fut2 = self.batcher.submit(VIO2, self._pop)
+        self.assertTrue(fut2.cancel())
+        self.batcher.flush()
+        self.assertTrue(fut1.result())
+        self.assertEqual({VIO1: [4], VIO2: []}, self.updates)
+        self.adpt.read.assert_called_once_with(
+            'VirtualIOServer', VIO1, child_type=None, child_id=None,
+            xag=[c.XAG.VIO_SMAP, c.XAG.VIO_FMAP])
+
+    def test_update_failures(self):
+        attempts = []
+        etag_err = exc.HttpError(mock.Mock(status=c.HTTPStatus.ETAG_MISMATCH))
+        http_err = exc.HttpError(mock.Mock(status=c.HTTPStatus.INTERNAL_ERROR))
+
+        def update(wrapper, etag, path, **kwargs):
+            attempts.append(wrapper.uuid)
+            # VIO1 collides once, then succeeds.  VIO2 fails outright.
+            if wrapper.uuid == VIO2:
+                raise http_err
+            if attempts.count(VIO1) == 1:
+                raise etag_err
+            return wrapper.entry
+        self.adpt.update_by_path.side_effect = update
+        self.adpt.read_by_href.side_effect = lambda href, **kwargs: (
+            tju.load_file(VIO_FILES[VIO1], self.adpt))
+
+        calls = []
+
+        def track(vios_w):
+            calls.append(vios_w.uuid)
+            return vios_w.uuid
+        fut1 = self.batcher.submit(VIO1, track)
+        fut2 = self.batcher.submit(VIO2, track)
+        self.batcher.flush()
+        self.assertEqual(VIO1, fut1.result())
+        self.assertIs(http_err, fut2.exception())
+        # The VIO1 batch was reapplied to the refreshed wrapper
+        self.assertEqual(2, calls.count(VIO1))
+        self.assertEqual(1, calls.count(VIO2))
+
+        # A failure to GET fails every request in the batch.
+        self.adpt.read.side_effect = http_err
+        futs = [self.batcher.submit(VIO1, track),
+                self.batcher.submit(VIO2, track)]
+        self.batcher.flush()
+        for fut in futs:
+            self.assertIs(http_err, fut.exception())
+
+    def test_window(self):
+        batcher = mapping_batcher.MappingBatcher(self.adpt, window=0.1)
+        start = threading.Barrier(10)
+        futs = [None] * 10
+
+        def request(idx):
+            start.wait()
+            futs[idx] = batcher.submit(VIO1 if idx % 2 else VIO2, self._pop,
+                                       ret=idx)
+        threads = [threading.Thread(target=request, args=(idx,))
+                   for idx in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(range(10)),
+                         [fut.result(timeout=10) for fut in futs])
+        # One GET and one POST per VIOS, each with all five of its changes
+        self.assertEqual(2, self.adpt.read.call_count)
+        self.assertEqual({VIO1: [0], VIO2: [24]}, self.updates)
+
+    @mock.patch('pypowervm.wrappers.virtual_io_server.VSCSIMapping.'
+                'crt_related_href')
+    def test_add_vscsi_mapping(self, mock_href):
+        mock_href.return_value = (
+            'https://9.1.2.3:12443/rest/api/uom/ManagedSystem/'
+            'c5d782c7-44e4-3086-ad15-b16fb039d63b/LogicalPartition/' +
+            LPAR_UUID)
+        pv1 = pvm_stor.PV.bld(self.adpt, 'pv1', 'pv_udid1')
+        pv2 = pvm_stor.PV.bld(self.adpt, 'pv2', 'pv_udid2')
+        fut1 = self.batcher.add_vscsi_mapping(VIO1, LPAR_UUID, pv1)
+        fut2 = self.batcher.add_vscsi_mapping(VIO1, LPAR_UUID, pv2)
+        # Duplicates the first mapping, so is a no-op
+        fut3 = self.batcher.add_vscsi_mapping(VIO1, LPAR_UUID, pv1)
+        self.batcher.flush()
+        self.assertEqual({VIO1: [7], VIO2: []}, self.updates)
+        self.assertEqual('pv1', fut1.result().backing_storage.name)
+        self.assertEqual('pv2', fut2.result().backing_storage.name)
+        self.assertIsNone(fut3.result())
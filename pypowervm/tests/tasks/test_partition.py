@@ -19,6 +19,7 @@
 import mock
 import testtools
 
+from pypowervm import cache
 import pypowervm.const as c
 import pypowervm.entities as ent
 import pypowervm.exceptions as ex
@@ -209,6 +210,21 @@ class TestVios(twrap.TestWrapper):
         self.mock_vios_get.assert_called_once_with(
             self.adpt, xag=[c.XAG.VIO_STOR])
 
+        # With an invalidation index, force_refresh only refetches on change
+        index = cache.GenerationIndex()
+        self.mock_vios_get.reset_mock()
+        tpar.get_physical_wwpns(self.adpt, invalidation_index=index)
+        self.assertEqual(1, self.mock_vios_get.call_count)
+        result = set(tpar.get_physical_wwpns(self.adpt,
+                                             invalidation_index=index))
+        self.assertSetEqual(expected, result)
+        self.assertEqual(1, self.mock_vios_get.call_count)
+        index.process_events({'/rest/api/uom/VirtualIOServer/'
+                              '3443DB77-AED1-47ED-9AA5-3DB9C6CF7089':
+                              'invalidate'})
+        tpar.get_physical_wwpns(self.adpt, invalidation_index=index)
+        self.assertEqual(2, self.mock_vios_get.call_count)
+
     @mock.patch('pypowervm.tasks.partition.get_active_vioses')
     @mock.patch('pypowervm.utils.transaction.FeedTask')
     def test_build_active_vio_feed_task(self, mock_feed_task,
@@ -14,6 +14,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import threading
+import time
+
 import fixtures
 import mock
 import testtools
@@ -23,6 +27,7 @@ from pypowervm.tasks import power
 import pypowervm.tasks.power_opts as popts
 import pypowervm.tests.test_fixtures as fx
 import pypowervm.wrappers.base_partition as pvm_bp
+import pypowervm.wrappers.entry_wrapper as ewrap
 import pypowervm.wrappers.logical_partition as pvm_lpar
 
 
@@ -521,3 +526,106 @@ class TestPower(testtools.TestCase):
                                     timeout=10)
         mock_prog_internal.assert_called_once_with(
             'part', 10, True, ibmi_immed=True)
+
+
+class TestPowerBulk(testtools.TestCase):
+    def setUp(self):
+        super(TestPowerBulk, self).setUp()
+        self.adpt = self.useFixture(fx.AdapterFx()).adpt
+
+    @staticmethod
+    def _part(uuid, host='host1'):
+        return mock.Mock(uuid=uuid, assoc_sys_uuid=host)
+
+    @mock.patch('pypowervm.tasks.power._power_off_progressive')
+    def test_pwroff_progressive_bulk(self, mock_prog):
+        parts = [self._part('u%d' % i) for i in range(5)]
+        getter = mock.Mock(spec=ewrap.EntryWrapperGetter, uuid='u5')
+        getter.get.return_value = self._part('u5')
+        bad_getter = mock.Mock(spec=ewrap.EntryWrapperGetter, uuid='u6')
+        bad_getter.get.side_effect = pexc.HttpError(mock.Mock())
+
+        def prog(part, timeout, restart, ibmi_immed=False):
+            if part.uuid == 'u2':
+                raise pexc.VMPowerOffFailure(lpar_nm='u2', reason='foo')
+            return part.uuid
+        mock_prog.side_effect = prog
+
+        results = power.power_off_progressive_bulk(
+            parts + [getter, bad_getter], restart=True, timeout=10,
+            max_workers=3)
+        self.assertEqual(6, mock_prog.call_count)
+        mock_prog.assert_any_call(parts[0], 10, True, ibmi_immed=False)
+        # In order
+        self.assertEqual(['u%d' % i for i in range(7)],
+                         [result.uuid for result in results])
+        self.assertEqual(parts + [getter.get.return_value, None],
+                         [result.part for result in results])
+        for i in (0, 1, 3, 4, 5):
+            self.assertTrue(results[i].succeeded)
+            self.assertEqual('u%d' % i, results[i].ret)
+            self.assertIsNone(results[i].error)
+            self.assertIsNotNone(results[i].start)
+            self.assertGreaterEqual(results[i].elapsed, 0)
+        # The operation failed
+        self.assertFalse(results[2].succeeded)
+        self.assertIsInstance(results[2].error, pexc.VMPowerOffFailure)
+        self.assertIsNotNone(results[2].elapsed)
+        # The fetch failed
+        self.assertFalse(results[6].succeeded)
+        self.assertIsInstance(results[6].error, pexc.HttpError)
+        self.assertIsNone(results[6].start)
+        self.assertIsNone(results[6].elapsed)
+
+        # Empty list
+        self.assertEqual([], power.power_off_progressive_bulk([]))
+
+    @mock.patch('pypowervm.tasks.power.PowerOp.start')
+    @mock.patch('pypowervm.tasks.power.PowerOp.stop')
+    def test_pwron_pwroff_bulk(self, mock_stop, mock_start):
+        parts = [self._part('u%d' % i) for i in range(3)]
+        opts = popts.PowerOnOpts()
+        results = power.power_on_bulk(parts, opts=opts, timeout=10)
+        self.assertEqual(3, mock_start.call_count)
+        mock_start.assert_any_call(parts[1], opts=opts, timeout=10)
+        self.assertTrue(all(result.succeeded for result in results))
+
+        mock_stop.side_effect = [power.LPAR_ALREADY_POWERED_OFF] * 3
+        results = power.power_off_bulk(parts)
+        self.assertEqual(3, mock_stop.call_count)
+        mock_stop.assert_any_call(parts[2], opts=None, timeout=1800)
+        self.assertEqual([power.LPAR_ALREADY_POWERED_OFF] * 3,
+                         [result.ret for result in results])
+
+    @mock.patch('pypowervm.tasks.power._power_off_progressive')
+    def test_bulk_limits(self, mock_prog):
+        """Neither max_workers nor max_per_host is exceeded."""
+        lock = threading.Lock()
+        running = collections.Counter()
+        peak = collections.Counter()
+
+        def prog(part, timeout, restart, ibmi_immed=False):
+            with lock:
+                running[part.assoc_sys_uuid] += 1
+                running['all'] += 1
+                for key in (part.assoc_sys_uuid, 'all'):
+                    peak[key] = max(peak[key], running[key])
+            time.sleep(0.01)
+            with lock:
+                running[part.assoc_sys_uuid] -= 1
+                running['all'] -= 1
+        mock_prog.side_effect = prog
+
+        parts = ([self._part('a%d' % i, host='host1') for i in range(12)] +
+                 [self._part('b%d' % i, host='host2') for i in range(12)])
+        results = power.power_off_progressive_bulk(parts, max_workers=6,
+                                                   max_per_host=2)
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(24, mock_prog.call_count)
+        self.assertEqual(2, peak['host1'])
+        self.assertEqual(2, peak['host2'])
+        self.assertLessEqual(peak['all'], 4)
+
+        peak.clear()
+        power.power_off_progressive_bulk(parts, max_workers=5)
+        self.assertEqual(5, peak['all'])
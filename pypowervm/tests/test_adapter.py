@@ -20,6 +20,7 @@ import fixtures
 from lxml import etree
 import six
 import subunit
+import threading
 
 
 import mock
@@ -28,6 +29,7 @@ import requests.structures as req_struct
 import testtools
 
 import pypowervm.adapter as adp
+from pypowervm import cache
 import pypowervm.const as c
 import pypowervm.entities as ent
 import pypowervm.exceptions as pvmex
@@ -102,6 +104,9 @@ class TestAdapter(testtools.TestCase):
             # Mock out the logoff, which gets called when the session
             # goes out of scope during tearDown()
             self.sess._logoff = mock.Mock()
+            # Discard the connection pool created (under this mock) by the
+            # logon, so each test's requests.Session mock is picked up.
+            self.sess._close_http_sessions()
 
     def tearDown(self):
         """Tear down the Session instance."""
@@ -226,9 +231,132 @@ class TestAdapter(testtools.TestCase):
         adp.Adapter()
         mock_sess.assert_called_with()
 
-    def test_no_cache(self):
-        self.assertRaises(pvmex.CacheNotSupportedException,
-                          adp.Adapter, use_cache=True)
+    def test_use_cache(self):
+        """Adapter(use_cache=True) revalidates and serves cached Responses."""
+        sess = mock.Mock()
+        adapter = adp.Adapter(sess, use_cache=True)
+        self.assertIsInstance(adapter.cache, cache.ResponseCache)
+        # Subscribed for event-based invalidation
+        sess.get_event_listener.return_value.subscribe.assert_called_once_with(
+            mock.ANY)
+        self.assertIsNone(adp.Adapter(sess).cache)
+
+        body = pvmhttp.PVMFile('fake_vios.txt').body
+        path = ('/rest/api/uom/VirtualIOServer/'
+                '3443DB77-AED1-47ED-9AA5-3DB9C6CF7089?group=None')
+
+        def resp(status, etag=None):
+            headers = {'etag': etag} if etag else {}
+            return adp.Response(
+                'GET', path, status, 'reason', headers,
+                reqheaders={'Accept': 'application/atom+xml'},
+                body=body if status == 200 else '')
+
+        with mock.patch.object(adapter, '_read_by_path') as mock_rbp:
+            # First read populates the cache
+            mock_rbp.return_value = resp(200, etag='1')
+            resp1 = adapter.read_by_path(path)
+            mock_rbp.assert_called_once_with(path, None, -1, None, False,
+                                             helpers=None)
+            self.assertEqual(1, len(adapter.cache))
+            # Second read revalidates with the cached etag; 304 => cached copy
+            mock_rbp.reset_mock()
+            mock_rbp.return_value = resp(c.HTTPStatus.NO_CHANGE)
+            resp2 = adapter.read_by_path(path)
+            mock_rbp.assert_called_once_with(path, '1', -1, None, False,
+                                             helpers=None)
+            self.assertEqual(200, resp2.status)
+            self.assertIs(adapter, resp2.adapter)
+            self.assertIsNot(resp1.entry, resp2.entry)
+            self.assertEqual(resp1.entry.uuid, resp2.entry.uuid)
+            # Within age, no REST call at all
+            mock_rbp.reset_mock()
+            resp3 = adapter.read_by_path(path, age=60)
+            mock_rbp.assert_not_called()
+            self.assertEqual(resp1.entry.uuid, resp3.entry.uuid)
+            # Caller-specified etag bypasses the cache, and 304 is returned
+            mock_rbp.return_value = resp(c.HTTPStatus.NO_CHANGE)
+            resp4 = adapter.read_by_path(path, etag='1')
+            self.assertEqual(c.HTTPStatus.NO_CHANGE, resp4.status)
+            # Writes through the Adapter invalidate
+            with mock.patch.object(adapter, '_request'):
+                adapter.delete_by_path(path)
+            self.assertEqual(0, len(adapter.cache))
+
+    def test_coalesce_reads(self):
+        """Concurrent identical GETs share one request."""
+        sess = mock.Mock()
+        adapter = adp.Adapter(sess, coalesce_reads=True)
+        body = pvmhttp.PVMFile('fake_vios.txt').body
+        path = ('/rest/api/uom/VirtualIOServer/'
+                '3443DB77-AED1-47ED-9AA5-3DB9C6CF7089?group=None')
+        release = threading.Event()
+
+        def request(*args, **kwargs):
+            release.wait(10)
+            resp = adp.Response(
+                'GET', path, 200, 'reason', {'etag': '1'},
+                reqheaders={'Accept': 'application/atom+xml'}, body=body)
+            # As _request does
+            resp.adapter = adapter
+            return resp
+
+        def release_when_joined(count):
+            while not adapter._inflight._flights or list(
+                    adapter._inflight._flights.values())[0].followers < count:
+                release.wait(0.01)
+            release.set()
+        results = []
+
+        def read(**kwargs):
+            results.append(adapter.read_by_path(path, **kwargs))
+
+        with mock.patch.object(adapter, '_request') as mock_req:
+            mock_req.side_effect = request
+            threads = [threading.Thread(target=read) for _i in range(3)]
+            threads.append(threading.Thread(target=release_when_joined,
+                                            args=(2,)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+            self.assertEqual(1, mock_req.call_count)
+            self.assertEqual(3, len(results))
+            # Independent copies, with the Adapter attached
+            self.assertEqual(3, len({id(resp.entry) for resp in results}))
+            for resp in results:
+                self.assertIs(adapter, resp.adapter)
+                self.assertEqual(results[0].entry.uuid, resp.entry.uuid)
+
+            # Sensitive reads are not coalesced
+            mock_req.reset_mock()
+            release.clear()
+            threads = [threading.Thread(target=read,
+                                        kwargs={'sensitive': True})
+                       for _i in range(2)]
+            for thread in threads:
+                thread.start()
+            release.set()
+            for thread in threads:
+                thread.join(10)
+            self.assertEqual(2, mock_req.call_count)
+
+            # Writes stop GETs from joining those in progress
+            release.clear()
+            mock_req.reset_mock()
+            reader = threading.Thread(target=read)
+            reader.start()
+            while not adapter._inflight._flights:
+                release.wait(0.01)
+            mock_req.side_effect = None
+            adapter.delete_by_path(path)
+            self.assertEqual(0, len(adapter._inflight))
+            mock_req.side_effect = request
+            release.set()
+            reader.join(10)
+
+        # Not coalescing at all (the default)
+        self.assertIsNone(adp.Adapter(sess)._inflight)
 
     @mock.patch('requests.Session')
     def test_read(self, mock_session):
@@ -261,6 +389,55 @@ class TestAdapter(testtools.TestCase):
         self.assertEqual(200, ret_read_value.status)
         self.assertEqual(reqpath, ret_read_value.reqpath)
 
+    @mock.patch('requests.Session')
+    def test_read_stream(self, mock_session):
+        """Streamed read parses feed entries as they are consumed."""
+        adapter = adp.Adapter(self.sess)
+        body = pvmhttp.PVMFile('fake_lpar_feed.txt').body.encode('utf-8')
+        read_response = self._mk_response(200, body)
+        read_response._content_consumed = True
+        read_response.close = mock.Mock()
+        mock_session.return_value.request.return_value = read_response
+        expected = ent.Feed.unmarshal_atom_feed(etree.fromstring(body),
+                                                mock.Mock())
+
+        resp = adapter.read('LogicalPartition', stream=True)
+        self.assertEqual('', resp.body)
+        mock_session.return_value.request.assert_called_once_with(
+            'GET', mock.ANY, stream=True, headers=mock.ANY, timeout=mock.ANY)
+        # Feed properties are available before any entry is consumed
+        self.assertEqual(expected.properties['id'], resp.feed.uuid)
+        self.assertEqual(expected.self_link, resp.feed.self_link)
+        read_response.close.assert_not_called()
+        entries = list(resp.feed.entries)
+        self.assertEqual([e.uuid for e in expected.entries],
+                         [e.uuid for e in entries])
+        self.assertEqual(expected.entries[0].element, entries[0].element)
+        self.assertIs(adapter, entries[0].adapter)
+        # Exhausting the stream released the connection
+        read_response.close.assert_called_once_with()
+        # One shot
+        self.assertEqual([], list(resp.feed.entries))
+
+        # A truncated feed is an AtomError (once the stream runs out)
+        read_response = self._mk_response(200, body[:len(body) // 2])
+        read_response._content_consumed = True
+        mock_session.return_value.request.return_value = read_response
+        resp = adapter.read('LogicalPartition', stream=True)
+        self.assertRaises(pvmex.AtomError, list, resp.feed.entries)
+
+        # A single entry is unmarshalled normally
+        body = pvmhttp.PVMFile('fake_vios.txt').body.encode('utf-8')
+        read_response = self._mk_response(200, body)
+        read_response._content_consumed = True
+        mock_session.return_value.request.return_value = read_response
+        resp = adapter.read('VirtualIOServer', root_id='uuid', stream=True)
+        self.assertIsNone(resp.feed)
+        expected = ent.Entry.unmarshal_atom_entry(etree.fromstring(body),
+                                                  mock.Mock())
+        self.assertEqual(expected.uuid, resp.entry.uuid)
+        self.assertEqual(expected.element, resp.entry.element)
+
     @mock.patch('pypowervm.adapter.Adapter._validate')
     @mock.patch('pypowervm.adapter.Adapter.build_path')
     @mock.patch('pypowervm.adapter.Adapter.read_by_path')
@@ -276,7 +453,7 @@ class TestAdapter(testtools.TestCase):
             add_qp=None, topology=None)
         mock_rbp.assert_called_once_with(
             mock_bld.return_value, None, timeout=-1, auditmemento=None, age=-1,
-            sensitive=False, helpers=None)
+            sensitive=False, helpers=None, stream=False)
         # Specified kwargs
         mock_val.reset_mock()
         mock_bld.reset_mock()
@@ -287,7 +464,7 @@ class TestAdapter(testtools.TestCase):
             suffix_parm='suffix_parm', detail='detail', service='service',
             etag='etag', timeout='timeout', auditmemento='auditmemento',
             age='age', xag='xag', sensitive='sensitive', helpers='helpers',
-            add_qp='add_qp', topology='topology'))
+            add_qp='add_qp', topology='topology', stream='stream'))
         mock_val.assert_called_once_with(
             'read', 'root_type', 'root_id', 'child_type', 'child_id',
             'suffix_type', 'suffix_parm', 'detail')
@@ -298,7 +475,7 @@ class TestAdapter(testtools.TestCase):
         mock_rbp.assert_called_once_with(
             mock_bld.return_value, 'etag', timeout='timeout',
             auditmemento='auditmemento', age='age', sensitive='sensitive',
-            helpers='helpers')
+            helpers='helpers', stream='stream')
 
     @mock.patch('pypowervm.adapter.Adapter.extend_path')
     def test_build_path(self, mock_exp):
@@ -844,6 +1021,87 @@ class TestAdapter(testtools.TestCase):
         mock_unm_feed.assert_not_called()
         mock_unm_ent.assert_not_called()
 
+    def test_lazy_feed(self):
+        """Feed entries are unmarshalled on first access."""
+        resp = pvmhttp.load_pvm_resp('fake_lpar_feed.txt').get_response()
+        entries = resp.feed.entries
+        self.assertIsInstance(entries, ent.LazyEntryList)
+        self.assertIsInstance(entries, list)
+
+        def n_unmarshalled():
+            return len([i for i in entries._items if isinstance(i, ent.Entry)])
+
+        self.assertEqual(17, len(entries))
+        self.assertEqual(0, n_unmarshalled())
+        # Index lookups by UUID (any case) and SELF link
+        uuid = '0C8BC782-E312-40F7-ACAD-81EB3B9FB06D'
+        entry = resp.feed.entry_by_uuid(uuid.lower())
+        self.assertEqual(uuid, entry.uuid)
+        self.assertIs(entry, resp.feed.entry_by_href(entry.self_link))
+        self.assertIsNone(resp.feed.entry_by_uuid('1234'))
+        self.assertIsNone(resp.feed.entry_by_href('1234'))
+        self.assertEqual(1, n_unmarshalled())
+        # Same Entry on subsequent access
+        self.assertIs(entry, entries[entries.index(entry)])
+        self.assertEqual(2, n_unmarshalled())
+        self.assertIn(entry, list(entries))
+        self.assertEqual(17, n_unmarshalled())
+        # Modifications are reflected in the index
+        del entries[entries.index(entry)]
+        self.assertIsNone(resp.feed.entry_by_uuid(uuid))
+        entries.append(entry)
+        self.assertIs(entry, resp.feed.entry_by_uuid(uuid))
+        # Deep copy doesn't unmarshal either
+        feed2 = copy.deepcopy(
+            pvmhttp.load_pvm_resp('fake_lpar_feed.txt').get_response().feed)
+        self.assertEqual(0, len([i for i in feed2.entries._items
+                                 if isinstance(i, ent.Entry)]))
+        self.assertEqual([e.uuid for e in entries[:-1]],
+                         [e.uuid for e in feed2.entries if e.uuid != uuid])
+        # Plain-list feeds work the same way
+        feed3 = ent.Feed({}, list(entries))
+        self.assertIs(entry, feed3.entry_by_uuid(uuid))
+        self.assertIs(entry, feed3.entry_by_href(entry.self_link))
+        self.assertIsNone(feed3.entry_by_uuid('1234'))
+        # List operations implemented in C see the Entries, too.
+        self.assertEqual(list(entries), entries + [])
+        self.assertEqual(list(entries), sorted(entries, key=lambda e: 0))
+        self.assertEqual(tuple(entries), tuple(copy.copy(entries)))
+
+    def test_lazy_feed_concurrent(self):
+        """Threads sharing a feed get the same Entries, each made once."""
+        resp = pvmhttp.load_pvm_resp('fake_lpar_feed.txt').get_response()
+        entries = resp.feed.entries
+        uuids = [entries._index_keys(item)[0] for item in entries._items]
+        results = []
+        start = threading.Event()
+
+        def read(reverse):
+            start.wait(10)
+            # Half look the Entries up by UUID, in the opposite order.
+            if reverse:
+                found = [resp.feed.entry_by_uuid(uuid)
+                         for uuid in reversed(uuids)]
+                results.append(list(reversed(found)))
+            else:
+                results.append(list(entries))
+        orig_unmarshal = ent.Entry.unmarshal_atom_elem
+        with mock.patch.object(ent.Entry, 'unmarshal_atom_elem',
+                               side_effect=orig_unmarshal) as mock_unm:
+            threads = [threading.Thread(target=read, args=(i % 2,))
+                       for i in range(8)]
+            for thread in threads:
+                thread.start()
+            start.set()
+            for thread in threads:
+                thread.join(10)
+        self.assertEqual(len(uuids), mock_unm.call_count)
+        self.assertEqual(8, len(results))
+        for result in results:
+            self.assertEqual(len(uuids), len(result))
+            for entry, first in zip(result, results[0]):
+                self.assertIs(first, entry)
+
     @mock.patch('pypowervm.adapter.Adapter.read')
     def test_sys_uuid(self, mock_read):
 
@@ -906,6 +1164,35 @@ class TestElement(testtools.TestCase):
         el.namespace = 'foo'
         self.assertEqual(el.namespace, 'foo')
 
+    def test_wrapelement(self):
+        elem = etree.Element('tag')
+        with mock.patch('lxml.etree.Element') as mock_elem:
+            el = ent.Element.wrapelement(elem, self.adpt)
+            # No throwaway etree.Element was created
+            mock_elem.assert_not_called()
+        self.assertIs(elem, el.element)
+        self.assertIs(self.adpt, el.adapter)
+        self.assertIsNone(ent.Element.wrapelement(None, self.adpt))
+        # Slotted; no per-instance __dict__
+        self.assertFalse(hasattr(el, '__dict__'))
+        self.assertFalse(hasattr(ent.Entry({}, elem, self.adpt), '__dict__'))
+        self.assertFalse(hasattr(ent.Feed({}, []), '__dict__'))
+
+    def test_qualifypath(self):
+        self.assertEqual('a/b', ent.Element._qualifypath('a/b', ''))
+        self.assertEqual(
+            '{ns}a/./*/{other}e//{ns}f',
+            ent.Element._qualifypath('a/./*/{other}e//f', 'ns'))
+        # Memoized per (path, namespace)
+        ent._qualifypath.cache_clear()
+        for _ in range(3):
+            ent.Element._qualifypath('a/b', 'ns')
+        ent.Element._qualifypath('a/b', 'ns2')
+        info = ent._qualifypath.cache_info()
+        self.assertEqual((2, 2), (info.hits, info.misses))
+        # Invalid tag names are still rejected
+        self.assertRaises(ValueError, ent.Element._qualifypath, 'a b', 'ns')
+
 
 class TestAdapterClasses(subunit.IsolatedTestCase, testtools.TestCase):
     def setUp(self):
@@ -0,0 +1,309 @@
+# Copyright 2026 IBM Corp.
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+import testtools
+
+import pypowervm.adapter as adp
+from pypowervm import cache
+import pypowervm.exceptions as pvmex
+
+MS = '/rest/api/uom/ManagedSystem/c5d782c7-44e4-3086-ad15-b16fb039d63b'
+LPAR_UUID = '089ffb20-5d19-4a8c-bb80-13650627d985'
+LPAR = '/rest/api/uom/LogicalPartition/' + LPAR_UUID
+VIOS = '/rest/api/uom/VirtualIOServer/3443DB77-AED1-47ED-9AA5-3DB9C6CF7089'
+
+
+def _resp(path, etag='etag', body='<body/>'):
+    resp = adp.Response('GET', path, 200, 'OK', {'etag': etag}, body=body)
+    resp.entry = mock.Mock()
+    return resp
+
+
+class TestResponseCache(testtools.TestCase):
+    """Unit tests for pypowervm.cache.ResponseCache."""
+
+    @mock.patch('time.time')
+    def test_get_put(self, mock_time):
+        mock_time.return_value = 100
+        rcache = cache.ResponseCache()
+        self.assertEqual((None, None), rcache.get(LPAR))
+        orig = _resp(LPAR)
+        orig.adapter = 'adapter'
+        rcache.put(LPAR + '?group=None', orig)
+        # Different xag is a different key
+        self.assertEqual((None, None), rcache.get(LPAR))
+        # Default age => must revalidate
+        self.assertEqual((None, 'etag'), rcache.get(LPAR + '?group=None'))
+        # Within age => copy returned
+        mock_time.return_value = 110
+        resp, etag = rcache.get(LPAR + '?group=None', age=10)
+        self.assertEqual('etag', etag)
+        self.assertIsNot(orig, resp)
+        self.assertEqual(orig.body, resp.body)
+        self.assertIsNone(resp.adapter)
+        # Too old
+        mock_time.return_value = 111
+        self.assertEqual((None, 'etag'),
+                         rcache.get(LPAR + '?group=None', age=10))
+        # Revalidation resets the age...
+        self.assertIsNotNone(rcache.revalidated(LPAR + '?group=None', 'etag'))
+        self.assertIsNotNone(rcache.get(LPAR + '?group=None', age=10)[0])
+        # ...but only for the etag in the cache
+        self.assertIsNone(rcache.revalidated(LPAR + '?group=None', 'other'))
+        self.assertIsNone(rcache.revalidated(VIOS, 'etag'))
+
+    def test_eviction(self):
+        rcache = cache.ResponseCache(max_entries=2, max_bytes=20)
+        rcache.put(LPAR, _resp(LPAR, body='1234567890'))
+        rcache.put(VIOS, _resp(VIOS, body='1234567890'))
+        self.assertEqual(2, len(rcache))
+        # Touch LPAR so VIOS is least recently used
+        rcache.get(LPAR)
+        rcache.put(MS, _resp(MS, body='1'))
+        self.assertEqual(2, len(rcache))
+        self.assertEqual((None, None), rcache.get(VIOS))
+        self.assertEqual((None, 'etag'), rcache.get(LPAR))
+        # Size bound
+        rcache.put(VIOS, _resp(VIOS, body='123456789012345'))
+        self.assertEqual(1, len(rcache))
+        self.assertEqual((None, 'etag'), rcache.get(VIOS))
+        # Too big to cache at all
+        rcache.put(VIOS, _resp(VIOS, body='x' * 21))
+        self.assertEqual(0, len(rcache))
+
+    def test_invalidate(self):
+        rcache = cache.ResponseCache()
+        paths = [
+            LPAR, LPAR + '?group=None', LPAR + '/quick/PartitionState',
+            '/rest/api/uom/LogicalPartition?group=None',
+            MS + '/LogicalPartition',
+            MS + '/LogicalPartition/' + LPAR_UUID.upper(),
+            VIOS, '/rest/api/uom/VirtualIOServer', MS]
+        for path in paths:
+            rcache.put(path, _resp(path))
+        # Event hrefs are full URIs
+        rcache.invalidate('https://host:12443' + MS + '/LogicalPartition/' +
+                          LPAR_UUID)
+        self.assertEqual(3, len(rcache))
+        for path in (VIOS, '/rest/api/uom/VirtualIOServer', MS):
+            self.assertEqual('etag', rcache.get(path)[1])
+        # Paths without a UUID invalidate exactly that path, any query.
+        feed = '/rest/api/uom/VirtualIOServer'
+        rcache.put(feed + '?group=None', _resp(feed))
+        rcache.invalidate(feed)
+        self.assertEqual(2, len(rcache))
+        self.assertEqual('etag', rcache.get(VIOS)[1])
+        # Jobs against an object invalidate it
+        rcache.invalidate(VIOS + '/do/Foo')
+        self.assertEqual(1, len(rcache))
+        rcache.invalidate_path(MS)
+        self.assertEqual(0, len(rcache))
+
+    def test_process_events(self):
+        rcache = cache.ResponseCache()
+        for path in (LPAR, VIOS, MS):
+            rcache.put(path, _resp(path))
+        rcache.process_events({'https://host:12443' + LPAR: 'invalidate'})
+        self.assertEqual(2, len(rcache))
+        rcache.process_events({'https://host:12443' + VIOS: 'delete',
+                               'general': 'invalidate'})
+        self.assertEqual(0, len(rcache))
+
+    def test_event_handler(self):
+        rcache = cache.ResponseCache()
+        rcache.put(LPAR, _resp(LPAR))
+        handler = adp._CacheEventHandler(rcache)
+        handler.process({LPAR: 'invalidate'})
+        self.assertEqual(0, len(rcache))
+        # Handler doesn't keep the cache alive
+        rcache = None
+        handler.process({LPAR: 'invalidate'})
+
+    def test_is_cacheable(self):
+        resp = _resp(LPAR)
+        self.assertTrue(cache.is_cacheable(resp))
+        resp.entry = None
+        self.assertFalse(cache.is_cacheable(resp))
+        resp.feed = mock.Mock()
+        self.assertTrue(cache.is_cacheable(resp))
+        resp.status = 304
+        self.assertFalse(cache.is_cacheable(resp))
+        self.assertFalse(cache.is_cacheable(None))
+
+
+class TestGenerationIndex(testtools.TestCase):
+    """Unit tests for pypowervm.cache.GenerationIndex."""
+
+    def test_tokens(self):
+        index = cache.GenerationIndex()
+        lpar_tok = index.token(uuid=LPAR_UUID.upper())
+        feed_tok = index.token(schema_type='LogicalPartition')
+        vios_tok = index.href_token(VIOS)
+        vfeed_tok = index.href_token('/rest/api/uom/VirtualIOServer')
+        self.assertIsNone(index.last_action(LPAR_UUID))
+
+        # Change to a CHILD LPAR URI
+        index.process_events({'https://host:12443' + MS +
+                              '/LogicalPartition/' + LPAR_UUID: 'invalidate'})
+        self.assertNotEqual(lpar_tok, index.token(uuid=LPAR_UUID))
+        self.assertNotEqual(lpar_tok, index.href_token(LPAR + '?group=None'))
+        self.assertNotEqual(feed_tok,
+                            index.token(schema_type='LogicalPartition'))
+        self.assertEqual(vios_tok, index.href_token(VIOS))
+        self.assertEqual(vfeed_tok,
+                         index.href_token('/rest/api/uom/VirtualIOServer'))
+        self.assertEqual('invalidate', index.last_action(LPAR_UUID.upper()))
+
+        # Tokens are stable absent events
+        lpar_tok = index.token(uuid=LPAR_UUID)
+        self.assertEqual(lpar_tok, index.token(uuid=LPAR_UUID))
+        index.process_events({LPAR: 'delete'})
+        self.assertEqual('delete', index.last_action(LPAR_UUID))
+
+        # General invalidation changes every token
+        index.process_events({'general': 'invalidate'})
+        self.assertNotEqual(vios_tok, index.href_token(VIOS))
+        self.assertNotEqual(vfeed_tok,
+                            index.href_token('/rest/api/uom/VirtualIOServer'))
+
+
+class TestSingleFlight(testtools.TestCase):
+    """Unit tests for pypowervm.cache.SingleFlight."""
+
+    def _fly(self, sflight, key, func, count):
+        """Run sflight.do(key, func) in count threads; return results/errors.
+
+        func must not return before all the threads have joined the flight.
+        """
+        results = [None] * count
+
+        def run(idx):
+            try:
+                results[idx] = sflight.do(key, func)
+            except Exception as exc:
+                results[idx] = exc
+        threads = [threading.Thread(target=run, args=(idx,))
+                   for idx in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return results
+
+    def test_coalesce(self):
+        sflight = cache.SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def func():
+            calls.append(1)
+            release.wait(10)
+            return {'value': 42}
+
+        def release_when_joined():
+            # The leader plus three followers
+            while not sflight._flights or (
+                    list(sflight._flights.values())[0].followers < 3):
+                release.wait(0.01)
+            release.set()
+        releaser = threading.Thread(target=release_when_joined)
+        releaser.start()
+        results = self._fly(sflight, 'key', func, 4)
+        releaser.join(10)
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'value': 42}] * 4, results)
+        # Each caller has its own copy
+        self.assertEqual(4, len({id(res) for res in results}))
+        self.assertEqual(0, len(sflight))
+
+        # Exceptions are raised to all
+        release.clear()
+
+        def fail():
+            calls.append(1)
+            release.wait(10)
+            raise ValueError('boom')
+        releaser = threading.Thread(target=release_when_joined)
+        releaser.start()
+        results = self._fly(sflight, 'key', fail, 4)
+        releaser.join(10)
+        self.assertEqual(2, len(calls))
+        for res in results:
+            self.assertIsInstance(res, ValueError)
+        self.assertEqual(0, len(sflight))
+
+        # Each caller gets its own exception, with its own Response
+        release.clear()
+        resp = _resp(LPAR)
+        resp.entry = None
+
+        def fail_resp():
+            calls.append(1)
+            release.wait(10)
+            raise pvmex.HttpNotFound(resp)
+        releaser = threading.Thread(target=release_when_joined)
+        releaser.start()
+        results = self._fly(sflight, 'key', fail_resp, 4)
+        releaser.join(10)
+        self.assertEqual(3, len(calls))
+        for res in results:
+            self.assertIsInstance(res, pvmex.HttpNotFound)
+            self.assertEqual(LPAR, res.response.reqpath)
+            self.assertEqual(resp.body, res.response.body)
+        self.assertEqual(4, len({id(res) for res in results}))
+        self.assertEqual(4, len({id(res.response) for res in results}))
+        self.assertEqual(1, len([res for res in results
+                                 if res.response is resp]))
+
+    def test_copy_exception(self):
+        exc = pvmex.Error('msg', response=_resp(LPAR))
+        exc.response.entry = None
+        try:
+            raise exc
+        except pvmex.Error:
+            pass
+        cpy = cache.copy_exception(exc)
+        self.assertIsInstance(cpy, pvmex.Error)
+        self.assertEqual(exc.args, cpy.args)
+        self.assertEqual(str(exc), str(cpy))
+        self.assertIsNot(exc.response, cpy.response)
+        self.assertEqual(LPAR, cpy.response.reqpath)
+
+    def test_keys_and_seal(self):
+        sflight = cache.SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(10)
+            return 'slow'
+        leader = threading.Thread(target=sflight.do, args=('key', slow))
+        leader.start()
+        started.wait(10)
+        self.assertEqual(1, len(sflight))
+        # A different key doesn't wait
+        self.assertEqual('other', sflight.do('other', lambda: 'other'))
+        # Once sealed, the same key doesn't join the call in progress
+        sflight.seal()
+        self.assertEqual(0, len(sflight))
+        self.assertEqual('fresh', sflight.do('key', lambda: 'fresh'))
+        release.set()
+        leader.join(10)
+        self.assertEqual(0, len(sflight))
@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import functools
 import unittest
 
@@ -83,6 +84,51 @@ class TestHelpers(unittest.TestCase):
         self.assertEqual('countdown:1',
                          adpt._request('method', 'path', helpers=[hlp1]))
 
+    @mock.patch('pypowervm.adapter.Session')
+    def test_stack_reuse(self, mock_sess):
+        """The Adapter's helpers are stacked once, not per request."""
+        stacked = []
+
+        def counting_helper(func, string):
+            stacked.append(string)
+            return cat_string_helper(func, string)
+        hlp1 = functools.partial(counting_helper, string="1")
+        hlp2 = functools.partial(counting_helper, string="2")
+        mock_sess.request.return_value = 'countdown:'
+        adpt = adp.Adapter(mock_sess, helpers=[hlp1, hlp2])
+        for _i in range(5):
+            self.assertEqual('countdown:21', adpt._request('method', 'path'))
+        self.assertEqual(['2', '1'], stacked)
+
+        # Request helpers are stacked per request, leaving ours alone
+        self.assertEqual('countdown:2',
+                         adpt._request('method', 'path', helpers=hlp2))
+        self.assertEqual('countdown:21', adpt._request('method', 'path'))
+        self.assertEqual(['2', '1', '2'], stacked)
+
+        # Replacing the helpers rebuilds the stack
+        adpt.helpers = [hlp2, hlp1]
+        self.assertEqual([hlp2, hlp1], adpt.helpers)
+        self.assertEqual('countdown:12', adpt._request('method', 'path'))
+        self.assertEqual('countdown:12', adpt._request('method', 'path'))
+        self.assertEqual(['2', '1', '2', '1', '2'], stacked)
+        adpt.helpers = None
+        self.assertEqual('countdown:', adpt._request('method', 'path'))
+
+        # Replacing the Session doesn't require a rebuild
+        adpt.helpers = hlp1
+        self.assertEqual('countdown:1', adpt._request('method', 'path'))
+        adpt.session = mock.Mock()
+        adpt.session.request.return_value = 'new:'
+        self.assertEqual('new:1', adpt._request('method', 'path'))
+        self.assertEqual(['2', '1', '2', '1', '2', '1'], stacked)
+
+        # A copy uses its own Session
+        adpt2 = copy.copy(adpt)
+        adpt2.session = mock_sess
+        self.assertEqual('countdown:1', adpt2._request('method', 'path'))
+        self.assertEqual('new:1', adpt._request('method', 'path'))
+
     @mock.patch('pypowervm.adapter.Session')
     def test_invalid_helper(self, mock_sess):
 
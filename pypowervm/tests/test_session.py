@@ -18,6 +18,7 @@ import copy
 import gc
 import mock
 import os
+import requests.exceptions as req_exc
 import requests.models as req_mod
 import requests.structures as req_struct
 import subunit
@@ -225,3 +226,114 @@ class TestSession(subunit.IsolatedTestCase, testtools.TestCase):
         # validate_certificate should not have been called again
         self.assertEqual(1, mock_validate_cert.call_count)
         self.assertEqual('PVM', result.mc_type)
+
+    @mock.patch('time.time')
+    @mock.patch('requests.Session')
+    @mock.patch.object(adp.Session, '_logon', new=mock.Mock())
+    def test_connection_pool(self, mock_rsess, mock_time):
+        """Pooled requests.Session reuse, eviction, and cleanup."""
+        mock_time.return_value = 1000
+        resp = mock.Mock(status_code=204)
+        mock_rsess.return_value.request.return_value = resp
+
+        sess = adp.Session(pool_maxsize=4, pool_idle_timeout=60)
+        sess._sessToken = 'token'
+        sess._logged_in = False
+
+        # Repeated requests share one requests.Session, which is not closed.
+        sess.request('GET', '/rest/api/uom/ManagedSystem')
+        sess.request('GET', '/rest/api/uom/ManagedSystem')
+        self.assertEqual(1, mock_rsess.call_count)
+        self.assertEqual(2, mock_rsess.return_value.request.call_count)
+        mock_rsess.return_value.close.assert_not_called()
+        # The pool is sized per the constructor
+        mock_rsess.return_value.mount.assert_called_with('https://', mock.ANY)
+        pool = mock_rsess.return_value.mount.call_args[0][1]
+        self.assertEqual(4, pool._pool_maxsize)
+
+        # A different 'verify' setting gets its own pool
+        sess.request('GET', '/rest/api/uom/ManagedSystem', verify=True)
+        self.assertEqual(2, mock_rsess.call_count)
+        self.assertEqual(2, len(sess._http_sessions))
+
+        # Idle pools are evicted and replaced
+        mock_time.return_value = 1061
+        sess.request('GET', '/rest/api/uom/ManagedSystem')
+        self.assertEqual(3, mock_rsess.call_count)
+        mock_rsess.return_value.close.assert_called_once_with()
+
+        # A connection error evicts the pool
+        mock_rsess.reset_mock()
+        mock_rsess.return_value.request.side_effect = (
+            req_exc.ConnectionError)
+        self.assertRaises(pvmex.ConnectionError, sess.request, 'GET',
+                          '/rest/api/uom/ManagedSystem')
+        mock_rsess.return_value.close.assert_called_once_with()
+        self.assertEqual(1, len(sess._http_sessions))
+
+        # Deleting the Session closes remaining pools
+        mock_rsess.reset_mock()
+        sess = None
+        gc.collect()
+        mock_rsess.return_value.close.assert_called_once_with()
+
+    @mock.patch.object(adp.Session, '_new_http_session')
+    @mock.patch.object(adp.Session, '_logon', new=mock.Mock())
+    def test_connection_pool_evict_in_use(self, mock_new):
+        """A pool evicted while in use is closed after its last request."""
+        mock_new.side_effect = lambda: mock.Mock()
+        sess = adp.Session()
+        old = sess._get_http_session(False)
+        self.assertIs(old, sess._get_http_session(False))
+        # One request gets a connection error; the other is still running.
+        sess._release_http_session(old, False, evict=True)
+        old.close.assert_not_called()
+        self.assertEqual({}, sess._http_sessions)
+        # New requests get a new pool.
+        new = sess._get_http_session(False)
+        self.assertIsNot(old, new)
+        # The old pool is closed once its last request is done.
+        sess._release_http_session(old, False)
+        old.close.assert_called_once_with()
+        self.assertEqual({}, sess._draining_http_sessions)
+        sess._release_http_session(new, False)
+        new.close.assert_not_called()
+
+        # Closing the Session closes pools still draining.
+        pool = sess._get_http_session(False)
+        sess._get_http_session(False)
+        sess._release_http_session(pool, False, evict=True)
+        sess._close_http_sessions()
+        pool.close.assert_called_once_with()
+        sess._release_http_session(pool, False)
+        pool.close.assert_called_once_with()
+
+    @mock.patch('requests.Session')
+    @mock.patch.object(adp.Session, '_logon', new=mock.Mock())
+    def test_no_keepalive(self, mock_rsess):
+        """With keepalive=False, each request uses its own requests.Session."""
+        mock_rsess.return_value.request.return_value = mock.Mock(
+            status_code=204)
+        sess = adp.Session(keepalive=False)
+        sess._sessToken = 'token'
+        sess.request('GET', '/rest/api/uom/ManagedSystem')
+        sess.request('GET', '/rest/api/uom/ManagedSystem')
+        self.assertEqual(2, mock_rsess.call_count)
+        self.assertEqual(2, mock_rsess.return_value.close.call_count)
+        self.assertEqual({}, sess._http_sessions)
+
+    @mock.patch.object(adp.Session, '_logon', new=mock.Mock())
+    @mock.patch.object(adp.Session, 'get_event_listener')
+    def test_get_invalidation_index(self, mock_get_evl):
+        sess = adp.Session()
+        index = sess.get_invalidation_index()
+        mock_subscribe = mock_get_evl.return_value.subscribe
+        mock_subscribe.assert_called_once_with(mock.ANY)
+        # Same index, subscribed only once
+        self.assertIs(index, sess.get_invalidation_index())
+        mock_subscribe.assert_called_once_with(mock.ANY)
+        # The subscribed handler feeds the index
+        tok = index.token(schema_type='VirtualIOServer')
+        mock_subscribe.call_args[0][0].process(
+            {'/rest/api/uom/VirtualIOServer': 'add'})
+        self.assertNotEqual(tok, index.token(schema_type='VirtualIOServer'))
@@ -16,14 +16,19 @@
 
 """Tests for pypowervm.utils.transaction."""
 
+import contextlib
 import copy
+import fixtures
 import mock
+import os
 import oslo_concurrency.lockutils as lock
 import oslo_context.context as ctx
 from taskflow import engines as tf_eng
 from taskflow import exceptions as tf_ex
+from taskflow.patterns import linear_flow as tf_lf
 from taskflow.patterns import unordered_flow as tf_uf
 from taskflow import task as tf_task
+from taskflow.types import failure as tf_fail
 import unittest
 
 import pypowervm.const as c
@@ -138,6 +143,98 @@ class TestWrapperTask(twrap.TestWrapper):
         self.assertEqual(['lock', 'update 1', 'refresh', 'update 2', 'refresh',
                           'update 3', 'unlock'], txfx.get_log())
 
+    def test_transaction_stats(self):
+        """Contention is counted per UUID."""
+        txfx = self.useFixture(fx.WrapperTaskFx(self.dwrap))
+        tx.reset_transaction_stats()
+        self.addCleanup(tx.reset_transaction_stats)
+
+        @tx.entry_transaction
+        def blacklist_this(wrapper_or_getter):
+            return self.retry_twice(wrapper_or_getter, self.tracker, txfx)
+
+        @tx.entry_transaction
+        def nested(wrapper_or_getter):
+            return blacklist_this(wrapper_or_getter)
+        nested(self.getter)
+        stats = tx.get_transaction_stats()
+        self.assertEqual({'getter_uuid', self.dwrap.uuid}, set(stats))
+        # The getter's transaction resolved the wrapper and delegated.
+        self.assertEqual(1, stats['getter_uuid']['transactions'])
+        self.assertEqual(1, stats['getter_uuid']['attempts'])
+        wstats = stats[self.dwrap.uuid]
+        self.assertEqual(1, wstats['transactions'])
+        self.assertEqual(3, wstats['attempts'])
+        self.assertEqual(2, wstats['etag_mismatches'])
+        self.assertAlmostEqual(2.0 / 3, wstats['etag_mismatch_rate'])
+        self.assertEqual(2, wstats['retries'])
+        for field in ('lock_wait', 'retry_wait'):
+            self.assertGreaterEqual(wstats[field], 0)
+
+        # Other errors are neither retried nor counted as mismatches
+        txfx.patchers['update'].mock.side_effect = ex.HttpError(
+            mock.Mock(status=c.HTTPStatus.INTERNAL_ERROR))
+
+        @tx.entry_transaction
+        def fail(wrapper_or_getter):
+            wrapper_or_getter.update()
+        self.assertRaises(ex.HttpError, fail, self.dwrap)
+        wstats = tx.get_transaction_stats()[self.dwrap.uuid]
+        self.assertEqual(2, wstats['transactions'])
+        self.assertEqual(4, wstats['attempts'])
+        self.assertEqual(2, wstats['etag_mismatches'])
+
+        tx.reset_transaction_stats()
+        self.assertEqual({}, tx.get_transaction_stats())
+
+    def test_lock_backend(self):
+        """The inter-process lock is held inside the in-process lock."""
+        txfx = self.useFixture(fx.WrapperTaskFx(self.dwrap))
+
+        @contextlib.contextmanager
+        def backend(uuid):
+            txfx.log('backend lock %s' % uuid)
+            yield
+            txfx.log('backend unlock %s' % uuid)
+        tx.set_lock_backend(backend)
+        self.addCleanup(tx.set_lock_backend, None)
+
+        @tx.entry_transaction
+        def blacklist_this(wrapper_or_getter):
+            return self.retry_twice(wrapper_or_getter, self.tracker, txfx)
+        blacklist_this(self.dwrap)
+        uuid = self.dwrap.uuid
+        self.assertEqual(['lock', 'backend lock %s' % uuid, 'update 1',
+                          'refresh', 'update 2', 'refresh', 'update 3',
+                          'backend unlock %s' % uuid, 'unlock'],
+                         txfx.get_log())
+
+    def test_file_lock_backend(self):
+        """CONF.pypowervm_entry_transaction_lock_path enables file locks."""
+        lock_path = self.useFixture(fixtures.TempDir()).path
+        lock_file = os.path.join(lock_path, 'pypowervm-' + self.dwrap.uuid)
+        locked = []
+
+        @tx.entry_transaction
+        def blacklist_this(wrapper_or_getter):
+            locked.append(os.path.exists(lock_file))
+            return wrapper_or_getter
+
+        # Not by default
+        blacklist_this(self.dwrap)
+        tx.CONF.set_override('pypowervm_entry_transaction_lock_path',
+                             lock_path)
+        self.addCleanup(tx.CONF.clear_override,
+                        'pypowervm_entry_transaction_lock_path')
+        self.assertEqual(self.dwrap, blacklist_this(self.dwrap))
+        # Same thing explicitly
+        tx.CONF.clear_override('pypowervm_entry_transaction_lock_path')
+        os.remove(lock_file)
+        tx.set_lock_backend(tx.file_lock_backend(lock_path))
+        self.addCleanup(tx.set_lock_backend, None)
+        self.assertEqual(self.dwrap, blacklist_this(self.dwrap))
+        self.assertEqual([False, True, True], locked)
+
     @mock.patch('pypowervm.utils.retry.retry')
     def test_retry_args(self, mock_retry):
         """Ensure the correct arguments are passed to @retry."""
@@ -145,10 +242,19 @@ class TestWrapperTask(twrap.TestWrapper):
         def blacklist_this(wrapper_or_getter):
             pass
         blacklist_this(mock.Mock())
-        # Stepped random delay func was invoked
         mock_retry.assert_called_once_with(
-            argmod_func=retry.refresh_wrapper, tries=60,
-            delay_func=retry.STEPPED_RANDOM_DELAY)
+            argmod_func=retry.refresh_wrapper, tries=60, test_func=mock.ANY,
+            delay_func=mock.ANY)
+        # Stepped random delay func is invoked
+        with mock.patch('pypowervm.utils.retry.STEPPED_RANDOM_DELAY') as delay:
+            mock_retry.call_args[1]['delay_func'](1, 60, 'arg')
+            delay.assert_called_once_with(1, 60, 'arg')
+        # Only etag mismatches are retried
+        test_func = mock_retry.call_args[1]['test_func']
+        self.assertTrue(test_func(ex.HttpError(mock.Mock(
+            status=c.HTTPStatus.ETAG_MISMATCH)), 1, 60))
+        self.assertFalse(test_func(ex.HttpError(mock.Mock(
+            status=c.HTTPStatus.INTERNAL_ERROR)), 1, 60))
 
     @staticmethod
     def tx_subtask_invoke(tst, wrapper):
@@ -783,6 +889,120 @@ class TestFeedTask(twrap.TestWrapper):
             'post_exec_implicit': 'verify_rets_implicit_return',
             'post_exec_explicit': 'verify_rets_explicit_return'}, ret)
 
+    def test_execute_engine_parity(self):
+        """The shared-pool and TaskFlow engine paths give the same results."""
+        self.useFixture(fx.FeedTaskFx(self.entries[:4]))
+
+        def name_and_flag(wrapper, flag):
+            return '%s_%s' % (wrapper.name, flag)
+        rets = []
+        for use_engine in (True, False):
+            ftsk = tx.FeedTask('parity', lpar.LPAR.getter(None),
+                               max_workers=2, use_engine=use_engine)
+            ftsk.add_functor_subtask(name_and_flag, 'common', provides='c')
+            # A WrapperTask with no Subtasks is left out of the results
+            ftsk.wrapper_tasks[self.entries[3].uuid]._tasks = []
+            ftsk.wrapper_tasks[self.entries[1].uuid].add_functor_subtask(
+                name_and_flag, 'one', provides='one')
+            rets.append(ftsk.execute())
+        self.assertEqual(rets[0], rets[1])
+        self.assertEqual(3, len(rets[1]['wrapper_task_rets']))
+        self.assertEqual(
+            {'wrapper': self.entries[1],
+             'c': self.entries[1].name + '_common',
+             'one': self.entries[1].name + '_one'},
+            rets[1]['wrapper_task_rets'][self.entries[1].uuid])
+
+    def test_execute_failures(self):
+        """Shared-pool path raises like the TaskFlow engine."""
+        ftfx = self.useFixture(fx.FeedTaskFx(self.entries[:3]))
+
+        def fail_on(uuids):
+            def _fail(wrapper):
+                ftfx.log(wrapper.uuid)
+                if wrapper.uuid in uuids:
+                    raise IOError("failed on %s" % wrapper.uuid)
+            return _fail
+        # One failure is raised as is
+        ftsk = tx.FeedTask('fail', lpar.LPAR.getter(None), use_engine=False)
+        ftsk.add_functor_subtask(fail_on([self.entries[1].uuid]))
+        self.assertRaises(IOError, ftsk.execute)
+        # Multiple failures are aggregated
+        ftsk = tx.FeedTask('fail', lpar.LPAR.getter(None), use_engine=False)
+        ftsk.add_functor_subtask(fail_on([wrp.uuid for wrp in self.entries]))
+        with self.assertRaises(ex.MultipleExceptionsInFeedTask) as mult_ex:
+            ftsk.execute()
+        for wrp in self.entries[:3]:
+            self.assertIn('failed on %s' % wrp.uuid, mult_ex.exception.args[0])
+        # No WrapperTasks are started once one has failed
+        ftfx.reset_log()
+        ftsk = tx.FeedTask('fail', lpar.LPAR.getter(None), max_workers=1,
+                           use_engine=False)
+        ftsk.add_functor_subtask(fail_on([self.entries[0].uuid]))
+        self.assertRaises(IOError, ftsk.execute)
+        self.assertEqual(['get', 'lock', self.entries[0].uuid, 'unlock'],
+                         ftfx.get_log())
+
+    def test_execute_revert_parity(self):
+        """The shared-pool path reverts like the TaskFlow engine."""
+        self.useFixture(fx.FeedTaskFx(self.entries[:3]))
+        bad_uuid = self.entries[1].uuid
+
+        def fail_on_bad(wrapper):
+            if wrapper.uuid == bad_uuid:
+                raise IOError("failed on %s" % wrapper.uuid)
+
+        def log_revert(wtask, result=None, flow_failures=None):
+            log.append(('revert', wtask.name,
+                        isinstance(result, tf_fail.Failure),
+                        sorted(flow_failures)))
+        logs = []
+        for use_engine in (True, False):
+            log = []
+            with mock.patch.object(tx.WrapperTask, 'revert', autospec=True,
+                                   side_effect=log_revert):
+                ftsk = tx.FeedTask('revert', lpar.LPAR.getter(None),
+                                   use_engine=use_engine)
+                ftsk.add_functor_subtask(fail_on_bad)
+                flow = tf_lf.Flow('outer')
+                flow.add(
+                    tf_task.FunctorTask(
+                        lambda: log.append(('execute', 'before')),
+                        name='before',
+                        revert=lambda **kwa: log.append(('revert', 'before'))),
+                    ftsk,
+                    tf_task.FunctorTask(
+                        lambda: log.append(('execute', 'after')),
+                        name='after'))
+                self.assertRaises(IOError, tf_eng.run, flow)
+            # The WrapperTasks run - thus revert - concurrently
+            logs.append(log[:1] + sorted(log[1:-1]) + log[-1:])
+        self.assertEqual(logs[0], logs[1])
+        bad_name = 'revert_%s' % bad_uuid
+        self.assertEqual(
+            [('execute', 'before')] +
+            sorted(('revert', 'revert_%s' % wrp.uuid, wrp.uuid == bad_uuid,
+                    [bad_name]) for wrp in self.entries[:3]) +
+            [('revert', 'before')], logs[1])
+
+    def test_execute_nested(self):
+        """A FeedTask run by a WrapperTask doesn't wait on the shared pool."""
+        self.useFixture(fx.FeedTaskFx(self.entries[:2]))
+        # With one shared thread, the inner FeedTask would wait forever if it
+        # used the shared pool.
+        self.useFixture(fixtures.MockPatchObject(
+            tx, '_FEED_EXECUTOR', tx.ContextThreadPoolExecutor(1)))
+
+        def run_inner(wrapper):
+            inner = tx.FeedTask('inner', list(self.entries[:2]),
+                                use_engine=False)
+            inner.add_functor_subtask(lambda wrp: wrp.uuid, provides='uuid')
+            return len(inner.execute()['wrapper_task_rets'])
+        ftsk = tx.FeedTask('outer', lpar.LPAR.getter(None), use_engine=False)
+        ftsk.add_functor_subtask(run_inner, provides='inner_count')
+        rets = ftsk.execute()['wrapper_task_rets']
+        self.assertEqual([2, 2], [ret['inner_count'] for ret in rets.values()])
+
     def test_subtask_thread_local(self):
         """Security context and locks, if set, propagates to WrapperTasks."""
         def verify_no_ctx(wrapper):
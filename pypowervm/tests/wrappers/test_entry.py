@@ -16,6 +16,7 @@
 
 import copy
 import re
+import threading
 import unittest
 import uuid
 
@@ -25,6 +26,7 @@ import six
 import testtools
 
 import pypowervm.adapter as apt
+from pypowervm import cache
 import pypowervm.entities as ent
 import pypowervm.tests.test_fixtures as fx
 from pypowervm.tests.test_utils import pvmhttp
@@ -260,6 +262,38 @@ class TestWrapper(unittest.TestCase):
         self.assertFalse(w._get_val_bool('F', default=True))
         self.assertTrue(w._get_val_bool('nonexistent', default=True))
 
+    def test_memoize_values(self):
+        w = ewrap.ElementWrapper.wrap(ent.Element('Foo', None, children=[
+            ent.Element('one', None, text='1')]))
+        self.assertIs(w, w.memoize_values())
+        self.assertEqual(1, w._get_val_int('one'))
+        # Changing the element directly isn't noticed...
+        w.element.find('one').text = '2'
+        self.assertEqual(1, w._get_val_int('one'))
+        # ...except by a different type of getter.
+        self.assertEqual('2', w._get_val_str('one'))
+        # The default isn't memoized.
+        self.assertEqual(5, w._get_val_int('two', default=5))
+        self.assertEqual(6, w._get_val_int('two', default=6))
+        # Setters clear the memo
+        w.set_parm_value('one', 3)
+        self.assertEqual(3, w._get_val_int('one'))
+        self.assertEqual('3', w._get_val_str('one'))
+        w.inject(ent.Element('two', None, text='4'))
+        self.assertEqual(4, w._get_val_int('two', default=5))
+        w.element.find('two').text = '5'
+        w.replace_list('three', [])
+        self.assertEqual(5, w._get_val_int('two'))
+        w.element.find('two').text = '6'
+        w._set_elem_list('four', ['a', 'b'])
+        self.assertEqual(6, w._get_val_int('two'))
+        # Turning it off
+        w.element.find('two').text = '7'
+        self.assertIs(w, w.memoize_values(enabled=False))
+        self.assertEqual(7, w._get_val_int('two'))
+        w.element.find('two').text = '8'
+        self.assertEqual(8, w._get_val_int('two'))
+
 
 class TestEntryWrapper(testtools.TestCase):
 
@@ -338,6 +372,15 @@ class TestEntryWrapper(testtools.TestCase):
         self.assertEqual(e2, ew[1].entry)
         self.assertEqual('2', ew[1].etag)
 
+        # Streamed feed: entries are wrapped lazily.
+        resp.feed = ent.Feed({}, (e for e in (e1, e2)))
+        ew = ewrap.EntryWrapper.wrap(resp)
+        self.assertNotIsInstance(ew, list)
+        ew1 = next(ew)
+        self.assertEqual(e1, ew1.entry)
+        self.assertEqual('1', ew1.etag)
+        self.assertEqual([e2], [w.entry for w in ew])
+
     @mock.patch('lxml.etree.tostring')
     def test_toxmlstring(self, mock_tostring):
         wrp = ewrap.EntryWrapper.wrap(ent.Entry(
@@ -589,6 +632,68 @@ class TestElementWrapper(testtools.TestCase):
         # Elements should be cloned to the same spec as Element.__deepcopy__()
         self._verify_element_clone(ew1.element, ew2.element)
 
+    def test_wrapper_copy(self):
+        # Default is a deep copy
+        ew1 = self.nb1
+        ew2 = ew1.copy()
+        self._verify_entry_clone(ew1.entry, ew2.entry)
+        self.assertFalse(ew2._cow)
+        ew1 = self.nb1.seas[0]
+        ew2 = ew1.copy()
+        self._verify_element_clone(ew1.element, ew2.element)
+
+        # Copy-on-write EntryWrapper shares the XML until first changed
+        ew1 = self.nb1
+        ew2 = ew1.copy(cow=True)
+        self.assertIsInstance(ew2, type(ew1))
+        self.assertIsNot(ew1, ew2)
+        self.assertIs(ew1.entry, ew2.entry)
+        self.assertEqual(ew1.etag, ew2.etag)
+        self.assertEqual(ew1.pvid, ew2.pvid)
+        ew2.set_parm_value('PortVLANID', 4093)
+        self.assertIsNot(ew1.entry, ew2.entry)
+        self.assertEqual(4093, ew2.pvid)
+        self.assertNotEqual(4093, ew1.pvid)
+        self.assertFalse(ew2._cow)
+        self.assertTrue(ew1.copy(cow=True)._cow)
+
+        # Copy-on-write ElementWrapper
+        ew1 = self.nb1.seas[0].memoize_values()
+        ew2 = ew1.copy(cow=True)
+        self.assertIs(ew1.element, ew2.element)
+        self.assertIsNot(ew1._val_memo, ew2._val_memo)
+        ew2.inject(ent.Element('Foo', None, text='bar'))
+        self.assertIsNot(ew1.element, ew2.element)
+        self.assertEqual('bar', ew2.element.findtext('Foo'))
+        self.assertIsNone(ew1.element.find('Foo'))
+
+    def test_wrapper_copy_cow_original(self):
+        """Changing the original after a copy-on-write copy doesn't leak."""
+        ew1 = self.nb1
+        pvid = ew1.pvid
+        ew2 = ew1.copy(cow=True)
+        ew3 = ew1.copy(cow=True)
+        ew1.set_parm_value('PortVLANID', 4093)
+        self.assertEqual(4093, ew1.pvid)
+        self.assertEqual(pvid, ew2.pvid)
+        self.assertEqual(pvid, ew3.pvid)
+        self.assertIsNone(ew1._cow)
+        # The other two still share...
+        self.assertIs(ew2.entry, ew3.entry)
+        ew2.set_parm_value('PortVLANID', 4092)
+        self.assertEqual(pvid, ew3.pvid)
+        # ...and the last one keeps the XML, without copying it.
+        entry = ew3.entry
+        ew3.set_parm_value('PortVLANID', 4091)
+        self.assertIs(entry, ew3.entry)
+        self.assertEqual([4093, 4092, 4091], [ew1.pvid, ew2.pvid, ew3.pvid])
+
+        # A deep copy of a wrapper sharing its XML has its own.
+        ew4 = ew3.copy(cow=True)
+        ew5 = copy.deepcopy(ew4)
+        self.assertIsNone(ew5._cow)
+        self.assertIsNotNone(ew4._cow)
+
 
 class TestWrapperElemList(testtools.TestCase):
     """Tests for the WrapperElemList class."""
@@ -597,11 +702,13 @@ class TestWrapperElemList(testtools.TestCase):
         super(TestWrapperElemList, self).setUp()
         self.adpt = self.useFixture(fx.AdapterFx()).adpt
         # No indirect
-        self.seas_wel = net.NetBridge.wrap(pvmhttp.load_pvm_resp(
-            NET_BRIDGE_FILE).get_response())[0].seas
+        self.nb = net.NetBridge.wrap(pvmhttp.load_pvm_resp(
+            NET_BRIDGE_FILE).get_response())[0]
+        self.seas_wel = self.nb.seas
         # With indirect
-        self.backdev_wel = card.VNIC.wrap(pvmhttp.load_pvm_resp(
-            SYS_VNIC_FILE).get_response())[0].back_devs
+        self.vnic = card.VNIC.wrap(pvmhttp.load_pvm_resp(
+            SYS_VNIC_FILE).get_response())[0]
+        self.backdev_wel = self.vnic.back_devs
 
     def test_get(self):
         self.assertIsInstance(self.seas_wel[0], net.SEA)
@@ -703,6 +810,88 @@ class TestWrapperElemList(testtools.TestCase):
         for chunk in strout.split(','):
             self.assertIn('VNIC', chunk)
 
+    def test_cache(self):
+        """Children are found once; wrappers are identity-stable."""
+        orig_findall = ent.Element.findall
+        for wel in (self.seas_wel, self.backdev_wel):
+            first = wel[0]
+            with mock.patch.object(ent.Element, 'findall', autospec=True,
+                                   side_effect=orig_findall) as mock_fa:
+                self.assertIs(first, wel[0])
+                self.assertEqual([first, wel[1]], list(wel))
+                self.assertIs(first, list(wel)[0])
+                self.assertEqual(2, len(wel))
+                self.assertIn(first, wel)
+                self.assertEqual(1, wel.index(wel[1]))
+                mock_fa.assert_not_called()
+                # Modification through the list invalidates...
+                added = copy.deepcopy(first)
+                wel.append(added)
+                self.assertEqual(3, len(wel))
+                self.assertTrue(mock_fa.called)
+                # ...but existing wrappers are retained.
+                self.assertIs(first, wel[0])
+                mock_fa.reset_mock()
+                wel.remove(added)
+                self.assertEqual(2, len(wel))
+                self.assertTrue(mock_fa.called)
+                self.assertIs(first, wel[0])
+
+        # A list without an owner notices changes made to the XML directly.
+        wel = ewrap.WrapperElemList(self.seas_wel.root_elem, net.SEA)
+        first = wel[0]
+        wel.root_elem.element.remove(wel[1].element.element)
+        self.assertEqual([first], list(wel))
+
+    def test_cache_owner(self):
+        """The owning wrapper caches its lists and invalidates them."""
+        self.assertIs(self.seas_wel, self.nb.seas)
+        self.assertIs(self.backdev_wel, self.vnic.back_devs)
+        orig_findall = ent.Element.findall
+        wel = self.seas_wel
+        first, second = wel[0], wel[1]
+        with mock.patch.object(ent.Element, 'findall', autospec=True,
+                               side_effect=orig_findall) as mock_fa:
+            # Indexed access does not find the children again.
+            for i in range(len(wel)):
+                self.assertIsInstance(wel[i], net.SEA)
+            mock_fa.assert_not_called()
+            # XML changed directly is not noticed...
+            wel.root_elem.element.remove(second.element.element)
+            self.assertEqual(2, len(wel))
+            # ...until the owner is changed through its mutators.
+            self.nb.load_balance = True
+            self.assertEqual([first], list(wel))
+            self.assertTrue(mock_fa.called)
+        self.assertIs(wel, self.nb.seas)
+
+        # Changes through one list are noticed by the owner's other lists.
+        other = self.nb._elem_list(wel.root_elem)
+        self.assertIsNot(wel, other)
+        count = len(other)
+        wel.append(second)
+        self.assertEqual(count + 1, len(other))
+
+        # Replacing the container gives a new list.
+        self.nb.seas = [first]
+        self.assertIsNot(wel, self.nb.seas)
+        self.assertEqual(1, len(self.nb.seas))
+        self.assertIs(self.nb.seas, self.nb.seas)
+
+    def test_cache_copy(self):
+        """Copies of the owning wrapper do not share its lists."""
+        wel = self.backdev_wel
+        for cpy in (self.vnic.copy(), self.vnic.copy(cow=True)):
+            self.assertIsNot(wel, cpy.back_devs)
+            self.assertEqual(2, len(cpy.back_devs))
+        # Detaching a copy-on-write wrapper discards its lists.
+        cpy = self.vnic.copy(cow=True)
+        cpy_wel = cpy.back_devs
+        cpy.back_devs = [cpy_wel[0]]
+        self.assertEqual(1, len(cpy.back_devs))
+        self.assertEqual(2, len(self.vnic.back_devs))
+        self.assertIs(wel, self.vnic.back_devs)
+
 
 class TestActionableList(unittest.TestCase):
     """Tests for the Actionable List class."""
@@ -980,6 +1169,19 @@ class TestSearch(testtools.TestCase):
         self.assertEqual(rets[0].uuid, net.NetBridge.search(
             self.adp, one_result=True, pvid=1).uuid)
 
+        # Search by UUID uses the feed's index; other entries aren't touched.
+        resp = pvmhttp.load_pvm_resp(NET_BRIDGE_FILE).get_response()
+        mock_read.side_effect = None
+        mock_read.return_value = resp
+        nb = net.NetBridge.search(
+            self.adp, one_result=True,
+            uuid='764F3423-04C5-3B96-95A3-4764065400BD')
+        self.assertIsInstance(nb, net.NetBridge)
+        self.assertEqual('764f3423-04c5-3b96-95a3-4764065400bd', nb.uuid)
+        self.assertEqual(1, len([item for item in resp.feed.entries._items
+                                 if isinstance(item, ent.Entry)]))
+        self.assertEqual([], net.NetBridge.search(self.adp, uuid='1234'))
+
     @mock.patch('pypowervm.adapter.Adapter.read')
     def test_search_with_xag(self, mock_read):
         """Test a search key that's in search_keys, but specifying xag."""
@@ -1406,6 +1608,11 @@ class TestGetters(twrap.TestWrapper):
     file = LPAR_FILE
     wrapper_class_to_test = lpar.LPAR
 
+    def _set_workers(self, workers):
+        ewrap.CONF.set_override('pypowervm_feed_getter_workers', workers)
+        self.addCleanup(ewrap.CONF.clear_override,
+                        'pypowervm_feed_getter_workers')
+
     @mock.patch('pypowervm.wrappers.entry_wrapper.EntryWrapper.refresh')
     def test_entry_wrapper_getter(self, mock_refresh):
         self.adpt.read.return_value = self.dwrap.entry
@@ -1491,6 +1698,8 @@ class TestGetters(twrap.TestWrapper):
 
     @mock.patch('pypowervm.wrappers.entry_wrapper.EntryWrapper.refresh')
     def test_feed_getter(self, mock_refresh):
+        # Serially, so the mocked refreshes return the entries in order
+        self._set_workers(1)
         self.adpt.read.return_value = self.resp
         feediter = iter(self.entries)
         mock_refresh.side_effect = lambda: next(feediter)
@@ -1571,6 +1780,8 @@ class TestGetters(twrap.TestWrapper):
     @mock.patch('pypowervm.wrappers.entry_wrapper.EntryWrapper.refresh')
     def test_uuid_feed_getter(self, mock_refresh):
         """Verify UUIDFeedGetter."""
+        # Serially, so the mocked reads return the entries in order
+        self._set_workers(1)
         # Mock return separate entries per read.  Need multiple copies for
         # multiple calls.
         read_iter = iter(wrp.entry for wrp in (
@@ -1637,6 +1848,111 @@ class TestGetters(twrap.TestWrapper):
             [mock.call('st', 'uuid', child_type=lpar.LPAR.schema_type,
                        child_id=uuid, xag=None) for uuid in uuids])
 
+    def test_getters_concurrent(self):
+        """Feed getters issue their GETs concurrently, preserving order."""
+        self._set_workers(4)
+        uuids = ['u0', 'u1', 'u2', 'u3']
+        # Each GET waits for all the others to start, so this only completes
+        # if all four are in flight at once.
+        barrier = threading.Barrier(4, timeout=10)
+
+        def read(root_type, root_id, **kwargs):
+            barrier.wait()
+            return self.entries[uuids.index(root_id)].entry
+        self.adpt.read.side_effect = read
+        getter = ewrap.UUIDFeedGetter(self.adpt, lpar.LPAR, uuids)
+        lfeed = getter.get()
+        self.assertEqual([wrp.uuid for wrp in self.entries[:4]],
+                         [wrp.uuid for wrp in lfeed])
+        self.assertEqual(4, self.adpt.read.call_count)
+
+        # Refresh sends each entry's etag; 304 keeps the wrapper as is.
+        def read_by_href(href, etag=None, **kwargs):
+            barrier.wait()
+            return mock.Mock(status=304)
+        self.adpt.read_by_href.side_effect = read_by_href
+        feed_getter = ewrap.FeedGetter(self.adpt, lpar.LPAR)
+        feed_getter.cache = lfeed
+        for rgetter in (getter, feed_getter):
+            self.adpt.read_by_href.reset_mock()
+            rfeed = rgetter.get(refresh=True)
+            self.assertEqual(4, len(rfeed))
+            for old, new in zip(lfeed, rfeed):
+                self.assertIs(old, new)
+            self.adpt.read_by_href.assert_has_calls(
+                [mock.call(wrp.href, etag=wrp.etag) for wrp in lfeed],
+                any_order=True)
+        self.assertEqual(4, self.adpt.read.call_count)
+
+        # All the GETs run; the first failure (in UUID order) is raised.
+        def read_fail(root_type, root_id, **kwargs):
+            if root_id in ('u1', 'u3'):
+                raise ValueError(root_id)
+            return self.entries[uuids.index(root_id)].entry
+        self.adpt.read.reset_mock()
+        self.adpt.read.side_effect = read_fail
+        getter = ewrap.UUIDFeedGetter(self.adpt, lpar.LPAR, uuids)
+        self.assertRaisesRegex(ValueError, 'u1', getter.get)
+        self.assertEqual(4, self.adpt.read.call_count)
+
+    @mock.patch('pypowervm.wrappers.entry_wrapper.EntryWrapper.refresh')
+    def test_getters_invalidation_index(self, mock_refresh):
+        """Getters skip refresh/refetch when the index shows no change."""
+        index = cache.GenerationIndex()
+        lpar_href = ('https://host:12443/rest/api/uom/LogicalPartition/'
+                     '089FFB20-5D19-4A8C-BB80-13650627D985')
+        self.adpt.read.return_value = self.dwrap.entry
+        mock_refresh.return_value = self.dwrap
+        getter = lpar.LPAR.getter(self.adpt, 'c5d782c7-44e4-3086-ad15-'
+                                  'b16fb039d63b', invalidation_index=index)
+        getter.get()
+        self.assertEqual(1, self.adpt.read.call_count)
+        # Nothing changed => no refresh
+        getter.get(refresh=True)
+        mock_refresh.assert_not_called()
+        # Events for other objects don't matter
+        index.process_events({lpar_href: 'invalidate'})
+        getter.get(refresh=True)
+        mock_refresh.assert_not_called()
+        # An event for this object does
+        index.process_events({lpar_href.replace(
+            '089FFB20-5D19-4A8C-BB80-13650627D985',
+            'C5D782C7-44E4-3086-AD15-B16FB039D63B'): 'invalidate'})
+        getter.get(refresh=True)
+        self.assertEqual(1, mock_refresh.call_count)
+        getter.get(refresh=True)
+        self.assertEqual(1, mock_refresh.call_count)
+        # General invalidation changes everything
+        index.process_events({'general': 'invalidate'})
+        getter.get(refresh=True)
+        self.assertEqual(2, mock_refresh.call_count)
+
+        # FeedGetter: any object of the type invalidates
+        self.adpt.read.reset_mock()
+        self.adpt.read.return_value = self.resp
+        mock_refresh.reset_mock()
+        getter = ewrap.FeedGetter(self.adpt, lpar.LPAR,
+                                  invalidation_index=index)
+        getter.get()
+        getter.get(refresh=True)
+        getter.get(refetch=True)
+        self.assertEqual(1, self.adpt.read.call_count)
+        mock_refresh.assert_not_called()
+        index.process_events({lpar_href: 'add'})
+        getter.get(refetch=True)
+        self.assertEqual(2, self.adpt.read.call_count)
+        # A different type doesn't invalidate
+        index.process_events({lpar_href.replace(
+            'LogicalPartition', 'VirtualIOServer'): 'invalidate'})
+        getter.get(refetch=True)
+        self.assertEqual(2, self.adpt.read.call_count)
+
+        # UUIDFeedGetter passes the index through
+        getter = ewrap.UUIDFeedGetter(self.adpt, lpar.LPAR, ['u1', 'u2'],
+                                      invalidation_index=index)
+        for wgetter in getter.wrapper_getters:
+            self.assertIs(index, wgetter.invalidation_index)
+
 
 if __name__ == '__main__':
     unittest.main()
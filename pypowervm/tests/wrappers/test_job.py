@@ -14,6 +14,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
+
+import fixtures
 import mock
 import testtools
 
@@ -214,16 +217,88 @@ class TestJobEntryWrapper(testtools.TestCase):
         wrapper.run_job('uuid', synchronous=False)
         self.assertEqual(0, mock_del.call_count)
 
+    @mock.patch('pypowervm.wrappers.job.Job._poll_future')
+    @mock.patch('pypowervm.wrappers.job.Job.cancel_job')
+    @mock.patch('pypowervm.wrappers.job.Job.delete_job')
+    @mock.patch('pypowervm.wrappers.job.Job.job_status')
+    def test_run_job_async(self, mock_status, mock_del, mock_cancel,
+                           mock_poll):
+        mock_status.__get__ = mock.Mock(
+            return_value=jwrap.JobStatus.COMPLETED_OK)
+        wrapper = self._request_wrapper
+
+        def poll_result(timed_out=False, exc=None):
+            fut = futures.Future()
+            if exc:
+                fut.set_exception(exc)
+            else:
+                fut.set_result(timed_out)
+            return fut
+
+        # Success: the Future's result is the Job wrapper.
+        mock_poll.return_value = poll_result()
+        fut = wrapper.run_job_async('uuid', timeout=10, sensitive='sens')
+        self.assertIs(wrapper, fut.result(timeout=5))
+        self.adpt.create_job.assert_called_with(mock.ANY, 'LogicalPartition',
+                                                'uuid', sensitive='sens')
+        mock_poll.assert_called_once_with(['RUNNING', 'NOT_STARTED'], 10,
+                                          'sens')
+        self.assertEqual(1, mock_del.call_count)
+        self.assertEqual(0, mock_cancel.call_count)
+
+        # Time out
+        mock_del.reset_mock()
+        mock_poll.return_value = poll_result(timed_out=True)
+        fut = wrapper.run_job_async('uuid')
+        self.assertRaises(ex.JobRequestTimedOut, fut.result, timeout=5)
+        self.assertEqual(1, mock_cancel.call_count)
+        self.assertEqual(0, mock_del.call_count)
+
+        # Non-OK status
+        mock_status.__get__.return_value = jwrap.JobStatus.COMPLETED_WITH_ERROR
+        mock_poll.return_value = poll_result()
+        fut = wrapper.run_job_async('uuid')
+        self.assertRaises(ex.JobRequestFailed, fut.result, timeout=5)
+        self.assertEqual(1, mock_del.call_count)
+
+        # Monitoring failed
+        mock_poll.return_value = poll_result(exc=ex.Error('foo'))
+        fut = wrapper.run_job_async('uuid')
+        self.assertRaises(ex.Error, fut.result, timeout=5)
+
+        # Job creation failed.  (Use a fresh wrapper: the one above now has
+        # the create_job mock's entry, and so its adapter.)
+        mock_poll.reset_mock()
+        self.adpt.create_job.side_effect = ex.Error('foo')
+        fut = self._bad_wrapper.run_job_async('uuid')
+        self.assertRaises(ex.JobRequestFailed, fut.result, timeout=5)
+        self.assertEqual(0, mock_poll.call_count)
+
+    @mock.patch('pypowervm.wrappers.job.Job._create_job')
+    def test_run_job_async_cancel(self, mock_create):
+        """A Future cancelled before the job is created is not run."""
+        with mock.patch.object(jwrap, '_get_executor') as mock_exec:
+            fut = self._request_wrapper.run_job_async('uuid')
+        start = mock_exec.return_value.submit.call_args[0][0]
+        self.assertTrue(fut.cancel())
+        start()
+        self.assertEqual(0, mock_create.call_count)
+
+    def test_get_executor(self):
+        self.assertIs(jwrap._get_executor(), jwrap._get_executor())
+        self.assertEqual(jwrap.CONF.pypowervm_job_async_workers,
+                         jwrap._get_executor()._max_workers)
+
+    @mock.patch('pypowervm.wrappers.job.Job._poll_future')
     @mock.patch('pypowervm.wrappers.job.Job.poll_while_status')
-    @mock.patch('pypowervm.wrappers.job.PollAndDeleteThread')
-    def test_montor_job(self, mock_thread, mock_poll):
+    def test_montor_job(self, mock_poll, mock_fut):
         wrapper = self._ok_wrapper
         # Synchronous is a pass-through to poll_while_status
         mock_poll.return_value = 'abc123'
         self.assertEqual('abc123', wrapper._monitor_job())
         mock_poll.assert_called_once_with(['RUNNING', 'NOT_STARTED'], mock.ANY,
                                           mock.ANY)
-        self.assertEqual(0, mock_thread.call_count)
+        self.assertEqual(0, mock_fut.call_count)
 
         # Asynchronous
         # Time out
@@ -231,80 +306,112 @@ class TestJobEntryWrapper(testtools.TestCase):
         mock_poll.return_value = True
         self.assertTrue(wrapper._monitor_job(synchronous=False))
         mock_poll.assert_called_once_with(['NOT_STARTED'], mock.ANY, mock.ANY)
-        self.assertEqual(0, mock_thread.call_count)
+        self.assertEqual(0, mock_fut.call_count)
 
-        # No timeout
+        # No timeout: the job monitor deletes the Job when it finishes.
         mock_poll.reset_mock()
         mock_poll.return_value = False
-        thread_inst = mock.Mock()
-        mock_thread.return_value = thread_inst
         self.assertFalse(wrapper._monitor_job(synchronous=False))
-        mock_thread.assert_called_once_with(wrapper, False)
-        thread_inst.start.assert_called_once_with()
-
-    @mock.patch('time.time')
-    @mock.patch('time.sleep')
+        mock_fut.assert_called_once_with(['RUNNING'], 0, False)
+        mock_fut.return_value.add_done_callback.assert_called_once_with(
+            mock.ANY)
+        # The Job is deleted on the executor, not the job monitor thread.
+        callback = mock_fut.return_value.add_done_callback.call_args[0][0]
+        done = futures.Future()
+        done.set_result(False)
+        with mock.patch.object(jwrap, '_get_executor') as mock_exec:
+            callback(done)
+        mock_exec.return_value.submit.assert_called_once_with(
+            wrapper._delete_when_done, done)
+
+    @mock.patch('pypowervm.wrappers.job._MONITOR.watch')
     @mock.patch('pypowervm.wrappers.job.Job.job_status')
-    def test_poll_while_status(self, mock_status, mock_sleep, mock_time):
+    def test_poll_while_status(self, mock_status, mock_watch):
         wrapper = self._ok_wrapper
         mock_status.__get__ = mock.Mock(return_value=jwrap.JobStatus.RUNNING)
         # Short-circuit if the status is already not in the list
         self.assertFalse(wrapper.poll_while_status(
             [jwrap.JobStatus.NOT_ACTIVE], 10, False))
-        self.assertEqual(0, mock_sleep.call_count)
-        self.assertEqual(1, mock_time.call_count)
+        self.assertEqual(0, mock_watch.call_count)
+        self.assertFalse(wrapper._poll_future(
+            [jwrap.JobStatus.NOT_ACTIVE], 10, False).result())
+        self.assertEqual(0, mock_watch.call_count)
 
-        # Engineer a timeout after the third run
-        mock_time.reset_mock()
-        mock_time.side_effect = [0, 1, 2, 3, 4, 5]
+        # Otherwise, wait on the job monitor
+        mock_watch.return_value.result.return_value = True
         self.assertTrue(wrapper.poll_while_status(
-            [jwrap.JobStatus.RUNNING], 3, False))
-        self.assertEqual(3, mock_sleep.call_count)
-        # Initial setup, bail on the fourth iteration
-        self.assertEqual(5, mock_time.call_count)
-
-        # "Infinite" timeout, status eventually becomes one not in the list
-        mock_status.__get__.side_effect = ['a', 'b', 'c', 'd', 'e', 'f']
-        mock_time.reset_mock()
-        mock_time.side_effect = [0, 1, 2, 3, 4, 5]
-        mock_sleep.reset_mock()
-        self.assertFalse(wrapper.poll_while_status(['a', 'b', 'c', 'd', 'e'],
-                                                   0, False))
-        self.assertEqual(5, mock_sleep.call_count)
-        # Only the initial timer setup
-        self.assertEqual(6, mock_time.call_count)
+            [jwrap.JobStatus.RUNNING], 3, 'sens'))
+        mock_watch.assert_called_once_with(
+            wrapper, [jwrap.JobStatus.RUNNING], 3, 'sens')
+        mock_watch.return_value.result.assert_called_once_with()
 
-    @mock.patch('pypowervm.wrappers.job.Job.poll_while_status')
     @mock.patch('pypowervm.wrappers.job.Job.delete_job')
-    def test_poll_and_delete_thread(self, mock_del, mock_poll):
+    def test_delete_when_done(self, mock_del):
+        fut = futures.Future()
+        fut.set_result(False)
         # OK
-        jwrap.PollAndDeleteThread(self._ok_wrapper, 'sens').run()
-        mock_poll.assert_called_once_with(['RUNNING'], 0, 'sens')
+        self._ok_wrapper._delete_when_done(fut)
         mock_del.assert_called_once_with()
 
         # Not OK
-        mock_poll.reset_mock()
         mock_del.reset_mock()
         with self.assertLogs(jwrap.__name__, 'ERROR'):
-            jwrap.PollAndDeleteThread(self._failed_wrapper, 'sens').run()
-        mock_poll.assert_called_once_with(['RUNNING'], 0, 'sens')
+            self._failed_wrapper._delete_when_done(fut)
         mock_del.assert_called_once_with()
-
-    @mock.patch('pypowervm.wrappers.job.Job.poll_while_status')
-    @mock.patch('pypowervm.wrappers.job.Job.delete_job')
-    def test_cancel_job_thread(self, mock_del, mock_poll):
-        jwrap.CancelJobThread(self._ok_wrapper, 'sens').run()
-        mock_poll.assert_called_once_with(['RUNNING', 'NOT_STARTED'],
-                                          0, 'sens')
+        # ...unless we don't care (cancel)
+        mock_del.reset_mock()
+        with mock.patch.object(jwrap.LOG, 'error') as mock_log:
+            self._failed_wrapper._delete_when_done(fut, log_failure=False)
+            self.assertEqual(0, mock_log.call_count)
         mock_del.assert_called_once_with()
 
-    @mock.patch('pypowervm.wrappers.job.CancelJobThread.start')
+        # Monitoring failed: don't delete
+        mock_del.reset_mock()
+        fut = futures.Future()
+        fut.set_exception(ex.Error('foo'))
+        with self.assertLogs(jwrap.__name__, 'ERROR'):
+            self._ok_wrapper._delete_when_done(fut)
+        self.assertEqual(0, mock_del.call_count)
+
+    @mock.patch('pypowervm.wrappers.job.Job._delete_when_done')
+    @mock.patch('pypowervm.wrappers.job.Job._poll_future')
+    def test_poll_and_delete_thread(self, mock_fut, mock_del):
+        with mock.patch('warnings.warn') as mock_warn:
+            thread = jwrap.PollAndDeleteThread(self._ok_wrapper, 'sens')
+            mock_warn.assert_called_once_with(mock.ANY, DeprecationWarning)
+        thread.run()
+        mock_fut.assert_called_once_with(['RUNNING'], 0, 'sens')
+        mock_del.assert_called_once_with(mock_fut.return_value)
+
+    @mock.patch('pypowervm.wrappers.job.Job._delete_when_done')
+    @mock.patch('pypowervm.wrappers.job.Job._poll_future')
+    def test_cancel_job_thread(self, mock_fut, mock_del):
+        with mock.patch('warnings.warn') as mock_warn:
+            thread = jwrap.CancelJobThread(self._ok_wrapper, 'sens')
+            mock_warn.assert_called_once_with(mock.ANY, DeprecationWarning)
+        thread.run()
+        mock_fut.assert_called_once_with(['RUNNING', 'NOT_STARTED'], 0,
+                                         'sens')
+        mock_del.assert_called_once_with(mock_fut.return_value,
+                                         log_failure=False)
+
+    @mock.patch('pypowervm.wrappers.job._get_executor')
+    def test_on_executor(self, mock_exec):
+        func = mock.Mock()
+        callback = jwrap._on_executor(func, 'arg', kw='kw')
+        fut = futures.Future()
+        callback(fut)
+        # The callback doesn't run func itself...
+        self.assertEqual(0, func.call_count)
+        # ...but hands it to the executor.
+        mock_exec.return_value.submit.assert_called_once_with(
+            func, fut, 'arg', kw='kw')
+
     @mock.patch('pypowervm.wrappers.job.Job.delete_job')
-    @mock.patch('pypowervm.wrappers.job.Job._monitor_job')
-    def test_cancel_job(self, mock_monitor, mock_delete, mock_start):
+    @mock.patch('pypowervm.wrappers.job.Job._poll_future')
+    def test_cancel_job(self, mock_fut, mock_delete):
         wrapper = self._ok_wrapper
         self.adpt.update.side_effect = ex.Error('error')
-        mock_monitor.return_value = False
         wrapper.cancel_job()
         self.adpt.update.assert_called_with(
             None, None, root_type='jobs', root_id=wrapper.job_id,
@@ -312,13 +419,23 @@ class TestJobEntryWrapper(testtools.TestCase):
         self.assertEqual(0, mock_delete.call_count)
         self.adpt.update.reset_mock()
         self.adpt.update.side_effect = None
-        mock_start.reset_mock()
-        mock_monitor.return_value = False
-        wrapper.cancel_job()
+        mock_fut.reset_mock()
+        wrapper.cancel_job(sensitive=True)
         self.adpt.update.assert_called_with(
             None, None, root_type='jobs', root_id=wrapper.job_id,
             suffix_type='cancel')
-        self.assertEqual(1, mock_start.call_count)
+        mock_fut.assert_called_once_with(['RUNNING', 'NOT_STARTED'], 0, True)
+        # The job monitor deletes the Job when it finishes
+        callback = mock_fut.return_value.add_done_callback.call_args[0][0]
+        self.assertEqual(0, mock_delete.call_count)
+        done = futures.Future()
+        done.set_result(False)
+        with mock.patch.object(jwrap, '_get_executor') as mock_exec:
+            callback(done)
+        self.assertEqual(0, mock_delete.call_count)
+        func, fut = mock_exec.return_value.submit.call_args[0]
+        func(fut, **mock_exec.return_value.submit.call_args[1])
+        mock_delete.assert_called_once_with()
 
     @mock.patch('pypowervm.wrappers.job.Job.job_status')
     def test_delete_job(self, mock_status):
@@ -334,3 +451,141 @@ class TestJobEntryWrapper(testtools.TestCase):
         with self.assertLogs(jwrap.__name__, 'ERROR'):
             wrapper.delete_job()
         self.adpt.delete.assert_called_with('jobs', wrapper.job_id)
+
+
+class TestJobMonitor(testtools.TestCase):
+
+    def setUp(self):
+        super(TestJobMonitor, self).setUp()
+        self.adpt = self.useFixture(fx.AdapterFx()).adpt
+        self.monitor = jwrap._JobMonitor()
+        self.useFixture(fixtures.MockPatchObject(
+            jwrap, '_POLL_INITIAL_INTERVAL', 0.001))
+        jwrap.CONF.set_override('pypowervm_job_poll_max_interval', 0.01)
+        self.addCleanup(jwrap.CONF.clear_override,
+                        'pypowervm_job_poll_max_interval')
+
+        self.job = self._load(jwrap.JobStatus.RUNNING)
+
+    def _load(self, status):
+        resp = pvmhttp.load_pvm_resp(JOB_RESPONSE_OK,
+                                     adapter=self.adpt).get_response()
+        resp.entry.element.find(jwrap._JOB_ID).text = EXPECTED_ID
+        resp.entry.element.find(jwrap._JOB_STATUS).text = status
+        return jwrap.Job.wrap(resp)
+
+    def _read_job_resps(self, *statuses):
+        return [mock.Mock(entry=self._load(status).entry)
+                for status in statuses]
+
+    def test_complete(self):
+        self.adpt.read_job.side_effect = self._read_job_resps(
+            jwrap.JobStatus.RUNNING, jwrap.JobStatus.RUNNING,
+            jwrap.JobStatus.COMPLETED_OK)
+        fut = self.monitor.watch(self.job, [jwrap.JobStatus.RUNNING], 0,
+                                 'sens')
+        self.assertFalse(fut.result(timeout=5))
+        self.assertEqual(3, self.adpt.read_job.call_count)
+        self.adpt.read_job.assert_called_with(EXPECTED_ID, sensitive='sens')
+        # The Job was refreshed
+        self.assertEqual(jwrap.JobStatus.COMPLETED_OK, self.job.job_status)
+        self.assertEqual([], self.monitor._watches)
+
+    def test_timeout(self):
+        self.adpt.read_job.return_value = self._read_job_resps(
+            jwrap.JobStatus.RUNNING)[0]
+        fut = self.monitor.watch(self.job, [jwrap.JobStatus.RUNNING], 0.05,
+                                 False)
+        self.assertTrue(fut.result(timeout=5))
+        self.assertEqual([], self.monitor._watches)
+
+    def test_error(self):
+        self.adpt.read_job.side_effect = ex.Error('foo')
+        fut = self.monitor.watch(self.job, [jwrap.JobStatus.RUNNING], 0,
+                                 False)
+        self.assertRaises(ex.Error, fut.result, timeout=5)
+        self.assertEqual([], self.monitor._watches)
+
+    def test_many(self):
+        """Many Jobs are monitored by one thread."""
+        self.adpt.read_job.return_value = self._read_job_resps(
+            jwrap.JobStatus.COMPLETED_OK)[0]
+        jobs = [self._load(jwrap.JobStatus.RUNNING) for i in range(10)]
+        with mock.patch('threading.Thread.start') as mock_start:
+            # Don't let the thread start until all are submitted
+            futs = [self.monitor.watch(job, [jwrap.JobStatus.RUNNING], 0,
+                                       False) for job in jobs]
+            self.assertEqual(1, mock_start.call_count)
+        self.monitor._thread.start()
+        self.assertEqual([False] * 10,
+                         [fut.result(timeout=5) for fut in futs])
+
+    def test_events(self):
+        """The event feed wakes the monitor for the Job's URI."""
+        self.adpt.session.has_event_listener = True
+        self.adpt.read_job.side_effect = self._read_job_resps(
+            jwrap.JobStatus.RUNNING, jwrap.JobStatus.COMPLETED_OK)
+        # Without events, the Job wouldn't be polled for a long time.
+        self.useFixture(fixtures.MockPatchObject(
+            jwrap, '_POLL_INITIAL_INTERVAL', 1000))
+        jwrap.CONF.set_override('pypowervm_job_poll_max_interval', 1000)
+        fut = self.monitor.watch(self.job, [jwrap.JobStatus.RUNNING], 0,
+                                 False)
+        mock_sub = self.adpt.session.get_event_listener.return_value.subscribe
+        self.assertEqual(1, mock_sub.call_count)
+        handler = mock_sub.call_args[0][0]
+        self.assertIsInstance(handler, jwrap._JobEventHandler)
+        # Only subscribe once per Session
+        self.monitor._subscribe(self.adpt)
+        self.assertEqual(1, mock_sub.call_count)
+
+        # Some other object
+        handler.process({'https://host:12443/rest/api/uom/LogicalPartition/'
+                         '1A2B3C4D-0000-0000-0000-000000000000': 'invalidate'})
+        self.assertRaises(futures.TimeoutError, fut.result, timeout=0.05)
+        self.assertEqual(0, self.adpt.read_job.call_count)
+        # The Job
+        handler.process({'https://host:12443/rest/api/web/jobs/%s' %
+                         EXPECTED_ID: 'invalidate'})
+        self.assertRaises(futures.TimeoutError, fut.result, timeout=0.05)
+        self.assertEqual(1, self.adpt.read_job.call_count)
+        # All Jobs
+        handler.process({'general': 'invalidate'})
+        self.assertFalse(fut.result(timeout=5))
+        self.assertEqual(2, self.adpt.read_job.call_count)
+
+    def test_run_job_async_chained(self):
+        """A callback on run_job_async's Future can run another Job."""
+        self.useFixture(fixtures.MockPatchObject(jwrap, '_MONITOR',
+                                                 self.monitor))
+        self.adpt.create_job.side_effect = lambda *a, **k: mock.Mock(
+            entry=self._load(jwrap.JobStatus.RUNNING).entry)
+        self.adpt.read_job.side_effect = lambda *a, **k: mock.Mock(
+            entry=self._load(jwrap.JobStatus.COMPLETED_OK).entry)
+        chained = futures.Future()
+
+        def callback(fut):
+            # If this ran on the job monitor thread, run_job would wait for
+            # the monitor forever.
+            try:
+                self._load(jwrap.JobStatus.NOT_ACTIVE).run_job('uuid')
+            except Exception as exc:
+                chained.set_exception(exc)
+            else:
+                chained.set_result(fut.result())
+
+        fut = self.job.run_job_async('uuid')
+        fut.add_done_callback(callback)
+        self.assertIs(self.job, chained.result(timeout=5))
+        self.assertEqual(2, self.adpt.create_job.call_count)
+        self.assertEqual(2, self.adpt.delete.call_count)
+
+    def test_job_id_from_href(self):
+        self.assertEqual('123', jwrap._job_id_from_href(
+            'https://host:12443/rest/api/web/jobs/123?group=None'))
+        self.assertEqual('123',
+                         jwrap._job_id_from_href('/rest/api/web/Jobs/123'))
+        self.assertIsNone(jwrap._job_id_from_href(
+            'https://host:12443/rest/api/web/jobs'))
+        self.assertIsNone(jwrap._job_id_from_href(
+            'https://host:12443/rest/api/uom/LogicalPartition'))
@@ -62,6 +62,13 @@ class TestPCM(twrap.TestWrapper):
         self.assertEqual(expected, func('2015-04-30T01:11:35.000+05:00'))
         self.assertEqual(expected, func('2015-04-30T06:11:35.000-00:00'))
         self.assertEqual(expected, func('2015-04-30T06:11:35.000Z'))
+        self.assertEqual(expected.replace(microsecond=500000),
+                         func('2015-04-30T06:11:35.5Z'))
+        self.assertEqual(expected.replace(microsecond=123456),
+                         func('2015-04-30T06:11:35.123456Z'))
+        self.assertRaises(ValueError, func, '2015-04-30T06:11:35Z')
+        self.assertRaises(ValueError, func, '2015-04-30 06:11:35.000Z')
+        self.assertRaises(ValueError, func, '2015-04-30T06:11:35.000')
 
 
 class TestLTMMetrics(twrap.TestWrapper):
@@ -15,8 +15,12 @@
 #    under the License.
 
 import abc
+import collections
+from concurrent import futures
 from concurrent.futures import thread as th
+import contextlib
 import oslo_concurrency.lockutils as lock
+from oslo_config import cfg
 import oslo_context.context as ctx
 from oslo_log import log as logging
 from oslo_utils import reflection
@@ -26,14 +30,18 @@ from taskflow import exceptions as tf_ex
 from taskflow.patterns import linear_flow as tf_lf
 from taskflow.patterns import unordered_flow as tf_uf
 from taskflow import task as tf_task
+from taskflow.types import failure as tf_fail
 import threading
+import time
 
+import pypowervm.const as c
 import pypowervm.exceptions as ex
 from pypowervm.i18n import _
 from pypowervm.utils import retry
 import pypowervm.wrappers.entry_wrapper as ewrap
 
 LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
 _local = threading.local()
 
 
@@ -51,6 +59,119 @@ def _set_locks(locks):
     _local.entry_transaction = locks
 
 
+def file_lock_backend(lock_path):
+    """An entry_transaction lock backend using a file lock per object.
+
+    :param lock_path: Directory in which to create the lock files.  Processes
+                      using the same directory serialize their updates to the
+                      same object.
+    :return: A lock backend suitable for set_lock_backend.
+    """
+    def _file_lock(uuid):
+        return lock.external_lock(uuid, lock_file_prefix='pypowervm-',
+                                  lock_path=lock_path)
+    return _file_lock
+
+
+_LOCK_BACKEND = None
+
+
+def set_lock_backend(backend):
+    """Set the inter-process lock held by entry_transaction.
+
+    entry_transaction always serializes on the object's UUID within this
+    process.  The backend lock is taken in addition, once the in-process lock
+    is held, to serialize with other processes (or hosts) as well.
+
+    :param backend: Callable accepting an object's UUID and returning a
+                    context manager which holds the lock for that object -
+                    e.g. file_lock_backend(path), or a wrapper around a
+                    distributed lock service.  If None, the default is
+                    restored: file_lock_backend in
+                    CONF.pypowervm_entry_transaction_lock_path if that is set;
+                    otherwise no inter-process lock.
+    """
+    global _LOCK_BACKEND
+    _LOCK_BACKEND = backend
+
+
+def _backend_lock(uuid):
+    """Context manager holding the inter-process lock (if any) for uuid."""
+    backend = _LOCK_BACKEND
+    if backend is None and CONF.pypowervm_entry_transaction_lock_path:
+        backend = file_lock_backend(
+            CONF.pypowervm_entry_transaction_lock_path)
+    return backend(uuid) if backend else contextlib.nullcontext()
+
+
+class _TransactionStats(object):
+    """Per-UUID counters of entry_transaction contention.
+
+    For each object UUID:
+    transactions: Number of entry_transaction invocations.
+    attempts: Number of times the decorated method was run.
+    etag_mismatches: Number of attempts which failed with an etag mismatch.
+    retries: Number of attempts redriven after an etag mismatch.
+    lock_wait: Total seconds spent waiting for the lock(s).
+    retry_wait: Total seconds spent delaying before retries.
+    """
+    FIELDS = ('transactions', 'attempts', 'etag_mismatches', 'retries',
+              'lock_wait', 'retry_wait')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = collections.defaultdict(
+            lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def add(self, uuid, **deltas):
+        with self._lock:
+            stats = self._stats[uuid]
+            for field, delta in deltas.items():
+                stats[field] += delta
+
+    def get(self):
+        with self._lock:
+            ret = {uuid: dict(stats) for uuid, stats in self._stats.items()}
+        for stats in ret.values():
+            stats['etag_mismatch_rate'] = (
+                float(stats['etag_mismatches']) / stats['attempts']
+                if stats['attempts'] else 0.0)
+        return ret
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_STATS = _TransactionStats()
+
+
+def get_transaction_stats():
+    """Report contention on the objects updated via entry_transaction.
+
+    Use this to find the objects (typically VIOSes) whose updates most often
+    collide, and how much time is lost to it.
+
+    :return: Dict of {uuid: {field: value}} for each object on which an
+             entry_transaction has been run since the process started (or
+             reset_transaction_stats was called).  The fields are:
+             transactions: Number of entry_transaction invocations.
+             attempts: Number of times the decorated method was run.
+             etag_mismatches: Number of attempts which failed with an etag
+                              mismatch.
+             etag_mismatch_rate: etag_mismatches / attempts.
+             retries: Number of attempts redriven after an etag mismatch.
+             lock_wait: Total seconds spent waiting for the lock(s).
+             retry_wait: Total seconds spent delaying before retries.
+    """
+    return _STATS.get()
+
+
+def reset_transaction_stats():
+    """Zero the counters reported by get_transaction_stats."""
+    _STATS.reset()
+
+
 def entry_transaction(func):
     """Decorator to facilitate transaction semantics on a PowerVM object.
 
@@ -92,20 +213,38 @@ def entry_transaction(func):
     or as:
 
     add_gizmos_to_vios_wrapper(pvm_vios.VIOS.getter(adapter, uuid), gizmos)
+
+    In addition to the in-process lock, an inter-process lock may be held -
+    see set_lock_backend and CONF.pypowervm_entry_transaction_lock_path.
+    Contention is counted per UUID - see get_transaction_stats.
     """
     def _synchronize(wrp_or_spec, *a1, **k1):
         """Returned method is synchronized on the object's UUID."""
-
-        @lock.synchronized(wrp_or_spec.uuid)
-        def _locked_resolve_wrapper(wos, *a2, **k2):
-            try:
-                # The synchronized decorator will hold off other threads
-                # we just have to hold off lock attempts by methods further
-                # down the stack.
-                _get_locks().append(wrp_or_spec.uuid)
-                return _resolve_wrapper(wos, *a2, **k2)
-            finally:
-                _get_locks().remove(wrp_or_spec.uuid)
+        uuid = wrp_or_spec.uuid
+
+        @lock.synchronized(uuid)
+        def _locked_resolve_wrapper(wos, start, *a2, **k2):
+            with _backend_lock(uuid):
+                _STATS.add(uuid, lock_wait=time.time() - start)
+                try:
+                    # The synchronized decorator will hold off other threads
+                    # we just have to hold off lock attempts by methods
+                    # further down the stack.
+                    _get_locks().append(uuid)
+                    return _resolve_wrapper(wos, *a2, **k2)
+                finally:
+                    _get_locks().remove(uuid)
+
+        def _is_etag_mismatch(exc, *args, **kwargs):
+            if exc.response.status != c.HTTPStatus.ETAG_MISMATCH:
+                return False
+            _STATS.add(uuid, etag_mismatches=1)
+            return True
+
+        def _delay(*args, **kwargs):
+            start = time.time()
+            retry.STEPPED_RANDOM_DELAY(*args, **kwargs)
+            _STATS.add(uuid, retries=1, retry_wait=time.time() - start)
 
         def _resolve_wrapper(wos, *a2, **k2):
             """Returned method guaranteed to be called with a wrapper."""
@@ -113,19 +252,21 @@ def entry_transaction(func):
                 wos = wos.get()
 
             @retry.retry(argmod_func=retry.refresh_wrapper, tries=60,
-                         delay_func=retry.STEPPED_RANDOM_DELAY)
+                         test_func=_is_etag_mismatch, delay_func=_delay)
             def _retry_refresh(wrapper, *a3, **k3):
                 """Retry as needed, refreshing its wrapper each time."""
+                _STATS.add(uuid, attempts=1)
                 return func(wrapper, *a3, **k3)
             return _retry_refresh(wos, *a2, **k2)
 
         def _lock_if_needed(wos, *a2, **k2):
+            _STATS.add(uuid, transactions=1)
             # Check if this UUID is already locked
-            if wrp_or_spec.uuid in _get_locks():
+            if uuid in _get_locks():
                 # It's already locked by this thread, so skip the lock.
                 return _resolve_wrapper(wos, *a2, **k2)
             else:
-                return _locked_resolve_wrapper(wos, *a2, **k2)
+                return _locked_resolve_wrapper(wos, time.time(), *a2, **k2)
 
         return _lock_if_needed(wrp_or_spec, *a1, **k1)
     return _synchronize
@@ -497,6 +638,21 @@ class ContextThreadPoolExecutor(th.ThreadPoolExecutor):
         return super(ContextThreadPoolExecutor, self).submit(wrapped)
 
 
+_FEED_EXECUTOR = None
+_FEED_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_feed_executor():
+    """The process-wide executor for FeedTask.execute, created on first use."""
+    global _FEED_EXECUTOR
+    with _FEED_EXECUTOR_LOCK:
+        if _FEED_EXECUTOR is None:
+            _FEED_EXECUTOR = ContextThreadPoolExecutor(
+                max_workers=CONF.pypowervm_feed_task_workers,
+                thread_name_prefix='pypowervm-feedtask')
+        return _FEED_EXECUTOR
+
+
 class FeedTask(tf_task.Task):
     """Invokes WrapperTasks in parallel over each EntryWrapper in a feed.
 
@@ -549,7 +705,7 @@ class FeedTask(tf_task.Task):
     avoid them subsequently.
     """
     def __init__(self, name, feed_or_getter, max_workers=10,
-                 update_timeout=-1):
+                 update_timeout=-1, use_engine=True):
         """Create a FeedTask with a FeedGetter (preferred) or existing feed.
 
         :param name: A descriptive string name.  This will be used along with
@@ -567,6 +723,14 @@ class FeedTask(tf_task.Task):
                                the default, causes the request to use the
                                timeout value configured on the Session
                                belonging to the Adapter.
+        :param use_engine: (Optional) If True (the default), the WrapperTasks
+                           run in a parallel TaskFlow engine.  If False, they
+                           run on a thread pool shared by all FeedTasks (see
+                           the pypowervm_feed_task_workers option), which
+                           costs much less to set up for each execution, but
+                           otherwise behaves the same way - including
+                           reverting the WrapperTasks which ran after a
+                           failure.
         """
         super(FeedTask, self).__init__(name)
         if isinstance(feed_or_getter, ewrap.FeedGetter):
@@ -589,6 +753,7 @@ class FeedTask(tf_task.Task):
         # Max WrapperTasks to run in parallel
         self.max_workers = max_workers
         self.update_timeout = update_timeout
+        self.use_engine = use_engine
         # Map of {uuid: WrapperTask}.  We keep this empty until we need the
         # individual WraperTasks.  This is triggered by .wrapper_tasks and
         # .get_wrapper(uuid) (and obviously executing).
@@ -747,8 +912,84 @@ class FeedTask(tf_task.Task):
                                  wrapper=subtask_rets['wrapper_%s' % uuid])
         return ret
 
+    def _run_wrapper_tasks(self):
+        """Run the WrapperTasks in parallel without a TaskFlow engine.
+
+        This behaves like running them in a parallel engine: at most
+        max_workers WrapperTasks run at once; once one has failed, no more are
+        started; WrapperTasks with no Subtasks are left out of the results;
+        after a failure, each WrapperTask which ran is reverted, most recently
+        finished first; a single failure is reraised as is; and multiple
+        failures are raised as a taskflow WrappedFailure.
+
+        :return: The wrapper_task_rets dict (see add_post_execute).
+        """
+        if getattr(_local, 'feed_task_worker', False):
+            # We're running within a WrapperTask on the shared pool.  Waiting
+            # on that pool from here could deadlock if it is saturated.
+            executor = ContextThreadPoolExecutor(self.max_workers)
+        else:
+            executor = _get_feed_executor()
+
+        def _run(wtask):
+            # This is executed in the pool thread.
+            _local.feed_task_worker = True
+            try:
+                return wtask.execute()
+            except Exception:
+                return tf_fail.Failure()
+
+        pending = iter(self.wrapper_tasks.items())
+        running = {}
+        rets = {}
+        failures = []
+        # (WrapperTask, result or Failure) in the order they finished
+        ran = []
+
+        def _submit_next():
+            uuid, wtask = next(pending, (None, None))
+            if wtask is not None:
+                running[executor.submit(_run, wtask)] = uuid
+        for _i in range(self.max_workers or len(self.wrapper_tasks)):
+            _submit_next()
+        try:
+            while running:
+                done = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED).done
+                for fut in done:
+                    uuid = running.pop(fut)
+                    ret = fut.result()
+                    ran.append((self.wrapper_tasks[uuid], ret))
+                    if isinstance(ret, tf_fail.Failure):
+                        failures.append(ret)
+                    elif ret is not None:
+                        wrapper, provided = ret
+                        rets[uuid] = dict(provided, wrapper=wrapper)
+                    if not failures:
+                        _submit_next()
+        finally:
+            if executor is not _FEED_EXECUTOR:
+                executor.shutdown(wait=False)
+        if failures:
+            # As the engine does, with the arguments it passes to revert.
+            flow_failures = {wtask.name: ret for wtask, ret in ran
+                             if isinstance(ret, tf_fail.Failure)}
+            for wtask, ret in reversed(ran):
+                try:
+                    wtask.revert(result=ret, flow_failures=flow_failures)
+                except Exception:
+                    failures.append(tf_fail.Failure())
+        if len(failures) == 1:
+            failures[0].reraise()
+        if failures:
+            raise tf_ex.WrappedFailure(failures)
+        return rets
+
     def execute(self):
-        """Run this FeedTask's WrapperTasks in parallel TaskFlow engine.
+        """Run this FeedTask's WrapperTasks in parallel.
+
+        The WrapperTasks run in a parallel TaskFlow engine or, if use_engine
+        is False, on a thread pool shared by all FeedTasks.
 
         :return: Dictionary of results provided by subtasks and post-execs.
                  The shape of this dict is as normally expected from TaskFlow,
@@ -772,15 +1013,18 @@ class FeedTask(tf_task.Task):
             # WrapperTasks to be replicated, if not already done.  Only do this
             # if there exists at least one WrapperTask with Subtasks.
             # (NB: It is legal to have a FeedTask that *only* has post-execs.)
-            if self._tx_by_uuid or self._common_tx.subtasks:
+            # The results are processed into wrapper_task_rets so they can be
+            # provided to any post-execs.
+            if ((self._tx_by_uuid or self._common_tx.subtasks) and
+                    self.use_engine):
                 pflow = tf_uf.Flow("%s_parallel_flow" % self.name)
                 pflow.add(*self.wrapper_tasks.values())
-                # Execute the parallel flow now so the results can be provided
-                # to any post-execs.
                 rets['wrapper_task_rets'] = self._process_subtask_rets(
                     tf_eng.run(
                         pflow, engine='parallel',
                         executor=ContextThreadPoolExecutor(self.max_workers)))
+            elif self._tx_by_uuid or self._common_tx.subtasks:
+                rets['wrapper_task_rets'] = self._run_wrapper_tasks()
             if self._post_exec:
                 flow = tf_lf.Flow('%s_post_execs' % self.name)
                 flow.add(*self._post_exec)
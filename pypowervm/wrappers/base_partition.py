@@ -1314,7 +1314,7 @@ class PartitionIOConfiguration(ewrap.ElementWrapper):
 
         Each slot will have hardware associated with it.
         """
-        es = ewrap.WrapperElemList(self._find_or_seed(IO_SLOTS_ROOT), IOSlot)
+        es = self._elem_list(self._find_or_seed(IO_SLOTS_ROOT), IOSlot)
         return es
 
     @io_slots.setter
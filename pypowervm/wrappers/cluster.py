@@ -131,7 +131,7 @@ class Cluster(ewrap.EntryWrapper):
     @property
     def nodes(self):
         """WrapperElemList of Node wrappers."""
-        return ewrap.WrapperElemList(self._find_or_seed(_CL_NODES), Node)
+        return self._elem_list(self._find_or_seed(_CL_NODES), Node)
 
     @nodes.setter
     def nodes(self, ns):
@@ -130,7 +130,7 @@ class Pool(entry_wrapper.EntryWrapper):
     def mgmt_consoles(self):
         """Returns a WrapperElemList of PoolMgmtConsole's."""
         elem = self._find_or_seed(_MGMT_CONSOLES)
-        return entry_wrapper.WrapperElemList(
+        return self._elem_list(
             elem, PoolMgmtConsole)
 
     @property
@@ -245,7 +245,7 @@ class PoolMember(entry_wrapper.EntryWrapper):
     def mgmt_consoles(self):
         """Returns a WrapperElemList of PoolMgmtConsole's."""
         elem = self._find_or_seed(_MGMT_CONSOLES)
-        return entry_wrapper.WrapperElemList(
+        return self._elem_list(
             elem, PoolMgmtConsole)
 
 
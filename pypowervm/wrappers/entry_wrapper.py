@@ -17,11 +17,18 @@
 """Base classes for all wrapper classes in the pypowervm.wrappers package."""
 
 import abc
-from oslo_log import log as logging
+from concurrent import futures
+import copy
 import re
-import six
+import threading
+import types
 import urllib
 
+from oslo_config import cfg
+import oslo_context.context as ctx
+from oslo_log import log as logging
+import six
+
 
 from pypowervm import adapter as adpt
 import pypowervm.const as pc
@@ -32,6 +39,12 @@ import pypowervm.utils.uuid as pvm_uuid
 
 LOG = logging.getLogger(__name__)
 
+CONF = cfg.CONF
+
+# Memoized result of a property value lookup which yielded no value (so the
+# caller's default should be returned).
+_NO_VALUE = object()
+
 
 def _indirect_child_elem(wrap, indirect):
     if indirect is None:
@@ -40,6 +53,82 @@ def _indirect_child_elem(wrap, indirect):
         return ent.Element(indirect, wrap.adapter, children=[wrap.element])
 
 
+_FETCH_EXECUTOR = None
+_FETCH_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_fetch_executor():
+    """The process-wide executor for feed getter GETs, created on first use."""
+    global _FETCH_EXECUTOR
+    with _FETCH_EXECUTOR_LOCK:
+        if _FETCH_EXECUTOR is None:
+            _FETCH_EXECUTOR = futures.ThreadPoolExecutor(
+                max_workers=CONF.pypowervm_feed_getter_workers,
+                thread_name_prefix='pypowervm-get')
+        return _FETCH_EXECUTOR
+
+
+def _fetch_all(func, items):
+    """Return [func(item) for item in items], running the calls concurrently.
+
+    The calls are run on the shared getter executor, so at most
+    CONF.pypowervm_feed_getter_workers GETs are in flight across all getters.
+    Results are in the order of items.  If any call raises, the first such
+    exception (in item order) is raised once all calls have finished.
+
+    :param func: Single-argument callable, typically issuing one REST GET.
+    :param items: Iterable of arguments to func.
+    :return: List of the results of func.
+    """
+    items = list(items)
+    if len(items) < 2 or CONF.pypowervm_feed_getter_workers < 2:
+        return [func(item) for item in items]
+    context = ctx.get_current()
+
+    def wrapped(item):
+        # This is executed in the executor thread.
+        if context is not None:
+            context.update_store()
+        return func(item)
+    executor = _get_fetch_executor()
+    futs = [executor.submit(wrapped, item) for item in items]
+    futures.wait(futs)
+    return [fut.result() for fut in futs]
+
+
+class _CowShare(object):
+    """The number of wrappers sharing XML through Wrapper.copy(cow=True)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 1
+
+    def __deepcopy__(self, memo=None):
+        # A deep copy of a wrapper has XML of its own.
+        return None
+
+    def add(self):
+        """Note that another wrapper shares the XML."""
+        with self._lock:
+            self.count += 1
+
+    def release(self):
+        """Note that a wrapper stops sharing the XML.
+
+        :return: True if other wrappers still share it (so the caller must
+                 copy it); False if the caller was the last.
+        """
+        with self._lock:
+            self.count -= 1
+            return self.count > 0
+
+
+class _ElemListCache(dict):
+    """{(child_class, indirect): WrapperElemList} cached on a Wrapper."""
+    def __deepcopy__(self, memo=None):
+        # The lists of a deep copy must be backed by the copy's XML.
+        return None
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Wrapper(object):
     """Base wrapper object that subclasses should extend.
@@ -79,6 +168,22 @@ class Wrapper(object):
     # @[base_]pvm_type.
     _registered = False
 
+    # {(kind, property_name): value} memo of parsed property values, or None
+    # if memoization is off.  See memoize_values.
+    _val_memo = None
+
+    # The _CowShare of the wrappers with which this wrapper shares its XML,
+    # or None if the XML is its own.  See copy.
+    _cow = None
+
+    # Bumped whenever the XML of this wrapper is changed through its mutators
+    # (or through a WrapperElemList obtained from _elem_list), so that the
+    # cached WrapperElemLists know to find their children again.
+    _gen = 0
+
+    # The _ElemListCache of the lists returned by _elem_list, or None.
+    _elem_lists = None
+
     @classmethod
     def base_pvm_type(cls, cls_):
         """Decorator/method to register a PowerVM base class.
@@ -250,12 +355,115 @@ class Wrapper(object):
         else:
             raise AttributeError(_('Cannot set uuid.'))
 
+    def memoize_values(self, enabled=True):
+        """Turn memoization of this wrapper's property values on or off.
+
+        While on, the _get_val_{type} methods parse each property only once.
+        Changes made through set_parm_value, inject, replace_list and
+        _set_elem_list (and the property setters built on them) clear the memo.
+        Changes made any other way - such as directly to self.element, or
+        through a child wrapper - do not, so only turn this on for wrappers
+        which are read much more than they are modified.
+
+        :param enabled: True to turn memoization on; False to turn it off
+                        (and discard any memoized values).
+        :return: self, for convenience.
+        """
+        self._val_memo = {} if enabled else None
+        return self
+
+    def _clear_memo(self):
+        """Discard memoized property values (see memoize_values)."""
+        if self._val_memo:
+            self._val_memo = {}
+
+    def copy(self, cow=False):
+        """Produce a copy of this wrapper.
+
+        :param cow: If False (the default), the copy is equivalent to
+                    copy.deepcopy(self).  If True, the copy is copy-on-write:
+                    it shares this wrapper's XML until it is first changed
+                    through set_parm_value, inject, replace_list or
+                    _set_elem_list (or the property setters built on them),
+                    at which point it takes a private deep copy.  The same
+                    goes for this wrapper: whichever of the two is changed
+                    first takes the copy.  This makes copies which are only
+                    read nearly free.  While the XML is shared, neither
+                    wrapper may be changed any other way - such as directly
+                    through its element, or through a child wrapper - so only
+                    use this for wrappers which are read but not modified.
+        :return: A new wrapper of the same class.
+        """
+        if not cow:
+            return copy.deepcopy(self)
+        ret = copy.copy(self)
+        if self._cow is None:
+            self._cow = _CowShare()
+        self._cow.add()
+        ret._cow = self._cow
+        ret._elem_lists = None
+        if ret._val_memo is not None:
+            ret._val_memo = dict(ret._val_memo)
+        return ret
+
+    def _detach(self):
+        """Replace the XML of this wrapper with a private deep copy.
+
+        Subclasses whose element is derived from other state (such as
+        EntryWrapper's entry) override this to copy that state instead.
+        """
+        self.element = copy.deepcopy(self.element)
+
+    def _modifying(self):
+        """Prepare for a change through set_parm_value, inject, etc.
+
+        Gives a wrapper sharing its XML through copy(cow=True) its own XML -
+        unless the other wrappers sharing it have already taken theirs - and
+        discards memoized property values (see memoize_values).
+        """
+        if self._cow is not None:
+            if self._cow.release():
+                self._detach()
+                self._elem_lists = None
+            self._cow = None
+        self._gen += 1
+        self._clear_memo()
+
+    def _elem_list(self, root_elem, child_class=None, indirect=None,
+                   **kwargs):
+        """A WrapperElemList owned by this wrapper.
+
+        Takes the same arguments as WrapperElemList.  The list is cached, so
+        that a property built on this returns the same list - and thus the
+        same child wrappers - each time it is accessed, until the container
+        element it wraps is replaced.  The list finds its children again only
+        after this wrapper has been changed through its mutators or through
+        one of its lists.
+        """
+        if root_elem is None:
+            return WrapperElemList(root_elem, child_class=child_class,
+                                   indirect=indirect, **kwargs)
+        if self._elem_lists is None:
+            self._elem_lists = _ElemListCache()
+        key = (child_class, indirect)
+        wel = self._elem_lists.get(key)
+        if (wel is None or wel.root_elem.element is not root_elem.element or
+                set(wel.injects) != set(kwargs) or
+                any(wel.injects[arg] is not val
+                    for arg, val in kwargs.items())):
+            wel = WrapperElemList(root_elem, child_class=child_class,
+                                  indirect=indirect, **kwargs)
+            wel._owner = self
+            self._elem_lists[key] = wel
+        return wel
+
     def inject(self, subelement, replace=True):
         """Injects subelement as a child element, possibly replacing it.
 
         This is pypowervm.adapter.Element.inject, with ordering_list always set
         to self.child_order.
         """
+        self._modifying()
         self.element.inject(subelement, self.child_order, replace=replace)
 
     def _find(self, property_name, use_find_all=False):
@@ -312,6 +520,7 @@ class Wrapper(object):
         :param tag: The string XML tag of the ElementList to assign.
         :param val_iter: Iterable of raw (string) values to set.
         """
+        self._modifying()
         ellist = self._get_elem_list(tag)
         ellist.clear()
         ellist.extend(val_iter)
@@ -353,6 +562,7 @@ class Wrapper(object):
                              [<list of VirtualNICSRIOVBackingDevice wrappers>],
                              indirect='VirtualNICBackingDeviceChoice')
         """
+        self._modifying()
         new_elem = ent.Element(prop_name, self.adapter, attrib=attrib,
                                children=[_indirect_child_elem(child, indirect)
                                          for child in prop_children])
@@ -376,6 +586,7 @@ class Wrapper(object):
         created.  Otherwise this method will throw an exception.
         :param attrib: The element attributes to use if the element is created.
         """
+        self._modifying()
         element_value = self._find(property_name)
         if element_value is None:
             self.log_missing_value(property_name)
@@ -410,7 +621,8 @@ class Wrapper(object):
                             util.sanitize_float_for_api(value, precision=6),
                             create=create)
 
-    def __get_val(self, property_name, default=None, converter=None):
+    def __get_val(self, property_name, default=None, converter=None,
+                  kind=None):
         """Retrieve the value of an element within this wrapper's ElementTree.
 
         This is the baseline for all the _get_val_{type} methods.
@@ -421,17 +633,37 @@ class Wrapper(object):
                           and returning a value of some other type.  The
                           converter callable should raise ValueError if
                           conversion fails.
+        :param kind: String identifying the converter, under which (along with
+                     property_name) the value is memoized if memoize_values is
+                     on.  If None, the value is not memoized.
         :return: The (possibly converted) value corresponding to the identified
                  property.
         """
+        if self._val_memo is None or kind is None:
+            value = self.__parse_val(property_name, converter)
+        else:
+            key = (kind, property_name)
+            try:
+                value = self._val_memo[key]
+            except KeyError:
+                value = self.__parse_val(property_name, converter)
+                self._val_memo[key] = value
+        return default if value is _NO_VALUE else value
+
+    def __parse_val(self, property_name, converter):
+        """Find and convert a property value.  See __get_val.
+
+        :return: The (possibly converted) value, or _NO_VALUE if the property
+                 is not found or its conversion fails.
+        """
         element_value = self._find(property_name)
         if element_value is None:
             self.log_missing_value(property_name)
-            return default
+            return _NO_VALUE
 
         text = element_value.text
         if text is None:
-            return default
+            return _NO_VALUE
 
         if type(text) is str:
             text = text.strip()
@@ -447,7 +679,7 @@ class Wrapper(object):
                                         "pvmobject": self._type_and_uuid})
 
                 LOG.error(message)
-                return default
+                return _NO_VALUE
         return text
 
     def _get_vals(self, property_name):
@@ -480,7 +712,7 @@ class Wrapper(object):
         def str2bool(bool_str):
             return str(bool_str).lower() == 'true'
         return self.__get_val(property_name, default=default,
-                              converter=str2bool)
+                              converter=str2bool, kind='bool')
 
     def _get_val_int(self, property_name, default=None):
         """Gets the integer value of a PowerVM property.
@@ -492,7 +724,8 @@ class Wrapper(object):
                  valid integer.
         :raise ValueError: If the value cannot be converted.
         """
-        return self.__get_val(property_name, default=default, converter=int)
+        return self.__get_val(property_name, default=default, converter=int,
+                              kind='int')
 
     def _get_val_float(self, property_name, default=None):
         """Gets the float value of a PowerVM property.
@@ -504,7 +737,8 @@ class Wrapper(object):
                  valid float.
         :raise ValueError: If the value cannot be converted.
         """
-        return self.__get_val(property_name, default=default, converter=float)
+        return self.__get_val(property_name, default=default, converter=float,
+                              kind='float')
 
     def _get_val_str(self, property_name, default=None):
         """Gets the string value of a PowerVM property.
@@ -515,7 +749,8 @@ class Wrapper(object):
         :return: str value of the property if it is found.  May be the empty
                  string.
         """
-        return self.__get_val(property_name, default=default, converter=None)
+        return self.__get_val(property_name, default=default, converter=None,
+                              kind='str')
 
     def _get_val_percent(self, property_name, default=None):
         """Gets the value in float-percentage format of a PowerVM property.
@@ -533,7 +768,7 @@ class Wrapper(object):
             else:
                 return None
         return self.__get_val(property_name, default=default,
-                              converter=str2percent)
+                              converter=str2percent, kind='percent')
 
     def log_missing_value(self, param):
         LOG.trace('The expected parameter of %(param)s was not found in '
@@ -690,7 +925,8 @@ class EntryWrapper(Wrapper):
 
     @classmethod
     def getter(cls, adapter, entry_uuid=None, parent_class=None,
-               parent_uuid=None, xag=None, parent=None):
+               parent_uuid=None, xag=None, parent=None,
+               invalidation_index=None):
         """Return EntryWrapperGetter or FeedGetter for this EntryWrapper type.
 
         Parameters are the same as described by EntryWrapperGetter.__init__
@@ -700,11 +936,13 @@ class EntryWrapper(Wrapper):
         if entry_uuid is None:
             return FeedGetter(
                 adapter, cls, parent=parent, parent_class=parent_class,
-                parent_uuid=parent_uuid, xag=xag)
+                parent_uuid=parent_uuid, xag=xag,
+                invalidation_index=invalidation_index)
         else:
             return EntryWrapperGetter(
                 adapter, cls, entry_uuid, parent=parent,
-                parent_class=parent_class, parent_uuid=parent_uuid, xag=xag)
+                parent_class=parent_class, parent_uuid=parent_uuid, xag=xag,
+                invalidation_index=invalidation_index)
 
     @classmethod
     def _bld(cls, adapter, tag=None, has_metadata=None, ns=None, attrib=None):
@@ -743,8 +981,10 @@ class EntryWrapper(Wrapper):
                                   request, or an existing adapter.Entry to
                                   wrap.
         :returns: A list of wrappers if response_or_entry is a Response with a
-                  Feed.  A single wrapper if response_or_entry is an Entry or a
-                  Response with an Entry.
+                  Feed.  A generator of wrappers if response_or_entry is a
+                  Response with a streamed Feed (see the stream parameter to
+                  Adapter.read).  A single wrapper if response_or_entry is an
+                  Entry or a Response with an Entry.
         """
         # Process Response if specified.  This recursively calls this method
         # with the entry(s) within the Response.
@@ -754,8 +994,13 @@ class EntryWrapper(Wrapper):
                     response_or_entry.entry,
                     etag=response_or_entry.etag)
             elif response_or_entry.feed is not None:
-                return [cls.wrap(entry, etag=entry.etag)
-                        for entry in response_or_entry.feed.entries]
+                entries = response_or_entry.feed.entries
+                if isinstance(entries, types.GeneratorType):
+                    # Streamed feed (Adapter.read(..., stream=True)).  Wrap
+                    # each entry as it is parsed.
+                    return (cls.wrap(entry, etag=entry.etag)
+                            for entry in entries)
+                return [cls.wrap(entry, etag=entry.etag) for entry in entries]
             else:
                 raise KeyError(_("Response is missing 'entry' property."))
 
@@ -847,7 +1092,9 @@ class EntryWrapper(Wrapper):
                        representing the parent ROOT object of the CHILD to be
                        retrieved.
         :param read_kwargs: Any arguments to be passed directly through to
-                            Adapter.read().
+                            Adapter.read().  Specify stream=True to retrieve a
+                            large feed as a generator which wraps (and yields)
+                            each entry as it is received.
         :return: An EntryWrapper (or list thereof) around the requested REST
                  object.  (Note that this may not be of the type from which the
                  method was invoked, e.g. if the child_type parameter is used.)
@@ -1042,9 +1289,14 @@ class EntryWrapper(Wrapper):
             import pypowervm.tasks.dpo as dpot
             feedwrap = dpot.dpo_objects()
         else:
-            feedwrap = cls.wrap(cls._read_parent_or_child(adapter, target_type,
-                                                          parent_type,
-                                                          parent_uuid, xag=xag))
+            resp = cls._read_parent_or_child(adapter, target_type, parent_type,
+                                             parent_uuid, xag=xag)
+            if key == 'uuid' and not negate and resp.feed is not None:
+                # Index lookup - don't unmarshal the rest of the feed.
+                entry = resp.feed.entry_by_uuid(str(val))
+                return [] if entry is None else [cls.wrap(entry,
+                                                          etag=entry.etag)]
+            feedwrap = cls.wrap(resp)
         retlist = []
         val = str(val)
         for entry in feedwrap:
@@ -1167,6 +1419,9 @@ class EntryWrapper(Wrapper):
     def element(self):
         return self.entry.element
 
+    def _detach(self):
+        self.entry = copy.deepcopy(self.entry)
+
     @property
     def etag(self):
         return self._etag
@@ -1290,6 +1545,14 @@ class WrapperElemList(list):
     property.  This list allows for modification of the 'wrappers' that
     get returned, which update the backing elements.
 
+    The wrappers around the child elements are cached, so the same wrapper
+    instance is returned for the same child.  A list obtained from its owning
+    wrapper (see Wrapper._elem_list) also caches the child elements, and only
+    finds them again after the list is modified through append, extend or
+    remove, or the owning wrapper is changed through its mutators.  Changes
+    made directly to the XML are not noticed by such a list; reacquire it
+    from the owning wrapper's property after changing the XML that way.
+
     This is not a full implementation of a list.  Only the 'common use' methods
     are supported
 
@@ -1341,8 +1604,27 @@ class WrapperElemList(list):
             self.child_class = ElementWrapper
         self.indirect = indirect
         self.injects = kwargs
+        # The owning Wrapper (set by Wrapper._elem_list), or None.
+        self._owner = None
+        # Cached result of __find_elems (never modified in place), and the
+        # _gen of the owner when it was computed.
+        self._elems = None
+        self._gen = None
+        # {etree.Element: wrapper} for the children wrapped so far
+        self._wrappers = {}
+
+    def _invalidate(self):
+        """Discard the cached children (but not the wrappers around them)."""
+        self._elems = None
+        if self._owner is not None:
+            # Other lists of the owner may wrap the same XML.
+            self._owner._gen += 1
 
     def __find_elems(self):
+        owner = self._owner
+        if (owner is not None and self._elems is not None and
+                self._gen == owner._gen):
+            return self._elems
         root_elems = self.root_elem.findall(
             self.indirect) if self.indirect else [self.root_elem]
         found = []
@@ -1352,26 +1634,44 @@ class WrapperElemList(list):
                 found.extend(root_elem.findall(self.child_class.schema_type))
             else:
                 found.extend(list(root_elem))
+        # Drop wrappers of children which are gone.
+        self._wrappers = {elem.element: self._wrappers[elem.element]
+                          for elem in found if elem.element in self._wrappers}
+        self._elems = found
+        if owner is not None:
+            self._gen = owner._gen
         return found
 
+    def __wrap(self, elem):
+        wrap = self._wrappers.get(elem.element)
+        if wrap is None:
+            wrap = self.child_class.wrap(elem, **self.injects)
+            self._wrappers[elem.element] = wrap
+        return wrap
+
     def __getitem__(self, idx):
         if isinstance(idx, slice):
             all_elems = self.__find_elems()
             all_elems = all_elems[idx.start:idx.stop:idx.step]
-            return [self.child_class.wrap(x, **self.injects)
-                    for x in all_elems]
+            return [self.__wrap(x) for x in all_elems]
 
         elem = self.__find_elems()[idx]
-        return self.child_class.wrap(elem, **self.injects)
+        return self.__wrap(elem)
+
+    def __index(self, elem, elems):
+        """Index of an Element in elems - by identity, else by equality."""
+        for i, candidate in enumerate(elems):
+            if candidate.element is elem.element:
+                return i
+        return elems.index(elem)
 
     def index(self, value):
         elems = self.__find_elems()
-        return elems.index(value.element)
+        return self.__index(value.element, elems)
 
     def __getslice__(self, i, j):
         elems = self.__find_elems()
-        return [self.child_class.wrap(x, **self.injects)
-                for x in elems[i:j]]
+        return [self.__wrap(x) for x in elems[i:j]]
 
     def __len__(self, *args, **kwargs):
         return len(self.__find_elems())
@@ -1379,29 +1679,35 @@ class WrapperElemList(list):
     def __iter__(self):
         elems = self.__find_elems()
         for elem in elems:
-            yield self.child_class.wrap(elem, **self.injects)
+            yield self.__wrap(elem)
 
     def __str__(self):
-        return '[' + ', '.join([str(self.child_class.wrap(
-            elem, **self.injects)) for elem in self.__find_elems()]) + ']'
+        return '[' + ', '.join([str(self.__wrap(elem))
+                                for elem in self.__find_elems()]) + ']'
 
     def __repr__(self):
-        return '[' + ', '.join([repr(self.child_class.wrap(
-            elem, **self.injects)) for elem in self.__find_elems()]) + ']'
+        return '[' + ', '.join([repr(self.__wrap(elem))
+                                for elem in self.__find_elems()]) + ']'
 
     def __contains__(self, item):
         elems = self.__find_elems()
-        return item.element in elems
+        try:
+            self.__index(item.element, elems)
+        except ValueError:
+            return False
+        return True
 
     def extend(self, seq):
         for elem in seq:
             self.append(elem)
 
     def append(self, elem):
+        self._invalidate()
         self.root_elem.element.append(
             _indirect_child_elem(elem, self.indirect).element)
 
     def remove(self, elem):
+        self._invalidate()
         find_elem = _indirect_child_elem(elem, self.indirect)
         # Try this way first...if there is a value error, that means
         # that the identical element isn't here...need to try 'functionally
@@ -1514,7 +1820,8 @@ class EntryWrapperGetter(object):
     requiring a retry.
     """
     def __init__(self, adapter, entry_class, entry_uuid, parent_class=None,
-                 parent_uuid=None, xag=None, parent=None):
+                 parent_uuid=None, xag=None, parent=None,
+                 invalidation_index=None):
         """Create a GET specification for an EntryWrapper.
 
         :param adapter: A pypowervm.adapter.Adapter instance through which the
@@ -1534,6 +1841,11 @@ class EntryWrapperGetter(object):
         :param parent: If the target object type is CHILD, specify either the
                        parent parameter or BOTH parent_class and parent_uuid.
                        This parameter represents the ROOT parent object.
+        :param invalidation_index: (Optional) A pypowervm.cache.GenerationIndex
+                                   (see Session.get_invalidation_index).  If
+                                   specified, get(refresh=True) skips the
+                                   refresh if no event has been received for
+                                   the object since it was last fetched.
         """
         def validate_wrapper_type(var):
             if not issubclass(type(var), type) or not issubclass(var, Wrapper):
@@ -1551,7 +1863,22 @@ class EntryWrapperGetter(object):
         self.parent_class = parent_class
         self.parent_uuid = parent_uuid
         self.xag = xag
+        self.invalidation_index = invalidation_index
         self.cache = None
+        # Generation token of the cached data.  See invalidation_index.
+        self._token = None
+
+    def _index_token(self):
+        """Current GenerationIndex token for the target, or None."""
+        if self.invalidation_index is None:
+            return None
+        return self.invalidation_index.token(
+            schema_type=self.entry_class.schema_type, uuid=self.entry_uuid)
+
+    def _unchanged(self):
+        """Whether the index guarantees the cached data is still current."""
+        return (self.cache is not None and self._token is not None and
+                self._token == self._index_token())
 
     def get(self, refresh=False):
         """Return the EntryWrapper indicated by this instance.
@@ -1563,13 +1890,17 @@ class EntryWrapperGetter(object):
 
         :param refresh: (Optional) If True, and the specified EntryWrapper was
                         previously retrieved, it is refreshed before being
-                        returned.  If False (the default), it is returned
+                        returned (unless the invalidation_index shows it has
+                        not changed).  If False (the default), it is returned
                         without refreshing.  If the specified EntryWrapper had
                         not yet been retrieved, this parameter has no effect.
         :return: The EntryWrapper specified by this EntryWrapperGetter
                  instance.
         """
         if self.cache is None:
+            # Capture the token *before* the GET so that an event arriving
+            # while it is in flight is not lost.
+            self._token = self._index_token()
             if self.parent_class:
                 root_type = self.parent_class
                 root_id = self.parent_uuid
@@ -1583,7 +1914,8 @@ class EntryWrapperGetter(object):
             self.cache = self.entry_class.wrap(self.adapter.read(
                 root_type, root_id, child_type=child_type, child_id=child_id,
                 xag=self.xag))
-        elif refresh:
+        elif refresh and not self._unchanged():
+            self._token = self._index_token()
             self.cache = self.cache.refresh()
         return self.cache
 
@@ -1607,7 +1939,8 @@ class FeedGetter(EntryWrapperGetter):
     a retry.
     """
     def __init__(self, adapter, entry_class, parent_class=None,
-                 parent_uuid=None, xag=None, parent=None):
+                 parent_uuid=None, xag=None, parent=None,
+                 invalidation_index=None):
         """Create a GET specification for an EntryWrapper feed.
 
         :param adapter: A pypowervm.adapter.Adapter instance through which the
@@ -1626,11 +1959,18 @@ class FeedGetter(EntryWrapperGetter):
         :param parent: If the target object type is CHILD, specify either the
                        parent parameter or BOTH parent_class and parent_uuid.
                        This parameter represents the ROOT parent object.
+        :param invalidation_index: (Optional) A pypowervm.cache.GenerationIndex
+                                   (see Session.get_invalidation_index).  If
+                                   specified, get(refresh=True) and
+                                   get(refetch=True) return the cached feed if
+                                   no event has been received for any object
+                                   of the feed's type since it was fetched.
         """
         # Using entry_uuid=None will cause the GET to fetch the feed.
         super(FeedGetter, self).__init__(
             adapter, entry_class, None, parent=parent,
-            parent_class=parent_class, parent_uuid=parent_uuid, xag=xag)
+            parent_class=parent_class, parent_uuid=parent_uuid, xag=xag,
+            invalidation_index=invalidation_index)
 
     def get(self, refresh=False, refetch=False):
         """Return the feed (list of EntryWrappers) indicated by this instance.
@@ -1644,8 +1984,10 @@ class FeedGetter(EntryWrapperGetter):
         refreshed if previously cached.  The refetch option, if True, will
         cause the feed to be refetched as a whole.
 
-        Note: due to the design of the REST server, refetch will generally
-        perform better than refresh.
+        The entries are refreshed concurrently (see
+        CONF.pypowervm_feed_getter_workers), each with its etag, so unchanged
+        entries are not re-sent by the server.  Even so, due to the design of
+        the REST server, refetch will generally perform better than refresh.
 
         :param refresh: (Optional) If True, and the specified feed was
                         previously retrieved, each entry therein is refreshed
@@ -1664,10 +2006,14 @@ class FeedGetter(EntryWrapperGetter):
         # Note: self.cache is the feed (list of EntryWrapper) in the context of
         # this subclass.  Therefore, the superclass's concept of 'refresh' is
         # no good (it would be trying [ewrap, ...].refresh()).
+        if (refresh or refetch) and self._unchanged():
+            return self.cache
+
         if refresh and self.cache is not None:
-            # Future: parallelize, for what it's worth.
-            new_feed = [ewrap.refresh() for ewrap in self.cache]
-            self.cache = new_feed
+            self._token = self._index_token()
+            # Each refresh sends the entry's etag, so entries which have not
+            # changed cost a 304 and are kept as is.
+            self.cache = _fetch_all(lambda wrp: wrp.refresh(), self.cache)
             return self.cache
 
         # To refetch, simply wipe the cache before super.get().
@@ -1688,7 +2034,8 @@ class UUIDFeedGetter(FeedGetter):
       is not sufficient.
     """
     def __init__(self, adapter, entry_class, uuid_list, parent_class=None,
-                 parent_uuid=None, xag=None, parent=None):
+                 parent_uuid=None, xag=None, parent=None,
+                 invalidation_index=None):
         """Create a UUIDFeedGetter.
 
         :param adapter: See FeedGetter.
@@ -1699,10 +2046,13 @@ class UUIDFeedGetter(FeedGetter):
         :param parent_uuid: See FeedGetter.
         :param xag: See FeedGetter.
         :param parent: See FeedGetter.
+        :param invalidation_index: See EntryWrapperGetter.  Applied to each
+                                   individual object.
         """
         super(UUIDFeedGetter, self).__init__(
             adapter, entry_class, parent=parent, parent_class=parent_class,
-            parent_uuid=parent_uuid, xag=xag)
+            parent_uuid=parent_uuid, xag=xag,
+            invalidation_index=invalidation_index)
         self.uuid_list = uuid_list
         self._create_wrapper_getters()
 
@@ -1710,11 +2060,15 @@ class UUIDFeedGetter(FeedGetter):
         self.wrapper_getters = [EntryWrapperGetter(
             self.adapter, self.entry_class, entry_uuid,
             parent_class=self.parent_class, parent_uuid=self.parent_uuid,
-            xag=self.xag) for entry_uuid in self.uuid_list]
+            xag=self.xag, invalidation_index=self.invalidation_index)
+            for entry_uuid in self.uuid_list]
 
     def get(self, refresh=False, refetch=False):
         """Get the individual wrappers for each UUID and put them in a 'feed'.
 
+        The wrappers are fetched (or refreshed) concurrently; see
+        CONF.pypowervm_feed_getter_workers.
+
         :param refresh: See FeedGetter.get.
         :param refetch: See FeedGetter.get.
         """
@@ -1723,5 +2077,5 @@ class UUIDFeedGetter(FeedGetter):
             # already fetched
             self._create_wrapper_getters()
         # Populate the quasi-feed from the individual wrapper getters.
-        # Future: parallelize, for what it's worth.
-        return [wg.get(refresh=refresh) for wg in self.wrapper_getters]
+        return _fetch_all(lambda wg: wg.get(refresh=refresh),
+                          self.wrapper_getters)
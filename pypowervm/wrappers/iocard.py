@@ -353,8 +353,8 @@ class PhysFCAdapter(IOAdapter):
         The set of PhysFCPort's that are attached to this adapter.
         The data on this should be considered read only.
         """
-        es = ewrap.WrapperElemList(self._find_or_seed(PFC_PORTS_ROOT),
-                                   PhysFCPort)
+        es = self._elem_list(self._find_or_seed(PFC_PORTS_ROOT),
+                             PhysFCPort)
         return es
 
 
@@ -440,21 +440,21 @@ class SRIOVAdapter(IOAdapter):
         elem = self._find(_SRIOV_CONVERGED_ETHERNET_PHYSICAL_PORTS)
         if elem is None:
             return None
-        return ewrap.WrapperElemList(elem, child_class=SRIOVConvPPort)
+        return self._elem_list(elem, child_class=SRIOVConvPPort)
 
     def _rocephysicalports(self):
         """Retrieve all RoCE adapter physical ethernet ports."""
         elem = self._find(_ROCE_SRIOV_PHYSICAL_PORTS)
         if elem is None:
             return None
-        return ewrap.WrapperElemList(elem, child_class=SRIOVRoCEPPort)
+        return self._elem_list(elem, child_class=SRIOVRoCEPPort)
 
     def _ethernetphysicalports(self):
         """Retrieve all Ethernet physical ports."""
         elem = self._find(_SRIOV_ETHERNET_PHYSICAL_PORTS)
         if elem is None:
             return None
-        return ewrap.WrapperElemList(elem, child_class=SRIOVEthPPort)
+        return self._elem_list(elem, child_class=SRIOVEthPPort)
 
     @property
     def phys_ports(self):
@@ -943,9 +943,9 @@ class VNIC(ewrap.EntryWrapper):
 
     @property
     def back_devs(self):
-        return ewrap.WrapperElemList(self._find_or_seed(_VNIC_BACK_DEVS),
-                                     child_class=VNICBackDev,
-                                     indirect=_VNICBD_CHOICE)
+        return self._elem_list(self._find_or_seed(_VNIC_BACK_DEVS),
+                               child_class=VNICBackDev,
+                               indirect=_VNICBD_CHOICE)
 
     @back_devs.setter
     def back_devs(self, new_devs):
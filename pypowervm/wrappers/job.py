@@ -16,13 +16,17 @@
 
 """EntryWrapper, constants, and enums around Job ('web' namespace)."""
 
+from concurrent import futures
 import threading
 import time
+import warnings
+import weakref
 
 from oslo_config import cfg
 from oslo_log import log as logging
 import six
 
+from pypowervm import adapter as adpt
 import pypowervm.const as pc
 import pypowervm.entities as ent
 import pypowervm.exceptions as pvmex
@@ -47,6 +51,16 @@ _JOB_STACKTRACE = u.xpath(_RESPONSE_EXCEPTION, 'StackTrace')
 _JOB_STATUS = 'Status'
 _JOB_ID = 'JobID'
 
+# A Job is first polled this many seconds after monitoring starts...
+_POLL_INITIAL_INTERVAL = 0.5
+# ...and the interval grows by this factor each time the Job is found still
+# running, up to CONF.pypowervm_job_poll_max_interval.
+_POLL_BACKOFF = 1.5
+# Log a warning each time a Job has been monitored this many seconds longer.
+_POLL_WARN_INTERVAL = 300
+# The monitor thread exits after this many seconds with no Jobs to monitor.
+_MONITOR_IDLE_TIMEOUT = 60
+
 
 class JobStatus(object):
     NOT_ACTIVE = 'NOT_STARTED'
@@ -56,31 +70,264 @@ class JobStatus(object):
     COMPLETED_WITH_ERROR = 'COMPLETED_WITH_ERROR'
 
 
+def _job_id_from_href(href):
+    """Extract the Job ID from a Job URI, or None if href isn't one."""
+    path = u.dice_href(href, include_query=False, include_fragment=False)
+    segments = path.rstrip('/').split('/')
+    for i, segment in enumerate(segments[:-1]):
+        if segment.lower() == _JOBS:
+            return segments[i + 1]
+    return None
+
+
+class _JobWatch(object):
+    """A Job being monitored by the _JobMonitor."""
+    def __init__(self, job, statuses, timeout, sensitive):
+        self.job = job
+        self.job_id = job.job_id
+        self.statuses = statuses
+        self.sensitive = sensitive
+        self.start = time.time()
+        self.deadline = self.start + timeout if timeout else None
+        self.interval = _POLL_INITIAL_INTERVAL
+        self.next_poll = self.start + self.interval
+        self.next_warning = self.start + _POLL_WARN_INTERVAL
+        # Set if the event feed reported a change to the Job while it was
+        # being polled.
+        self.woken = False
+        self.future = futures.Future()
+
+
+class _JobEventHandler(adpt.EventHandler):
+    """Wakes the _JobMonitor for Jobs reported by the event feed."""
+    def __init__(self, monitor):
+        self._monitor = monitor
+
+    def process(self, events):
+        for href in events:
+            if href == 'general':
+                # We may have missed events.
+                self._monitor.wake()
+                continue
+            job_id = _job_id_from_href(href) if href else None
+            if job_id:
+                self._monitor.wake(job_id=job_id)
+
+
+class _JobMonitor(object):
+    """Monitors all outstanding Jobs from a single thread.
+
+    Each Job is polled (via read_job) with an interval starting at
+    _POLL_INITIAL_INTERVAL and backing off to
+    CONF.pypowervm_job_poll_max_interval while it remains unchanged.  If the
+    Job's Session has an event listener, the Job is also polled as soon as the
+    event feed reports a change to its URI.
+
+    The thread is started on demand, and exits once it has been idle for
+    _MONITOR_IDLE_TIMEOUT seconds.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._watches = []
+        self._thread = None
+        # Sessions whose event listener we have subscribed to.
+        self._sessions = weakref.WeakSet()
+
+    def watch(self, job, statuses, timeout, sensitive):
+        """Start monitoring a Job.
+
+        :param job: The Job wrapper.  Its entry is refreshed by each poll.
+        :param statuses: Iterable of JobStatus enum values.  The Job is
+                         monitored as long as its status is in this list.
+        :param timeout: Maximum number of seconds to monitor the Job.  If
+                        zero, monitor indefinitely.
+        :param sensitive: If True, mask the Job payload in the logs.
+        :return: A concurrent.futures.Future whose result is True if the
+                 timeout was reached before the Job left the specified set of
+                 states; False otherwise.  If reading the Job fails, the
+                 Future raises the exception.
+        """
+        watch = _JobWatch(job, statuses, timeout, sensitive)
+        self._subscribe(job.adapter)
+        with self._cond:
+            self._watches.append(watch)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='pypowervm-job-monitor')
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        return watch.future
+
+    def wake(self, job_id=None):
+        """Poll Job(s) right away.
+
+        :param job_id: The ID of the Job to poll.  If None, all Jobs are
+                       polled.
+        """
+        with self._cond:
+            now = time.time()
+            for watch in self._watches:
+                if job_id is None or watch.job_id == job_id:
+                    watch.next_poll = now
+                    watch.woken = True
+            self._cond.notify()
+
+    def _subscribe(self, adapter):
+        """Subscribe to the event listener of the adapter's Session, if any.
+
+        We don't start an event listener just for this; but if one is already
+        running, it tells us when to poll Jobs.
+        """
+        session = getattr(adapter, 'session', None)
+        if session is None or not session.has_event_listener:
+            return
+        with self._cond:
+            if session in self._sessions:
+                return
+            self._sessions.add(session)
+        try:
+            session.get_event_listener().subscribe(_JobEventHandler(self))
+        except Exception as e:
+            LOG.debug("Not using events to monitor Jobs: %s", e)
+
+    def _due(self):
+        now = time.time()
+        return [watch for watch in self._watches if watch.next_poll <= now]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                due = self._due()
+                while not due:
+                    if not self._watches:
+                        self._cond.wait(_MONITOR_IDLE_TIMEOUT)
+                        if not self._watches:
+                            self._thread = None
+                            return
+                    else:
+                        self._cond.wait(max(0, min(
+                            watch.next_poll for watch in self._watches) -
+                            time.time()))
+                    due = self._due()
+                for watch in due:
+                    watch.woken = False
+            for watch in due:
+                self._poll(watch)
+
+    def _poll(self, watch):
+        job = watch.job
+        try:
+            job.entry = job.adapter.read_job(
+                watch.job_id, sensitive=watch.sensitive).entry
+            status = job.job_status
+        except Exception as e:
+            self._finish(watch, exc=e)
+            return
+        now = time.time()
+        if status not in watch.statuses:
+            self._finish(watch, False)
+            return
+        if watch.deadline is not None and now >= watch.deadline:
+            self._finish(watch, True)
+            return
+        if now >= watch.next_warning:
+            msg = _("Job %(job_id)s monitoring for %(time)i seconds.")
+            LOG.warning(msg, {'job_id': watch.job_id,
+                              'time': now - watch.start})
+            watch.next_warning += _POLL_WARN_INTERVAL
+        with self._cond:
+            watch.interval = min(watch.interval * _POLL_BACKOFF,
+                                 CONF.pypowervm_job_poll_max_interval)
+            if not watch.woken:
+                watch.next_poll = now + watch.interval
+                if watch.deadline is not None:
+                    watch.next_poll = min(watch.next_poll, watch.deadline)
+
+    def _finish(self, watch, timed_out=False, exc=None):
+        with self._cond:
+            self._watches.remove(watch)
+        # Do this outside the lock: it runs the Future's callbacks.  These
+        # must not block (see _on_executor).
+        if exc is not None:
+            watch.future.set_exception(exc)
+        else:
+            watch.future.set_result(timed_out)
+
+
+_MONITOR = _JobMonitor()
+
+# Executor on which run_job_async creates jobs.  See _get_executor.
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor():
+    """The process-wide executor for run_job_async, created on first use."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = futures.ThreadPoolExecutor(
+                max_workers=CONF.pypowervm_job_async_workers,
+                thread_name_prefix='pypowervm-job')
+        return _EXECUTOR
+
+
+def _on_executor(func, *args, **kwargs):
+    """Make a Future done callback that runs func on the executor.
+
+    Futures from the job monitor complete - and so run their done callbacks -
+    on the monitor thread.  A callback that blocks (on a REST call, or on
+    another Job) would stall the polling of every Job, so anything more than
+    trivial is handed off to the executor instead.
+
+    :param func: Invoked as func(future, *args, **kwargs) on the executor.
+    :return: A callable suitable for Future.add_done_callback.
+    """
+    def callback(future):
+        _get_executor().submit(func, future, *args, **kwargs)
+    return callback
+
+
 class PollAndDeleteThread(threading.Thread):
+    """Deprecated.  Waits for a Job to finish, then deletes it.
+
+    Job.run_job no longer uses this: the job monitor deletes Jobs run with
+    synchronous=False when they finish.
+    """
     def __init__(self, job, sensitive):
+        warnings.warn(_("PollAndDeleteThread is deprecated and will be "
+                        "removed in a future release.  The job monitor "
+                        "deletes Jobs run with synchronous=False when they "
+                        "finish."),
+                      DeprecationWarning)
         super(PollAndDeleteThread, self).__init__()
         self.job = job
         self.sensitive = sensitive
 
     def run(self):
-        self.job.poll_while_status([JobStatus.RUNNING], 0, self.sensitive)
-        self.job.delete_job()
-        # If the Job failed, we still want to log it.
-        if self.job.job_status != JobStatus.COMPLETED_OK:
-            exc = pvmex.JobRequestFailed(
-                operation_name=self.job.op, error=self.job.get_job_message())
-            LOG.error(exc.args[0])
+        self.job._delete_when_done(self.job._poll_future(
+            [JobStatus.RUNNING], 0, self.sensitive))
 
 
 class CancelJobThread(threading.Thread):
+    """Deprecated.  Waits for a cancelled Job to finish, then deletes it.
+
+    Job.cancel_job no longer uses this: the job monitor deletes cancelled
+    Jobs when they finish.
+    """
     def __init__(self, job, sensitive):
+        warnings.warn(_("CancelJobThread is deprecated and will be removed in "
+                        "a future release.  Job.cancel_job deletes the Job "
+                        "when it finishes."), DeprecationWarning)
         super(CancelJobThread, self).__init__()
         self.job = job
         self.sensitive = sensitive
 
     def run(self):
-        self.job._monitor_job(timeout=0, sensitive=self.sensitive)
-        self.job.delete_job()
+        self.job._delete_when_done(self.job._poll_future(
+            [JobStatus.RUNNING, JobStatus.NOT_ACTIVE], 0, self.sensitive),
+            log_failure=False)
 
 
 @ewrap.EntryWrapper.pvm_type('Job', ns=pc.WEB_NS)
@@ -220,6 +467,68 @@ class Job(ewrap.EntryWrapper):
         :raise JobRequestFailed: if the job did not complete successfully.
         :raise JobRequestTimedOut: if the job timed out.
         """
+        self._create_job(uuid, job_parms, sensitive)
+        timed_out = self._monitor_job(
+            timeout=timeout, sensitive=sensitive, synchronous=synchronous)
+        self._check_job(timed_out, timeout, synchronous=synchronous)
+
+    def run_job_async(self, uuid, job_parms=None,
+                      timeout=CONF.pypowervm_job_request_timeout,
+                      sensitive=False):
+        """Invokes a job, returning a Future for its completion.
+
+        Like run_job, but the job is created on a bounded, process-wide
+        executor (see CONF.pypowervm_job_async_workers) and monitored by the
+        job monitor, so many jobs can be run at once without a thread for
+        each.  For example:
+
+            futs = [job.run_job_async(lpar.uuid) for job, lpar in ...]
+            for fut in futures.as_completed(futs):
+                ...
+
+        :param uuid: uuid of the target
+        :param job_parms: list of JobParamters to add
+        :param timeout: maximum number of seconds for job to complete
+        :param sensitive: If True, mask the Job payload in the logs.
+        :return: A concurrent.futures.Future.  Its result is this Job wrapper,
+                 refreshed with the final state of the job.  If the job did
+                 not complete successfully, it raises JobRequestFailed; if the
+                 job timed out, JobRequestTimedOut.
+        """
+        result = futures.Future()
+
+        def finish(poll_future):
+            try:
+                self._check_job(poll_future.result(), timeout)
+            except Exception as exc:
+                result.set_exception(exc)
+            else:
+                result.set_result(self)
+
+        def start():
+            if not result.set_running_or_notify_cancel():
+                return
+            try:
+                self._create_job(uuid, job_parms, sensitive)
+                poll_future = self._poll_future(
+                    [JobStatus.RUNNING, JobStatus.NOT_ACTIVE], timeout,
+                    sensitive)
+            except Exception as exc:
+                result.set_exception(exc)
+                return
+            # Check (and delete or cancel) the job on the executor rather
+            # than the job monitor thread.  This also keeps the callbacks of
+            # the returned Future off the monitor thread.
+            poll_future.add_done_callback(_on_executor(finish))
+
+        _get_executor().submit(start)
+        return result
+
+    def _create_job(self, uuid, job_parms, sensitive):
+        """Add the job parameters, and create (start) the job.
+
+        :raise JobRequestFailed: if the job could not be created.
+        """
         if job_parms:
             self.add_job_parameters_to_existing(*job_parms)
         try:
@@ -229,8 +538,18 @@ class Job(ewrap.EntryWrapper):
         except pvmex.Error as exc:
             LOG.exception(exc)
             raise pvmex.JobRequestFailed(operation_name=self.op, error=exc)
-        timed_out = self._monitor_job(
-            timeout=timeout, sensitive=sensitive, synchronous=synchronous)
+
+    def _check_job(self, timed_out, timeout, synchronous=True):
+        """Clean up a monitored job, raising if it did not succeed.
+
+        :param timed_out: True if monitoring the job timed out.
+        :param timeout: The timeout, in seconds, for the exception message.
+        :param synchronous: If False, the job is still running (and the job
+                            monitor will delete it when done), so only check
+                            for the timeout.
+        :raise JobRequestFailed: if the job did not complete successfully.
+        :raise JobRequestTimedOut: if the job timed out.
+        """
         if timed_out:
             try:
                 self.cancel_job()
@@ -241,7 +560,7 @@ class Job(ewrap.EntryWrapper):
             LOG.error(exc.args[0])
             raise exc
         if not synchronous:
-            # _monitor_job spawned a subthread that will delete_job when done.
+            # The job monitor will delete_job when done.
             return
         self.delete_job()
         if self.job_status != JobStatus.COMPLETED_OK:
@@ -253,6 +572,9 @@ class Job(ewrap.EntryWrapper):
     def poll_while_status(self, statuses, timeout, sensitive):
         """Poll the Job as long as its status is in the specified list.
 
+        The polling is done by a monitor shared by all Jobs; this method blocks
+        until it is done.
+
         :param statuses: Iterable of JobStatus enum values.  This method
                          continues to poll the Job as long as its status is
                          in the specified list, or until the timeout is
@@ -263,23 +585,19 @@ class Job(ewrap.EntryWrapper):
         :return: timed_out: True if the timeout was reached before the Job
                             left the specified set of states.
         """
-        start_time = time.time()
-        iteration_count = 1
-        while self.job_status in statuses:
-            elapsed_time = time.time() - start_time
-            if timeout:
-                # wait up to timeout seconds
-                if elapsed_time > timeout:
-                    return True
-            # Log a warning every 5 minutes
-            if not iteration_count % 300:
-                msg = _("Job %(job_id)s monitoring for %(time)i seconds.")
-                LOG.warning(msg, {'job_id': self.job_id, 'time': elapsed_time})
-            time.sleep(1)
-            self.entry = self.adapter.read_job(
-                self.job_id, sensitive=sensitive).entry
-            iteration_count += 1
-        return False
+        return self._poll_future(statuses, timeout, sensitive).result()
+
+    def _poll_future(self, statuses, timeout, sensitive):
+        """Like poll_while_status, but return a Future rather than blocking.
+
+        :return: A concurrent.futures.Future whose result is the timed_out
+                 value described in poll_while_status.
+        """
+        if self.job_status not in statuses:
+            future = futures.Future()
+            future.set_result(False)
+            return future
+        return _MONITOR.watch(self, statuses, timeout, sensitive)
 
     def _monitor_job(self, timeout=CONF.pypowervm_job_request_timeout,
                      sensitive=False, synchronous=True):
@@ -297,8 +615,8 @@ class Job(ewrap.EntryWrapper):
                             still time out (if the Job hasn't started within
                             the requested timeout.)  If synchronous=True, the
                             caller must delete the Job (self.delete_job()); if
-                            False, this method spawns a subthread that deletes
-                            it when it finishes.
+                            False, the job monitor deletes it when it
+                            finishes.
         :returns timed_out: boolean True if timed out waiting for job
                             completion
         """
@@ -306,19 +624,41 @@ class Job(ewrap.EntryWrapper):
             return self.poll_while_status(
                 [JobStatus.RUNNING, JobStatus.NOT_ACTIVE], timeout, sensitive)
 
-        # Asynchronous: wait for the Job to start, then spawn a thread to wait
-        # (indefinitely) for it to finish, and delete it when done.
+        # Asynchronous: wait for the Job to start, then have the job monitor
+        # wait (indefinitely) for it to finish, and delete it when done.
         if self.poll_while_status([JobStatus.NOT_ACTIVE], timeout, sensitive):
             return True
 
-        PollAndDeleteThread(self, sensitive).start()
+        self._poll_future([JobStatus.RUNNING], 0, sensitive).add_done_callback(
+            _on_executor(self._delete_when_done))
         return False
 
+    def _delete_when_done(self, future, log_failure=True):
+        """Delete the Job once the Future from _poll_future completes.
+
+        Invoked on the executor (see _on_executor), since delete_job makes a
+        REST call.
+
+        :param future: The completed Future.
+        :param log_failure: If True, and the Job did not complete successfully,
+                            log an error.
+        """
+        if future.exception() is not None:
+            LOG.error(_("Failed to monitor job %(job_id)s: %(error)s"),
+                      {'job_id': self.job_id, 'error': future.exception()})
+            return
+        self.delete_job()
+        # If the Job failed, we still want to log it.
+        if log_failure and self.job_status != JobStatus.COMPLETED_OK:
+            exc = pvmex.JobRequestFailed(
+                operation_name=self.op, error=self.get_job_message())
+            LOG.error(exc.args[0])
+
     def cancel_job(self, sensitive=False):
         """Cancels and deletes incomplete/running jobs.
 
-        This method spawns a thread to monitor the job being cancelled
-        and delete it.
+        The job monitor waits for the cancelled job to finish, and deletes
+        it.
 
         :param sensitive: If True, payload will be hidden in the logs
         """
@@ -332,7 +672,10 @@ class Job(ewrap.EntryWrapper):
                                 suffix_type='cancel')
         except pvmex.Error as exc:
             LOG.exception(exc)
-        CancelJobThread(self, sensitive).start()
+        self._poll_future(
+            [JobStatus.RUNNING, JobStatus.NOT_ACTIVE], 0, sensitive
+        ).add_done_callback(
+            _on_executor(self._delete_when_done, log_failure=False))
 
     def delete_job(self):
         """Cleans this Job off of the REST server, if it is completed.
@@ -599,7 +599,7 @@ class ASIOConfig(ewrap.ElementWrapper):
 
     @property
     def io_slots(self):
-        es = ewrap.WrapperElemList(self._find_or_seed(_ASIO_IOSLOTS), IOSlot)
+        es = self._elem_list(self._find_or_seed(_ASIO_IOSLOTS), IOSlot)
         return es
 
     @property
@@ -608,9 +608,9 @@ class ASIOConfig(ewrap.ElementWrapper):
 
     @property
     def sriov_adapters(self):
-        es = ewrap.WrapperElemList(self._find_or_seed(_ASIO_SRIOVS),
-                                   child_class=card.SRIOVAdapter,
-                                   indirect='IOAdapterChoice')
+        es = self._elem_list(self._find_or_seed(_ASIO_SRIOVS),
+                             child_class=card.SRIOVAdapter,
+                             indirect='IOAdapterChoice')
         return es
 
 
@@ -851,7 +851,7 @@ class VirtualSoftwareTiers(ewrap.ElementWrapper):
 
     @property
     def virtual_software_tier(self):
-        es = ewrap.WrapperElemList(self.element, IBMiVirtualSoftwareTier)
+        es = self._elem_list(self.element, IBMiVirtualSoftwareTier)
         return es
 
 
@@ -85,8 +85,8 @@ class ManagementConsole(ewrap.EntryWrapper):
         The returned tuple contains the keys as plain strings.
         """
         return tuple(key_w.key for key_w in
-                     ewrap.WrapperElemList(self._find_or_seed(_AUTH_KEYS),
-                                           AuthorizedKey))
+                     self._elem_list(self._find_or_seed(_AUTH_KEYS),
+                                     AuthorizedKey))
 
     @ssh_authorized_keys.setter
     def ssh_authorized_keys(self, keys):
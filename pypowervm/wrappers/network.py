@@ -396,7 +396,7 @@ class NetBridge(ewrap.EntryWrapper):
     @property
     def seas(self):
         """Returns a list of SEA wrappers."""
-        return ewrap.WrapperElemList(self.entry.element.find(NB_SEAS), SEA)
+        return self._elem_list(self.entry.element.find(NB_SEAS), SEA)
 
     @seas.setter
     def seas(self, new_list):
@@ -909,8 +909,8 @@ class LoadGroup(ewrap.ElementWrapper):
 
         :return: list of TrunkAdapter objects.
         """
-        return ewrap.WrapperElemList(self.element.find(_LG_TRUNKS),
-                                     TrunkAdapter)
+        return self._elem_list(self.element.find(_LG_TRUNKS),
+                               TrunkAdapter)
 
     @trunk_adapters.setter
     def trunk_adapters(self, new_list):
@@ -380,8 +380,8 @@ class VG(ewrap.EntryWrapper):
     @property
     def vmedia_repos(self):
         """Returns a list of  wrappers."""
-        es = ewrap.WrapperElemList(self._find_or_seed(_VG_MEDIA_REPOS),
-                                   VMediaRepos)
+        es = self._elem_list(self._find_or_seed(_VG_MEDIA_REPOS),
+                             VMediaRepos)
         return es
 
     @vmedia_repos.setter
@@ -398,8 +398,8 @@ class VG(ewrap.EntryWrapper):
         """Returns a list of the Physical Volumes that back this repo."""
         # TODO(efried): parent_entry=self not needed once VIOS supports pg83
         # descriptor in Events
-        es = ewrap.WrapperElemList(self._find_or_seed(_VG_PHS_VOLS), PV,
-                                   parent_entry=self)
+        es = self._elem_list(self._find_or_seed(_VG_PHS_VOLS), PV,
+                             parent_entry=self)
         return es
 
     @phys_vols.setter
@@ -414,7 +414,7 @@ class VG(ewrap.EntryWrapper):
     @property
     def virtual_disks(self):
         """Returns a list of the Virtual Disks that are in the repo."""
-        es = ewrap.WrapperElemList(self._find_or_seed(_VG_VDISKS), VDisk)
+        es = self._elem_list(self._find_or_seed(_VG_VDISKS), VDisk)
         return es
 
     @virtual_disks.setter
@@ -460,7 +460,7 @@ class VMediaRepos(ewrap.ElementWrapper):
     def optical_media(self):
         """Returns a list of the VirtualOpticalMedia devices in the repo."""
         seed = self._find_or_seed(_VREPO_OPTICAL_MEDIA_ROOT)
-        return ewrap.WrapperElemList(seed, VOptMedia)
+        return self._elem_list(seed, VOptMedia)
 
     @optical_media.setter
     def optical_media(self, new_media):
@@ -1440,7 +1440,7 @@ class SSP(ewrap.EntryWrapper):
     @property
     def logical_units(self):
         """WrapperElemList of LU wrappers."""
-        return ewrap.WrapperElemList(self._find_or_seed(_SSP_LUS), LU)
+        return self._elem_list(self._find_or_seed(_SSP_LUS), LU)
 
     @logical_units.setter
     def logical_units(self, lus):
@@ -1449,7 +1449,7 @@ class SSP(ewrap.EntryWrapper):
     @property
     def physical_volumes(self):
         """WrapperElemList of PV wrappers."""
-        return ewrap.WrapperElemList(self._find_or_seed(_SSP_PVS), PV)
+        return self._elem_list(self._find_or_seed(_SSP_PVS), PV)
 
     @physical_volumes.setter
     def physical_volumes(self, pvs):
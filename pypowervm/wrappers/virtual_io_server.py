@@ -311,7 +311,7 @@ class VIOS(bp.BasePartition):
     @ewrap.Wrapper.xag_property(c.XAG.VIO_FMAP)
     def vfc_mappings(self):
         """Returns a WrapperElemList of the VFCMapping objects."""
-        es = ewrap.WrapperElemList(self._find_or_seed(
+        es = self._elem_list(self._find_or_seed(
             _VIO_VFC_MAPPINGS, attrib=u.xag_attrs(c.XAG.VIO_FMAP)), VFCMapping)
         return es
 
@@ -324,7 +324,7 @@ class VIOS(bp.BasePartition):
     def scsi_mappings(self):
         """Returns a WrapperElemList of the VSCSIMapping objects."""
         # TODO(efried): remove parent_entry once VIOS has pg83 in Events
-        es = ewrap.WrapperElemList(
+        es = self._elem_list(
             self._find_or_seed(_VIO_VSCSI_MAPPINGS,
                                attrib=u.xag_attrs(c.XAG.VIO_SMAP)),
             VSCSIMapping, parent_entry=self)
@@ -337,13 +337,13 @@ class VIOS(bp.BasePartition):
 
     @ewrap.Wrapper.xag_property(c.XAG.VIO_NET)
     def seas(self):
-        es = ewrap.WrapperElemList(self._find_or_seed(
+        es = self._elem_list(self._find_or_seed(
             _VIO_SEAS, attrib=u.xag_attrs(c.XAG.VIO_NET)), net.SEA)
         return es
 
     @ewrap.Wrapper.xag_property(c.XAG.VIO_NET)
     def trunk_adapters(self):
-        es = ewrap.WrapperElemList(
+        es = self._elem_list(
             self._find_or_seed(_VIO_TRUNK_ADPTS,
                                attrib=u.xag_attrs(c.XAG.VIO_NET)),
             net.TrunkAdapter)
@@ -376,7 +376,7 @@ class VIOS(bp.BasePartition):
         This list is READ-ONLY.
         """
         # TODO(efried): remove parent_entry once VIOS has pg83 in Events
-        es = ewrap.WrapperElemList(
+        es = self._elem_list(
             self._find_or_seed(stor.PVS, attrib=u.xag_attrs(c.XAG.VIO_STOR)),
             stor.PV, parent_entry=self)
         es_list = [es_val for es_val in es]
@@ -386,7 +386,7 @@ class VIOS(bp.BasePartition):
     def io_adpts_for_link_agg(self):
         vioFreeIo = self._find(_VIO_FREE_IO_ADPTS_FOR_LNAGG)
         if vioFreeIo:
-            es = ewrap.WrapperElemList(
+            es = self._elem_list(
                 self._find_or_seed(_VIO_FREE_IO_ADPTS_FOR_LNAGG,
                                    attrib=u.xag_attrs(c.XAG.VIO_NET)),
                 LinkAggrIOAdapterChoice)
@@ -738,7 +738,7 @@ class VSCSIBus(ewrap.EntryWrapper, VStorageMapping):
 
     @property
     def mappings(self):
-        return ewrap.WrapperElemList(self._find_or_seed(
+        return self._elem_list(self._find_or_seed(
             _BUS_ASSOC_MAPS), STDev)
 
     @mappings.setter